@@ -1,7 +1,8 @@
 # Attendence/components/admin_ui.py
 import streamlit as st
-import pandas as pd
-from Attendence.services import auth_service, class_service, attendance_service, github_service
+from Attendence.services import auth_service, class_service, attendance_service, attendance_matrix, github_service
+from Attendence.components.live_updates import rerun_on_change
+from Attendence.components.matrix_view import show_matrix_window
 from Attendence.core.logger import get_logger
 from Attendence.core.utils import current_ist_date
 
@@ -80,16 +81,20 @@ def show_admin_panel():
 
     # Class Controls
     try:
-        classes = class_service.get_all_classes()
+        registry = class_service.get_class_registry()
+        class_names = registry.names()
     except Exception:
         st.error("Failed to fetch classes.")
         return
 
-    if not classes:
+    if not class_names:
         st.warning("No classes found.")
         return
 
-    class_names = [c["class_name"] for c in classes]
+    try:
+        today_counts = attendance_service.get_daily_counts(class_names)
+    except Exception:
+        today_counts = {}
     
     # Persist selection across reruns
     if "admin_selected_class" not in st.session_state:
@@ -106,25 +111,29 @@ def show_admin_panel():
     selected_class_name = st.selectbox(
         "📚 Select a Class", 
         class_names, 
-        index=current_index
+        index=current_index,
+        format_func=lambda name: f"{name} ({today_counts[name]} today)" if name in today_counts else name
     )
     
     # Update state
     st.session_state.admin_selected_class = selected_class_name
-    config = next((c for c in classes if c["class_name"] == selected_class_name), None)
+    rerun_on_change("admin", selected_class_name)
+    config = registry.get(selected_class_name)
 
     st.markdown(f"**Current Code:** `{config['code']}`")
     st.markdown(f"**Current Limit:** `{config['daily_limit']}`")
+    if selected_class_name in today_counts:
+        st.markdown(f"**Today's Check-ins:** `{today_counts[selected_class_name]}` / `{config['daily_limit']}`")
 
     is_open = config.get("is_open", False)
-    other_open = [c["class_name"] for c in classes if c.get("is_open") and c["class_name"] != selected_class_name]
 
     st.subheader("🛠️ Attendance Controls")
     st.info(f"Status: {'OPEN' if is_open else 'CLOSED'}")
     col1, col2 = st.columns(2)
     with col1:
         if st.button("✅ Open Attendance"):
-            if other_open:
+            if registry.is_any_other_open(selected_class_name):
+                other_open = [name for name in registry.open_classes() if name != selected_class_name]
                 st.warning(f"Close other open classes: {', '.join(other_open)}")
             else:
                 class_service.update_class_status(selected_class_name, True)
@@ -144,27 +153,15 @@ def show_admin_panel():
 
     # Matrix & Push
     try:
-        records = attendance_service.fetch_attendance_records(selected_class_name)
+        matrix = attendance_matrix.get_attendance_matrix(selected_class_name)
     except Exception:
         st.error("Failed to fetch records.")
         return
 
-    if records:
-        df = pd.DataFrame(records)
-        df["status"] = "P"
-        pivot_df = df.pivot_table(index=["roll_number", "name"], columns="date", values="status", aggfunc="first", fill_value="A").reset_index()
-        pivot_df["roll_number"] = pd.to_numeric(pivot_df["roll_number"], errors="coerce")
-        pivot_df = pivot_df.dropna(subset=["roll_number"])
-        pivot_df["roll_number"] = pivot_df["roll_number"].astype(int)
-        pivot_df = pivot_df.sort_values("roll_number")
-
-        def highlight(val):
-            return "background-color:#d4edda;color:green" if val == "P" else "background-color:#f8d7da;color:red"
-
-        styled = pivot_df.style.map(highlight, subset=pivot_df.columns[2:])
-        st.dataframe(styled, width="stretch")
+    if not matrix.is_empty:
+        show_matrix_window(matrix, "admin_matrix")
 
-        csv_data = pivot_df.to_csv(index=False)
+        csv_data = matrix.to_csv()
         st.download_button("⬇️ Download CSV", csv_data.encode(), f"{selected_class_name}_matrix.csv", "text/csv")
 
         if st.button("🚀 Push to GitHub"):
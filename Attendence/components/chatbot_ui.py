@@ -1,15 +1,15 @@
 # Attendence/components/chatbot_ui.py
 import streamlit as st
-import pandas as pd
-from Attendence.services import chatbot_service, class_service, attendance_service
+from Attendence.services import answer_cache, chatbot_service, class_service, attendance_matrix
 from Attendence.services.chatbot_service import AppState
+from Attendence.components.matrix_view import show_matrix_window
 
 def show_chatbot_panel():
     st.header("🤖 Chat with Attendance Data")
 
     # --- Step 1: Dropdown for Class Files from Supabase ---
     try:
-        class_names = [c["class_name"] for c in class_service.get_all_classes()]
+        class_names = class_service.get_class_registry().names()
     except Exception as e:
         st.error(f"Failed to fetch classes: {e}")
         return
@@ -23,43 +23,30 @@ def show_chatbot_panel():
     if selected_class:
         # --- Fetch Attendance Data for Selected Class ---
         try:
-            records = attendance_service.fetch_attendance_records(selected_class)
+            matrix = attendance_matrix.get_attendance_matrix(selected_class)
         except Exception as e:
             st.error(f"Failed to fetch attendance records: {e}")
             return
 
-        if not records:
+        if matrix.is_empty:
             st.warning(f"No attendance records found for {selected_class}.")
             return
 
-        # --- Process Data into Pivot Table ---
-        df = pd.DataFrame(records)
-        df["status"] = "P"
-        # Pivot: Rows=Students, Cols=Dates, Value=P/A
-        pivot_df = df.pivot_table(
-            index=["roll_number", "name"], 
-            columns="date", 
-            values="status", 
-            aggfunc="first", 
-            fill_value="A"
-        ).reset_index()
+        # Rows=Students, Cols=Dates, Value=P/A
+        pivot_df = matrix.frame
 
-        # Clean up roll numbers for consistent sorting/display
-        pivot_df["roll_number"] = pd.to_numeric(pivot_df["roll_number"], errors="coerce")
-        pivot_df = pivot_df.dropna(subset=["roll_number"])
-        pivot_df["roll_number"] = pivot_df["roll_number"].astype(int)
-        pivot_df = pivot_df.sort_values("roll_number")
-
-        st.dataframe(pivot_df, width="stretch")
+        show_matrix_window(matrix, "chatbot_matrix", styled=False)
 
         # --- Step 2: Setup Chatbot Agent for Selected File ---
-        if (
-            "chat_agent" not in st.session_state
-            or st.session_state.get("active_file") != selected_class
-        ):
-            st.session_state.chat_agent = chatbot_service.get_agent_for_df(pivot_df)
+        if st.session_state.get("active_file") != selected_class:
             st.session_state.active_file = selected_class
             st.session_state.chat_history = []
+        # Rebuilt on new data (keeping the history) so answers see it
+        if st.session_state.get("chat_agent_version") != (selected_class, matrix.version):
+            st.session_state.chat_agent = chatbot_service.get_agent_for_df(
+                pivot_df, selected_class, matrix.version, presence=matrix.presence
+            )
+            st.session_state.chat_agent_version = (selected_class, matrix.version)
 
         # --- Step 3: Chat Display & Logic ---
         # Display existing history
@@ -80,16 +67,32 @@ def show_chatbot_panel():
             st.session_state.chat_history.append(("You", question))
 
             # Process with spinner
+            result, cached, intent = {}, None, None
             with st.spinner("Thinking..."):
                 try:
                     result = st.session_state.chat_agent.invoke(AppState(question=question))
                     answer = result["answer"]
+                    cached = result.get("cached")
+                    intent = result.get("intent")
                 except Exception as e:
                     answer = f"❌ Error: {str(e)}"
             
             # Display bot response
             with st.chat_message("assistant"):
-                st.markdown(answer)
+                if result.get("summary_prompt"):
+                    # Complex result: stream the LLM summary as it is generated
+                    answer = st.write_stream(
+                        chatbot_service.stream_summary(result["summary_prompt"], fallback=str(result.get("result")))
+                    )
+                    answer_cache.remember_answer(selected_class, matrix.version, result["question"], answer)
+                else:
+                    st.markdown(answer)
+                if intent:
+                    st.caption("⚡ Answered from class statistics")
+                elif cached == "answer":
+                    st.caption("⚡ Cached answer")
+                elif cached == "code":
+                    st.caption("⚡ Reused cached query on the latest data")
             
             # Add to history
             st.session_state.chat_history.append(("Bot", answer))
@@ -0,0 +1,53 @@
+# Attendence/components/diagnostics_ui.py
+import streamlit as st
+from Attendence.core import metrics
+from Attendence.core.cache import cache_stats
+from Attendence.services import attendance_service
+from Attendence.services.change_feed import get_change_feed
+
+def show_diagnostics_panel():
+    st.subheader("🩺 Diagnostics")
+
+    # Service call timings
+    st.markdown("#### ⏱️ Service Calls")
+    if not metrics.ENABLED:
+        st.info("Call metrics are off. Set `METRICS_ENABLED=1` and restart to record timings.")
+    else:
+        calls = metrics.snapshot()
+        if calls:
+            st.caption("Percentiles are histogram bucket upper bounds.")
+            st.dataframe(calls, width="stretch", hide_index=True)
+        else:
+            st.info("No calls recorded yet.")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("⬇️ Prometheus Metrics", metrics.render_prometheus(), "metrics.prom", "text/plain")
+        with col2:
+            if st.button("♻️ Reset Metrics"):
+                metrics.reset()
+                st.rerun()
+
+    # Caches
+    st.markdown("#### 📈 Caches")
+    st.dataframe(
+        [{"cache": name, **stats} for name, stats in cache_stats().items()],
+        width="stretch",
+        hide_index=True,
+    )
+
+    # Change feed
+    feed = get_change_feed()
+    st.markdown("#### 📡 Change Feed")
+    st.markdown(f"**Status:** `{'live' if feed.live else 'offline (polling)'}` · **Events applied:** `{feed.events}`")
+
+    # Write-behind queue
+    if attendance_service.write_behind_enabled():
+        queue = attendance_service.get_submission_queue()
+        st.markdown("#### 📥 Write-Behind Queue")
+        st.markdown(f"**Pending:** `{queue.pending_count()}` · **Failed:** `{queue.failed_count()}`"
+                    + (f" · **Last error:** `{queue.last_error}`" if queue.last_error else ""))
+        failed = queue.failed_rows()
+        if failed:
+            st.caption("Submissions that failed on their own after every retry; they were not recorded.")
+            st.dataframe(failed, width="stretch", hide_index=True)
@@ -0,0 +1,25 @@
+# Attendence/components/live_updates.py
+import streamlit as st
+from Attendence.services.change_feed import TABLES, get_change_feed
+
+# How often each session checks the in-memory feed version (no queries)
+POLL_SECONDS = 2
+
+def rerun_on_change(key, class_name=None, tables=TABLES):
+    """
+    Reruns this session when the change feed reports a change to `class_name`
+    (any class if None) in `tables`. Returns False if the feed is not live,
+    so the caller can keep its manual refresh.
+    """
+    feed = get_change_feed()
+    if not feed.live:
+        return False
+    state_key = f"feed_version_{key}"
+    st.session_state[state_key] = feed.version(class_name, tables)
+    _watch(feed, state_key, class_name, tuple(tables))
+    return True
+
+@st.fragment(run_every=POLL_SECONDS)
+def _watch(feed, state_key, class_name, tables):
+    if feed.version(class_name, tables) != st.session_state.get(state_key):
+        st.rerun()
@@ -0,0 +1,52 @@
+# Attendence/components/matrix_view.py
+import streamlit as st
+
+PAGE_SIZES = (25, 50, 100, 200)
+DEFAULT_DATES = 30
+
+def highlight(val):
+    return "background-color:#d4edda;color:green" if val == "P" else "background-color:#f8d7da;color:red"
+
+def _clamp_state(state_key, low, high, default):
+    """Seeds or clamps a keyed number_input's value so a shrunken range never raises on rerun."""
+    value = st.session_state.get(state_key, default)
+    st.session_state[state_key] = min(max(int(value), low), high)
+
+def show_matrix_window(matrix, key, styled=True):
+    """
+    Paged, searchable view of an attendance matrix. Only the visible window
+    (one page of students over the most recent dates) is built, styled and
+    sent to the browser, so reruns cost the same for any class size.
+    """
+    key = f"{key}_{matrix.class_name}"
+    n_dates = matrix.presence.n_dates
+
+    c1, c2, c3, c4 = st.columns([3, 1, 1, 1])
+    query = c1.text_input("🔍 Search roll number or name", key=f"{key}_search").strip()
+    _clamp_state(f"{key}_dates", 1, n_dates, min(DEFAULT_DATES, n_dates))
+    last_dates = c2.number_input("Last N dates", min_value=1, max_value=n_dates, key=f"{key}_dates")
+    page_size = c3.selectbox("Students per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+
+    rows = matrix.search(query)
+    pages = max(1, -(-len(rows) // page_size))
+    # One page key per view; a new search or page size starts at page 1
+    if st.session_state.get(f"{key}_page_for") != (query, page_size):
+        st.session_state[f"{key}_page_for"] = (query, page_size)
+        st.session_state.pop(f"{key}_page", None)
+    _clamp_state(f"{key}_page", 1, pages, 1)
+    page = c4.number_input("Page", min_value=1, max_value=pages, key=f"{key}_page")
+
+    window = matrix.window(rows, page, page_size, last_dates)
+    if not window.matches:
+        st.info(f"No students match '{query}'.")
+        return
+
+    frame = window.frame
+    if styled:
+        frame = frame.style.map(highlight, subset=frame.columns[2:])
+    st.dataframe(frame, width="stretch", hide_index=True)
+    st.caption(
+        f"Students {window.first_row + 1}–{window.first_row + len(window.frame)} of {window.matches} · "
+        f"page {window.page}/{window.pages} · {len(window.dates)} of {n_dates} dates "
+        f"({window.dates[0]} → {window.dates[-1]})"
+    )
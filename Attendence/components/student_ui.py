@@ -1,6 +1,7 @@
 # Attendence/components/student_ui.py
 import streamlit as st
-from Attendence.services import class_service, attendance_service
+from Attendence.services import class_service, attendance_service, chart_service, class_index
+from Attendence.components.live_updates import rerun_on_change
 from Attendence.core.utils import current_ist_date
 from Attendence.core.logger import get_logger
 
@@ -10,9 +11,11 @@ def show_student_panel():
     col_title, col_refresh = st.columns([4, 1])
     with col_title:
         st.title("🎓 Student Attendance Portal")
+    # Open/close and settings changes are pushed; Refresh is only the fallback
+    live = rerun_on_change("student_classes", tables=("classroom_settings",))
     with col_refresh:
-        if st.button("🔄 Refresh"):
-             class_service.get_open_classes.clear()
+        if not live and st.button("🔄 Refresh"):
+             class_service.refresh_classes()
              st.rerun()
 
     try:
@@ -27,22 +30,19 @@ def show_student_panel():
 
     selected_class = st.selectbox("Select Your Class", class_list)
 
-    # We need settings for the selected class to check code and limit
-    # The optimized way is to fetch all classes and find the one.
-    # Or add get_class_settings to service.
-    # For now, let's just fetch all classes again or rely on class_service to provide a helper.
-    # To keep it simple, I'll assume we can get class details.
-    
-    # Since class_service.get_all_classes() returns all data, we can use that.
-    classes = class_service.get_all_classes()
-    settings = next((c for c in classes if c["class_name"] == selected_class), None)
-    
+    settings = class_service.get_class_registry().get(selected_class)
     if not settings:
         st.error("Class settings not found.")
         return
 
-    required_code = settings["code"]
-    daily_limit = settings["daily_limit"]
+    # Roll-map and duplicate lookups below are served from the warm index
+    try:
+        class_index.ensure_warm(selected_class)
+    except Exception:
+        logger.warning(
+            f"Could not warm index for {selected_class}; falling back to direct queries",
+            extra={"rate_limit": 60, "log_key": ("warm", selected_class)},
+        )
 
     roll_number_raw = st.text_input("Roll Number").strip()
 
@@ -74,50 +74,44 @@ def show_student_panel():
     if st.button("✅ Submit Attendance"):
         today = current_ist_date()
 
-        if code_input != required_code:
-            st.error("❌ Incorrect attendance code.")
-            st.stop()
-
-        # Check existing
-        if attendance_service.check_existing_attendance(selected_class, roll_number, today):
-            st.error("❌ Attendance already marked today.")
-            st.stop()
-            return
-
-        # Check limit
-        count = attendance_service.get_daily_count(selected_class, today)
-        if count >= daily_limit:
-            st.warning("⚠️ Attendance limit for today has been reached.")
-            st.stop()
-            return
-
-        # Lock roll map if needed
-        if not locked_name:
-            try:
-                attendance_service.lock_roll_map(selected_class, roll_number, name)
-            except Exception:
-                 st.error("Failed to lock roll number.")
-                 st.stop()
-                 return
-        elif locked_name != name:
-             st.error("❌ Roll number already locked to a different name.")
-             st.stop()
-             return
-
-        # Mark attendance
+        # Code, duplicate, limit and roll-lock checks run server-side in one call,
+        # or locally before journaling when write-behind mode is on
+        if attendance_service.write_behind_enabled():
+            submit = attendance_service.submit_attendance_queued
+        else:
+            submit = attendance_service.submit_attendance_atomic
         try:
-            attendance_service.submit_attendance(selected_class, roll_number, name, today)
-            st.success("✅ Attendance submitted successfully!")
+            outcome = submit(selected_class, roll_number, name, code_input, today)
         except Exception:
             st.error("Failed to submit attendance.")
+            return
+
+        Outcome = attendance_service.SubmitOutcome
+        if outcome is Outcome.ACCEPTED:
+            st.success("✅ Attendance submitted successfully!")
+        elif outcome is Outcome.QUEUED:
+            st.success("✅ Attendance accepted! It will be recorded in a few seconds.")
+        elif outcome is Outcome.INVALID_CODE:
+            st.error("❌ Incorrect attendance code.")
+        elif outcome is Outcome.ALREADY_MARKED:
+            st.error("❌ Attendance already marked today.")
+        elif outcome is Outcome.LIMIT_REACHED:
+            st.warning("⚠️ Attendance limit for today has been reached.")
+        elif outcome is Outcome.NAME_MISMATCH:
+            st.error("❌ Roll number already locked to a different name.")
+        elif outcome is Outcome.NAME_REQUIRED:
+            st.error("❌ Please enter your name.")
+        else:
+            st.warning("🚫 This class is no longer open for attendance.")
 
 def show_view_attendance_panel():
     col_sub, col_ref = st.columns([4,1])
     with col_sub:
         st.subheader("📅 Check Your Attendance Record")
+    live = rerun_on_change("view_classes", tables=("classroom_settings",))
     with col_ref:
-        if st.button("🔄 Refresh", key="refresh_view"):
-            class_service.get_open_classes.clear()
+        if not live and st.button("🔄 Refresh", key="refresh_view"):
+            class_service.refresh_classes()
             st.rerun()
 
     try:
@@ -143,45 +137,23 @@ def show_view_attendance_panel():
         roll_number = int(roll_number_input)
 
         try:
-            # Fetch ALL records to get proper date range (to know absents)
-            all_records = attendance_service.fetch_attendance_records(selected_class)
+            # Only this student's rows plus the class's date list
+            summary = attendance_service.get_student_summary(selected_class, roll_number)
         except Exception:
             st.error("Failed to fetch records.")
             return
 
-        if not all_records:
+        if not summary.total_classes:
             st.info("No attendance records found for this class.")
             return
 
         import pandas as pd
-        import matplotlib.pyplot as plt
-
-        df = pd.DataFrame(all_records)
 
-        # Coerce roll_number to ensure type match
-        df["roll_number"] = pd.to_numeric(df["roll_number"], errors="coerce")
-        df = df.dropna(subset=["roll_number"])
-        df["roll_number"] = df["roll_number"].astype(int)
-        
-        # Identification of all unique dates for this class
-        all_dates = sorted(df["date"].unique())
-        total_classes = len(all_dates)
-
-        # Filter for student
-        my_records = df[df["roll_number"] == roll_number]
-        
-        # Robustly count present days (unique dates present)
-        my_present_dates = my_records["date"].unique()
-        present_count = len(my_present_dates)
-        
-        # Absent count is simply total - present
-        absent_count = total_classes - present_count
-        
-        # Calculate percentage
-        if total_classes > 0:
-            percentage = (present_count / total_classes) * 100
-        else:
-            percentage = 0.0
+        all_dates = summary.class_dates
+        total_classes = summary.total_classes
+        present_count = summary.present_count
+        absent_count = summary.absent_count
+        percentage = summary.percentage
 
         # --- Visualization ---
         col1, col2 = st.columns([1, 2])
@@ -189,19 +161,11 @@ def show_view_attendance_panel():
         with col1:
             # Donut Chart
             if total_classes > 0:
-                fig, ax = plt.subplots(figsize=(3, 3))
-                ax.pie(
-                    [present_count, absent_count], 
-                    labels=["Present", "Absent"], 
-                    colors=["#4CAF50", "#FF5252"],
-                    autopct=None, 
-                    startangle=90,
-                    wedgeprops=dict(width=0.4), # Donut
-                    textprops={'color': "white"}
+                donut = chart_service.ChartSpec(
+                    "donut", selected_class, attendance_service.records_version(selected_class),
+                    present_count, absent_count, student=roll_number,
                 )
-                ax.text(0, 0, f"{percentage:.0f}%", ha='center', va='center', fontsize=20, fontweight='bold', color="white")
-                fig.patch.set_alpha(0)
-                st.pyplot(fig, width="stretch")
+                st.image(chart_service.render(donut), width="stretch")
             else:
                 st.write("No class data.")
 
@@ -219,7 +183,7 @@ def show_view_attendance_panel():
             # We want to show ALL dates and status P/A
             # Create a dataframe of all dates
             history_data = []
-            present_dates = set(my_records["date"].unique())
+            present_dates = summary.present_dates
             
             for date in sorted(all_dates, reverse=True):
                 status = "✅ Present" if date in present_dates else "❌ Absent"
@@ -0,0 +1,245 @@
+# Attendence/core/cache.py
+"""
+Small thread-safe in-process caches shared by the services.
+
+Named caches register themselves so their hit/miss/eviction counters can be
+read back with `cache_stats()`.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from .shared_cache import MISSING, get_cache_backend
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+def _register(cache):
+    if cache.name:
+        with _registry_lock:
+            _registry[cache.name] = cache
+
+def cache_stats():
+    """Returns {cache name: stats dict} for every named cache."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+
+class _Counters:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self),
+        }
+
+
+class TTLCache(_Counters):
+    """
+    Dict-like cache whose entries expire `ttl` seconds after they were set.
+    Expired entries are dropped lazily on access.
+    """
+
+    def __init__(self, ttl, name=None):
+        super().__init__()
+        self.ttl = ttl
+        self.name = name
+        self._data = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                self.evictions += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+
+    def update(self, key, func):
+        """
+        Replace a fresh entry with func(value), keeping its expiry.
+        Missing or expired entries are left alone. Returns True if updated.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self._data.pop(key, None)
+                return False
+            self._data[key] = (func(entry[0]), entry[1])
+            return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def discard_where(self, predicate):
+        """Drops every entry whose key satisfies predicate(key)."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self.evictions += len(self._data)
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class VersionedCache(_Counters):
+    """
+    LRU cache partitioned by namespace (e.g. a class name), where every
+    namespace has a generation counter. Entries are keyed on
+    (namespace, generation, key): a write bumps only its namespace's
+    generation, so other namespaces keep their entries. `ttl` (seconds)
+    additionally bounds staleness from writes made by other processes.
+
+    Generations are held by a cache backend (core/shared_cache). With a shared
+    backend they are seen by every replica, and values missing from this
+    process's LRU are looked up in the backend before calling the loader.
+    """
+
+    def __init__(self, name=None, maxsize=128, ttl=None, backend=None):
+        super().__init__()
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared_hits = 0
+        self._backend = backend
+        self._entries = OrderedDict()
+        self._namespaces = set()
+        self._lock = threading.Lock()
+        _register(self)
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = get_cache_backend()
+        return self._backend
+
+    def _stamp(self, namespace):
+        return f"{self.name}:{namespace}"
+
+    def generation(self, namespace):
+        return self.backend.version(self._stamp(namespace))
+
+    def bump(self, namespace):
+        """Invalidates one namespace. Returns its new generation."""
+        generation = self.backend.bump(self._stamp(namespace))
+        with self._lock:
+            self._namespaces.add(namespace)
+            stale = [k for k in self._entries if k[0] == namespace]
+            for k in stale:
+                del self._entries[k]
+            self.evictions += len(stale)
+        return generation
+
+    def get(self, namespace, key=(), default=None):
+        """Returns the cached value without loading, or `default`."""
+        value = self._lookup(namespace, self.generation(namespace), key)
+        return default if value is MISSING else value
+
+    def put(self, namespace, value, key=(), generation=None):
+        """
+        Stores a value under the namespace's current generation (or only if it
+        still equals `generation`, for values read before a possible bump).
+        """
+        current = self.generation(namespace)
+        if generation is not None and generation != current:
+            return
+        self._store(namespace, current, key, value)
+
+    def get_or_load(self, namespace, loader, key=()):
+        """
+        Returns the cached value for (namespace, current generation, key),
+        calling loader() on a miss. A value loaded while the namespace was
+        bumped is returned but not stored.
+        """
+        generation = self.generation(namespace)
+        value = self._lookup(namespace, generation, key)
+        if value is not MISSING:
+            return value
+        value = loader()
+        if self.generation(namespace) == generation:
+            self._store(namespace, generation, key, value)
+        return value
+
+    def _lookup(self, namespace, generation, key):
+        full_key = (namespace, generation, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(full_key)
+                    self.hits += 1
+                    return value
+                del self._entries[full_key]
+                self.evictions += 1
+
+        value = self.backend.get(self._stamp(namespace), key, generation)
+        with self._lock:
+            if value is MISSING:
+                self.misses += 1
+            else:
+                # Filled by another replica; keep a local copy
+                self.hits += 1
+                self.shared_hits += 1
+                self._put_local(full_key, value)
+        return value
+
+    def _store(self, namespace, generation, key, value):
+        with self._lock:
+            self._namespaces.add(namespace)
+            self._put_local((namespace, generation, key), value)
+        self.backend.set(self._stamp(namespace), key, generation, value, self.ttl)
+
+    def _put_local(self, full_key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._entries[full_key] = (value, expires_at)
+        self._entries.move_to_end(full_key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Invalidates every namespace."""
+        for namespace in list(self._namespaces):
+            self.bump(namespace)
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        stats = super().stats()
+        stats["namespaces"] = len(self._namespaces)
+        stats["shared_hits"] = self.shared_hits
+        stats["backend"] = type(self.backend).__name__
+        return stats
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,8 +1,8 @@
 # Attendence/clients.py
 import streamlit as st
-from supabase import create_client
-from github import Github
 from .config import get_env
+from .memory_client import MemorySupabaseClient
+from .sqlite_client import SQLiteSupabaseClient
 from .logger import get_logger
 
 logger = get_logger(__name__)
@@ -11,12 +11,22 @@ logger = get_logger(__name__)
 def create_supabase_client():
     """
     Create and return a supabase client using st.secrets or env variables.
+    SUPABASE_URL=memory:// returns the in-process stand-in instead, and
+    SUPABASE_URL=sqlite:///<path> the embedded SQLite backend.
     """
     try:
         url = get_env("SUPABASE_URL")
+        if url == "memory://":
+            logger.info("Using in-memory Supabase stand-in.")
+            return MemorySupabaseClient()
+        if url and url.startswith("sqlite:///"):
+            path = url[len("sqlite:///"):]
+            logger.info(f"Using embedded SQLite backend at {path}")
+            return SQLiteSupabaseClient(path)
         key = get_env("SUPABASE_KEY")
         if not url or not key:
             raise RuntimeError("SUPABASE_URL / SUPABASE_KEY are not set.")
+        from supabase import create_client
         client = create_client(url, key)
         return client
     except Exception as e:
@@ -37,6 +47,7 @@ def create_github_repo():
             logger.info("GitHub credentials not fully configured; GitHub features will be disabled.")
             return None, None
 
+        from github import Github
         gh = Github(token)
         repo = gh.get_user(username).get_repo(repo_name)
         return gh, repo
@@ -1,15 +1,198 @@
+
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import random
 import sys  # line number
 import os  # files
+import threading
+import time
+
+from .config import get_env
 
 # Create logs folder if not exists
 LOG_DIR = "logs"
 
 os.makedirs(LOG_DIR, exist_ok=True)
 
+TEXT_FORMAT = (
+    "%(asctime)s | %(levelname)s | %(name)s | "
+    "%(filename)s:%(lineno)d | %(funcName)s() | %(message)s"
+)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "line": record.lineno,
+            "function": record.funcName,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Thins out repetitive hot-path records. Opt in per call with `extra`:
+
+        logger.warning("...", extra={"rate_limit": 30})   # at most once per 30 s
+        logger.info("...", extra={"sample": 0.01})        # keep ~1% of calls
+
+    Rate-limited records are keyed on `log_key` if given, else the call site;
+    the next record let through reports how many were suppressed. Records
+    without either key always pass.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._last = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        sample = getattr(record, "sample", None)
+        if sample is not None and random.random() >= sample:
+            return False
+
+        interval = getattr(record, "rate_limit", None)
+        if interval is None:
+            return True
+        key = getattr(record, "log_key", None) or (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last.get(key, -interval) < interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar suppressed)"
+            record.args = None
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Formats only the message and traceback text in the calling thread, so the
+    listener's formatter (text or JSON) still sees the record's fields.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _level(value, default=logging.DEBUG, problems=None, fallback=logging.INFO):
+    """
+    Parses a level name or number. An unknown name returns `fallback` and
+    appends a message to `problems`, so a typo never breaks the import.
+    """
+    if not value:
+        return default
+    value = str(value).strip().upper()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value)
+    if isinstance(level, int):
+        return level
+    if problems is not None:
+        problems.append(f"Unknown log level {value!r}; using {logging.getLevelName(fallback)}")
+    return fallback
+
+def _logger_levels(problems=None):
+    """Parses LOG_LEVELS="Attendence.services=INFO,change_feed=WARNING"."""
+    levels = {}
+    for item in str(get_env("LOG_LEVELS", "") or "").split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = _level(level, problems=problems)
+    return levels
+
+def _file_handler(path):
+    if str(get_env("LOG_ROTATE", "size")).lower() == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            path,
+            when=get_env("LOG_ROTATE_WHEN", "midnight"),
+            backupCount=int(get_env("LOG_BACKUPS", 7)),
+            encoding="utf-8",
+        )
+    return logging.handlers.RotatingFileHandler(
+        path,
+        maxBytes=int(get_env("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+        backupCount=int(get_env("LOG_BACKUPS", 5)),
+        encoding="utf-8",
+    )
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+def _get_pipeline():
+    """
+    Builds the shared QueueHandler once. Its QueueListener thread owns the
+    console and rotating file handlers, so log calls never block on I/O.
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            return _pipeline
+
+        if str(get_env("LOG_FORMAT", "text")).lower() == "json":
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(TEXT_FORMAT)
+
+        handlers = [logging.StreamHandler(sys.stdout)]
+        path = get_env("LOG_FILE", os.path.join(LOG_DIR, "app.log"))
+        if path:
+            handlers.append(_file_handler(path))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        # Drain queued records on interpreter exit
+        atexit.register(listener.stop)
+
+        queue_handler = _QueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter())
+        problems = []
+        _pipeline = (queue_handler, _level(get_env("LOG_LEVEL"), problems=problems), _logger_levels(problems))
+        if problems:
+            # get_logger would wait on this lock, so attach the handler directly
+            config_logger = logging.getLogger(__name__)
+            config_logger.addHandler(queue_handler)
+            config_logger.propagate = False
+            for message in problems:
+                config_logger.warning(message)
+        return _pipeline
+
 def get_logger(name="attendence"):
     """
     Create and return a logger that logs to both console and logs/app.log.
+    Records go through a queue to a background listener; levels come from
+    LOG_LEVEL and per-logger LOG_LEVELS (matched on dotted prefixes).
     Prevents duplicate handlers and keeps formatting consistent.
     """
     logger = logging.getLogger(name)
@@ -18,28 +201,10 @@ def get_logger(name="attendence"):
     if logger.handlers:
         return logger
 
-    logger.setLevel(logging.DEBUG)
-
-    # Prepare formatter (single definition)
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(name)s | "
-        "%(filename)s:%(lineno)d | %(funcName)s() | %(message)s"
-    )
-
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-
-    # File handler
-    file_handler = logging.FileHandler(
-        os.path.join(LOG_DIR, "app.log"),
-        encoding="utf-8"
-    )
-    file_handler.setFormatter(formatter)
-
-    # Register handlers
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    queue_handler, default_level, levels = _get_pipeline()
+    prefixes = [p for p in levels if name == p or name.startswith(p + ".") or name.endswith("." + p)]
+    logger.setLevel(levels[max(prefixes, key=len)] if prefixes else default_level)
 
+    logger.addHandler(queue_handler)
     logger.propagate = False
     return logger
@@ -0,0 +1,412 @@
+# Attendence/core/memory_client.py
+"""
+In-process stand-in for the Supabase client.
+
+Implements the subset of the postgrest query builder the services use
+(select / insert / upsert / update / delete with comparison and in filters,
+order, limit and count) plus the RPC functions and triggers shipped in `sql/`, so service code
+can run without a live Supabase project. Enable it with SUPABASE_URL=memory://
+
+Row changes are published to `subscribe()`d callbacks as Realtime-shaped
+postgres_changes payloads once the statement finishes, standing in for
+Supabase Realtime.
+"""
+import itertools
+import operator
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from postgrest.exceptions import APIError
+
+# Unique keys mirror the constraints of the real tables.
+UNIQUE_KEYS = {
+    "attendance": ("class_name", "roll_number", "date"),
+    "roll_map": ("class_name", "roll_number"),
+    "classroom_settings": ("class_name",),
+    "attendance_daily_counts": ("class_name", "date"),
+}
+
+
+@dataclass
+class MemoryResponse:
+    data: Any
+    count: Optional[int] = None
+
+
+class MemoryQuery:
+    """Chainable query over one in-memory table."""
+
+    def __init__(self, client, table_name):
+        self._client = client
+        self._table = table_name
+        self._action = "select"
+        self._columns = None
+        self._count = None
+        self._payload = None
+        self._filters = []
+        self._order = []
+        self._limit = None
+
+    # --- Actions ---
+    def select(self, *columns, count=None):
+        self._action = "select"
+        cols = [c.strip() for col in columns for c in col.split(",") if c.strip()]
+        self._columns = None if not cols or "*" in cols else cols
+        self._count = count
+        return self
+
+    def insert(self, json, **kwargs):
+        self._action = "insert"
+        self._payload = json if isinstance(json, list) else [json]
+        return self
+
+    def upsert(self, json, *, ignore_duplicates=False, on_conflict="", **kwargs):
+        self._action = "upsert"
+        self._payload = json if isinstance(json, list) else [json]
+        self._ignore_duplicates = ignore_duplicates
+        self._on_conflict = [c.strip() for c in on_conflict.split(",") if c.strip()] or UNIQUE_KEYS.get(self._table)
+        return self
+
+    def update(self, json, **kwargs):
+        self._action = "update"
+        self._payload = json
+        return self
+
+    def delete(self, **kwargs):
+        self._action = "delete"
+        return self
+
+    # --- Filters ---
+    def eq(self, column, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        return self._compare(column, operator.ne, value)
+
+    def gt(self, column, value):
+        return self._compare(column, operator.gt, value)
+
+    def gte(self, column, value):
+        return self._compare(column, operator.ge, value)
+
+    def lt(self, column, value):
+        return self._compare(column, operator.lt, value)
+
+    def lte(self, column, value):
+        return self._compare(column, operator.le, value)
+
+    def _compare(self, column, op, value):
+        self._filters.append(lambda row: row.get(column) is not None and op(row.get(column), value))
+        return self
+
+    def or_(self, filters, **kwargs):
+        self._filters.append(_parse_logic("or", filters))
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False, **kwargs):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size, **kwargs):
+        self._limit = size
+        return self
+
+    def execute(self):
+        self._client.simulate_latency()
+        try:
+            with self._client.lock:
+                return getattr(self, f"_execute_{self._action}")()
+        finally:
+            self._client.publish_changes()
+
+    # --- Execution ---
+    def _rows(self):
+        return self._client.tables.setdefault(self._table, [])
+
+    def _matches(self, row):
+        return all(f(row) for f in self._filters)
+
+    def _project(self, row):
+        if self._columns is None:
+            return dict(row)
+        return {c: row.get(c) for c in self._columns}
+
+    def _execute_select(self):
+        rows = [r for r in self._rows() if self._matches(r)]
+        for column, desc in reversed(self._order):
+            rows.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+        count = len(rows) if self._count else None
+        if self._limit is not None:
+            rows = rows[: self._limit]
+        if self._client.max_rows is not None:
+            rows = rows[: self._client.max_rows]
+        return MemoryResponse([self._project(r) for r in rows], count)
+
+    def _execute_insert(self):
+        inserted = [self._client.insert_row(self._table, row) for row in self._payload]
+        return MemoryResponse(inserted)
+
+    def _execute_upsert(self):
+        written = []
+        for row in self._payload:
+            existing = self._client.find(self._table, **{k: row.get(k) for k in self._on_conflict})
+            if not existing:
+                written.append(self._client.insert_row(self._table, row))
+            elif not self._ignore_duplicates:
+                old = dict(existing[0])
+                existing[0].update(row)
+                written.append(dict(existing[0]))
+                self._client.record_change(self._table, "UPDATE", existing[0], old)
+        return MemoryResponse(written)
+
+    def _execute_update(self):
+        updated = []
+        for row in self._rows():
+            if self._matches(row):
+                old = dict(row)
+                row.update(self._payload)
+                updated.append(dict(row))
+                self._client.record_change(self._table, "UPDATE", row, old)
+        return MemoryResponse(updated)
+
+    def _execute_delete(self):
+        rows = self._rows()
+        deleted = [dict(r) for r in rows if self._matches(r)]
+        rows[:] = [r for r in rows if not self._matches(r)]
+        for row in deleted:
+            self._client.run_triggers(self._table, "DELETE", row)
+            self._client.record_change(self._table, "DELETE", {}, row)
+        return MemoryResponse(deleted)
+
+
+class MemoryRPC:
+    def __init__(self, client, fn, params):
+        self._client = client
+        self._fn = fn
+        self._params = params or {}
+
+    def execute(self):
+        self._client.simulate_latency()
+        handler = self._client.functions.get(self._fn)
+        if handler is None:
+            raise APIError({"code": "PGRST202", "message": f"Could not find the function {self._fn}"})
+        try:
+            with self._client.lock:
+                return MemoryResponse(handler(self._client, **self._params))
+        finally:
+            self._client.publish_changes()
+
+
+class ChangePublisher:
+    """
+    In-process stand-in for Supabase Realtime, shared by the local clients.
+    Expects `lock`, `listeners` and `_changes` to be set by the client.
+    Only this process's writes are published; `sees_all_writes` is False when
+    other processes can write the same store.
+    """
+
+    sees_all_writes = True
+
+    def subscribe(self, callback):
+        """Registers callback(payload) for every row change on any table."""
+        with self.lock:
+            self.listeners.append(callback)
+
+    def record_change(self, table_name, op, record, old_record=None):
+        if not self.listeners:
+            return
+        self._changes.append({
+            "data": {
+                "schema": "public",
+                "table": table_name,
+                "type": op,
+                "commit_timestamp": datetime.now(timezone.utc).isoformat(),
+                "errors": None,
+                "columns": [],
+                "record": dict(record),
+                "old_record": dict(old_record or {}),
+            },
+            "ids": [],
+        })
+
+    def publish_changes(self):
+        """Delivers recorded changes to listeners, outside the statement lock."""
+        with self.lock:
+            changes, self._changes = self._changes, []
+            listeners = list(self.listeners)
+        for payload in changes:
+            for callback in listeners:
+                callback(payload)
+
+
+class MemorySupabaseClient(ChangePublisher):
+    """
+    Thread-safe, dict-backed replacement for `supabase.Client`.
+    A single lock serialises statements, which gives RPCs the same
+    all-or-nothing behaviour as a Postgres function call.
+    `latency` (seconds) is slept before every request to mimic a network hop.
+    `max_rows` caps select responses like PostgREST's db-max-rows setting.
+    """
+
+    def __init__(self, tables=None, latency=0.0, max_rows=1000):
+        self.latency = latency
+        self.max_rows = max_rows
+        self.requests = 0
+        self.lock = threading.RLock()
+        self.tables = {}
+        self._ids = itertools.count(1)
+        self.functions: dict[str, Callable] = {
+            "submit_attendance_atomic": rpc_submit_attendance_atomic,
+        }
+        self.triggers: dict[str, list[Callable]] = {
+            "attendance": [trigger_bump_attendance_daily_count],
+        }
+        self.listeners: list[Callable] = []
+        self._changes = []
+        # Seed through insert_row so ids, constraints and triggers apply
+        for name, rows in (tables or {}).items():
+            for row in rows:
+                self.insert_row(name, row)
+
+    def table(self, table_name):
+        return MemoryQuery(self, table_name)
+
+    def simulate_latency(self):
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def rpc(self, fn, params=None, **kwargs):
+        return MemoryRPC(self, fn, params)
+
+    def find(self, table_name, **filters):
+        return [r for r in self.tables.get(table_name, []) if all(r.get(k) == v for k, v in filters.items())]
+
+    def insert_row(self, table_name, row):
+        row = dict(row)
+        key = UNIQUE_KEYS.get(table_name)
+        if key and self.find(table_name, **{k: row.get(k) for k in key}):
+            raise APIError({
+                "code": "23505",
+                "message": f'duplicate key value violates unique constraint on {table_name} {key}',
+            })
+        row.setdefault("id", next(self._ids))
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        self.tables.setdefault(table_name, []).append(row)
+        self.run_triggers(table_name, "INSERT", row)
+        self.record_change(table_name, "INSERT", row)
+        return dict(row)
+
+    def run_triggers(self, table_name, op, row):
+        for trigger in self.triggers.get(table_name, ()):
+            trigger(self, op, row)
+
+
+# --- PostgREST logic filter parsing (or=/and= syntax) ---
+_OPERATORS = {
+    "eq": operator.eq,
+    "neq": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+def _split_top_level(expr):
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(expr):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(expr[start:i])
+            start = i + 1
+    parts.append(expr[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+def _parse_logic(kind, expr):
+    conditions = [_parse_condition(part) for part in _split_top_level(expr)]
+    combine = any if kind == "or" else all
+    return lambda row: combine(cond(row) for cond in conditions)
+
+def _parse_condition(text):
+    for kind in ("and", "or"):
+        if text.startswith(kind + "(") and text.endswith(")"):
+            return _parse_logic(kind, text[len(kind) + 1:-1])
+    column, op, value = text.split(".", 2)
+    compare = _OPERATORS[op]
+
+    def check(row):
+        actual = row.get(column)
+        return actual is not None and compare(actual, _coerce(value, actual))
+    return check
+
+def _coerce(value, like):
+    if isinstance(like, bool):
+        return value == "true"
+    if isinstance(like, int):
+        return int(value)
+    if isinstance(like, float):
+        return float(value)
+    return value
+
+
+# --- Triggers (keep in sync with sql/) ---
+def trigger_bump_attendance_daily_count(client, op, row):
+    counters = client.find("attendance_daily_counts", class_name=row["class_name"], date=row["date"])
+    if op == "INSERT":
+        if counters:
+            counters[0]["count"] += 1
+        else:
+            client.tables.setdefault("attendance_daily_counts", []).append(
+                {"class_name": row["class_name"], "date": row["date"], "count": 1}
+            )
+    elif counters:
+        counters[0]["count"] = max(counters[0]["count"] - 1, 0)
+
+
+# --- RPC functions (keep in sync with sql/) ---
+def rpc_submit_attendance_atomic(client, p_class_name, p_roll_number, p_name, p_code, p_date):
+    settings = client.find("classroom_settings", class_name=p_class_name)
+    if not settings:
+        return "class_not_found"
+    settings = settings[0]
+    if not settings.get("is_open"):
+        return "class_closed"
+    if settings.get("code") != p_code:
+        return "invalid_code"
+    if client.find("attendance", class_name=p_class_name, roll_number=p_roll_number, date=p_date):
+        return "already_marked"
+    counters = client.find("attendance_daily_counts", class_name=p_class_name, date=p_date)
+    if (counters[0]["count"] if counters else 0) >= settings["daily_limit"]:
+        return "limit_reached"
+
+    name = (p_name or "").strip()
+    locked = client.find("roll_map", class_name=p_class_name, roll_number=p_roll_number)
+    if not locked:
+        if not name:
+            return "name_required"
+        client.insert_row("roll_map", {"class_name": p_class_name, "roll_number": p_roll_number, "name": name})
+    else:
+        if name and locked[0]["name"] != name:
+            return "name_mismatch"
+        name = locked[0]["name"]
+
+    client.insert_row("attendance", {
+        "class_name": p_class_name,
+        "roll_number": p_roll_number,
+        "name": name,
+        "date": p_date,
+    })
+    return "accepted"
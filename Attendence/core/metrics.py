@@ -0,0 +1,236 @@
+# Attendence/core/metrics.py
+"""
+Lightweight call metrics for the service layer.
+
+`@instrument()` on a service function records its call count, errors, a
+latency histogram and the rows it returned; `timer(name)` does the same for a
+block (e.g. an LLM call). Cache hit/miss counters come from core/cache.
+Everything is exported as Prometheus text, to METRICS_FILE (rewritten every
+METRICS_FILE_INTERVAL seconds, for a node_exporter textfile collector) and/or
+over HTTP at 127.0.0.1:METRICS_PORT/metrics, and shown in the admin
+Diagnostics tab.
+
+Enable with METRICS_ENABLED=1. When disabled (the default) `instrument`
+returns the function unchanged and `timer` a shared no-op context, so the hot
+path pays nothing.
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+
+from .cache import cache_stats
+from .config import get_env
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+ENABLED = str(get_env("METRICS_ENABLED", "")).lower() in ("1", "true", "yes")
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NULL_TIMER = nullcontext()
+
+
+class CallMetric:
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, rows=None, error=False):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            if error:
+                self.errors += 1
+            if rows is not None:
+                self.rows += rows
+
+    def quantile(self, q):
+        """Upper bound (seconds) of the bucket holding the q-th quantile."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip((*BUCKETS, float("inf")), self.buckets):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        return {
+            "call": self.name,
+            "calls": self.count,
+            "errors": self.errors,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms_le": self.quantile(0.50) * 1000,
+            "p95_ms_le": self.quantile(0.95) * 1000,
+            "p99_ms_le": self.quantile(0.99) * 1000,
+            "rows": self.rows,
+        }
+
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+def get_metric(name):
+    metric = _metrics.get(name)
+    if metric is None:
+        with _metrics_lock:
+            metric = _metrics.setdefault(name, CallMetric(name))
+    return metric
+
+def _count_rows(result):
+    if isinstance(result, (list, tuple, set, frozenset, dict)):
+        return len(result)
+    shape = getattr(result, "shape", None)
+    if shape:
+        return shape[0]
+    return None
+
+def instrument(name=None):
+    """
+    Decorator recording latency, errors and returned rows for a function.
+    Returns the function untouched when metrics are disabled.
+    """
+    def decorate(func):
+        if not ENABLED:
+            return func
+        metric = get_metric(name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}")
+        start_exporters()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                metric.observe(time.perf_counter() - start, error=True)
+                raise
+            metric.observe(time.perf_counter() - start, _count_rows(result))
+            return result
+        return wrapper
+    return decorate
+
+@contextmanager
+def _timed(metric):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        metric.observe(time.perf_counter() - start, error=True)
+        raise
+    metric.observe(time.perf_counter() - start)
+
+def timer(name):
+    """Context manager timing a block under `name` (no-op when disabled)."""
+    return _timed(get_metric(name)) if ENABLED else _NULL_TIMER
+
+def snapshot():
+    """Per-call stats, busiest first."""
+    with _metrics_lock:
+        metrics = list(_metrics.values())
+    return sorted((m.snapshot() for m in metrics), key=lambda s: -s["calls"])
+
+def reset():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+# --- Prometheus export ---
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def render_prometheus():
+    """Call and cache metrics in the Prometheus text exposition format."""
+    with _metrics_lock:
+        metrics = sorted(_metrics.values(), key=lambda m: m.name)
+    lines = [
+        "# HELP attendance_call_seconds Service call latency.",
+        "# TYPE attendance_call_seconds histogram",
+    ]
+    for m in metrics:
+        call = _label(m.name)
+        cumulative = 0
+        for bound, n in zip((*BUCKETS, "+Inf"), m.buckets):
+            cumulative += n
+            lines.append(f'attendance_call_seconds_bucket{{call="{call}",le="{bound}"}} {cumulative}')
+        lines.append(f'attendance_call_seconds_sum{{call="{call}"}} {m.total:.6f}')
+        lines.append(f'attendance_call_seconds_count{{call="{call}"}} {m.count}')
+
+    lines += ["# HELP attendance_call_errors_total Service calls that raised.", "# TYPE attendance_call_errors_total counter"]
+    lines += [f'attendance_call_errors_total{{call="{_label(m.name)}"}} {m.errors}' for m in metrics]
+    lines += ["# HELP attendance_call_rows_total Rows returned by service calls.", "# TYPE attendance_call_rows_total counter"]
+    lines += [f'attendance_call_rows_total{{call="{_label(m.name)}"}} {m.rows}' for m in metrics]
+
+    caches = cache_stats()
+    for field, kind in (("hits", "counter"), ("misses", "counter"), ("evictions", "counter"), ("size", "gauge")):
+        metric = f"attendance_cache_{field}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# TYPE {metric} {kind}")
+        lines += [f'{metric}{{cache="{_label(name)}"}} {stats[field]}' for name, stats in caches.items()]
+    return "\n".join(lines) + "\n"
+
+def write_prometheus_file(path):
+    # Write then rename so the collector never reads a partial file
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@st.cache_resource
+def start_exporters():
+    """Starts the METRICS_PORT endpoint and METRICS_FILE writer, if configured."""
+    port = get_env("METRICS_PORT")
+    if port:
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", int(port)), _MetricsHandler)
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"Serving metrics on http://127.0.0.1:{port}/metrics")
+        except OSError:
+            # Another replica on this host already owns the port
+            logger.warning(f"Could not bind metrics port {port}")
+
+    path = get_env("METRICS_FILE")
+    if path:
+        interval = float(get_env("METRICS_FILE_INTERVAL", 15))
+
+        def write_forever():
+            while True:
+                time.sleep(interval)
+                try:
+                    write_prometheus_file(path)
+                except Exception:
+                    logger.exception(f"Failed to write metrics to {path}", extra={"rate_limit": 300})
+
+        threading.Thread(target=write_forever, name="metrics-file", daemon=True).start()
+    return True
@@ -0,0 +1,206 @@
+# Attendence/core/shared_cache.py
+"""
+Pluggable backends behind the service-layer caches (core/cache.VersionedCache).
+
+A backend owns the version stamp of every cache namespace and, optionally, a
+second-level copy of cached values:
+
+- LocalCacheBackend (default): versions live in this process only.
+- SQLiteCacheBackend: versions and values live in a SQLite file (WAL mode)
+  shared by every Streamlit replica on the host. A write in one replica bumps
+  the namespace version, so the others stop serving their copies on their next
+  read instead of after a TTL.
+
+Select with CACHE_BACKEND=local|sqlite and CACHE_PATH. Values are serialized
+with Arrow IPC (DataFrames) or pickle protocol 5 with out-of-band buffers.
+"""
+import io
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+from .config import get_env
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join("records", "shared_cache.sqlite3")
+
+# Returned by get() when there is no usable entry (None is a valid value)
+MISSING = object()
+
+# --- Serialization ---
+_ARROW = b"A"
+_PICKLE = b"P"
+
+def encode(value):
+    """Serializes a value to bytes: Arrow IPC for DataFrames, else pickle-5."""
+    if isinstance(value, pd.DataFrame):
+        try:
+            table = pa.Table.from_pandas(value, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return _ARROW + sink.getvalue().to_pybytes()
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass  # mixed-type object columns; pickle handles them
+
+    # Large numpy/pandas buffers are written out-of-band, without copying
+    # them into the pickle stream, then framed after it.
+    buffers = []
+    body = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+    raws = [b.raw() for b in buffers]
+    header = struct.pack(f"<I{len(raws) + 1}Q", len(raws), len(body), *(r.nbytes for r in raws))
+    out = io.BytesIO()
+    out.write(_PICKLE)
+    out.write(header)
+    out.write(body)
+    for raw in raws:
+        out.write(raw)
+    return out.getvalue()
+
+def decode(data):
+    data = memoryview(data)
+    kind, data = bytes(data[:1]), data[1:]
+    if kind == _ARROW:
+        return pa.ipc.open_stream(pa.py_buffer(data)).read_all().to_pandas()
+
+    (count,) = struct.unpack_from("<I", data)
+    sizes = struct.unpack_from(f"<{count + 1}Q", data, 4)
+    offset = 4 + 8 * (count + 1)
+    body = data[offset:offset + sizes[0]]
+    offset += sizes[0]
+    buffers = []
+    for size in sizes[1:]:
+        buffers.append(data[offset:offset + size])
+        offset += size
+    return pickle.loads(body, buffers=buffers)
+
+
+# --- Backends ---
+class LocalCacheBackend:
+    """Process-local version stamps; values are only kept in each cache's own LRU."""
+
+    shared = False
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def version(self, namespace):
+        return self._versions.get(namespace, 0)
+
+    def bump(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return self._versions[namespace]
+
+    def get(self, namespace, key, version):
+        return MISSING
+
+    def set(self, namespace, key, version, value, ttl=None):
+        pass
+
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS versions (
+        namespace TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS entries (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        expires_at REAL,
+        payload BLOB NOT NULL,
+        PRIMARY KEY (namespace, key)
+    )
+    """,
+)
+
+
+class SQLiteCacheBackend:
+    """
+    Versions and values in a SQLite file shared by processes on one host.
+    An entry is only served while its version matches the namespace's current
+    version and it has not expired (wall-clock, since processes share it).
+    """
+
+    shared = True
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # One connection per process guarded by _lock; WAL lets replicas read
+        # while another one writes.
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+
+    def version(self, namespace):
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM versions WHERE namespace = ?", (namespace,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, namespace):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = self._conn.execute(
+                    "INSERT INTO versions (namespace, version) VALUES (?, 1) "
+                    "ON CONFLICT (namespace) DO UPDATE SET version = version + 1 RETURNING version",
+                    (namespace,),
+                ).fetchone()[0]
+                self._conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return version
+
+    def get(self, namespace, key, version):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM entries WHERE namespace = ? AND key = ? AND version = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (namespace, repr(key), version, time.time()),
+            ).fetchone()
+        return MISSING if row is None else decode(row[0])
+
+    def set(self, namespace, key, version, value, ttl=None):
+        payload = encode(value)
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            # Only store if no other replica bumped the namespace meanwhile
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, version, expires_at, payload) "
+                "SELECT ?, ?, ?, ?, ? WHERE COALESCE((SELECT version FROM versions WHERE namespace = ?), 0) = ?",
+                (namespace, repr(key), version, expires_at, payload, namespace, version),
+            )
+
+
+@st.cache_resource
+def get_cache_backend():
+    """Returns the process-wide cache backend selected by CACHE_BACKEND."""
+    kind = str(get_env("CACHE_BACKEND", "local")).lower()
+    if kind == "sqlite":
+        path = get_env("CACHE_PATH", DEFAULT_CACHE_PATH)
+        logger.info(f"Using shared SQLite cache backend at {path}")
+        return SQLiteCacheBackend(path)
+    if kind != "local":
+        logger.warning(f"Unknown CACHE_BACKEND {kind!r}; using local")
+    return LocalCacheBackend()
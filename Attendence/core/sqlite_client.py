@@ -0,0 +1,459 @@
+# Attendence/core/sqlite_client.py
+"""
+Embedded SQLite storage backend.
+
+Implements the same subset of the postgrest query builder as
+MemorySupabaseClient (the interface every service is written against) on a
+SQLite file, so a single-campus deployment can run fully local, and queries
+can be profiled without a Supabase project. The schema mirrors the production
+constraints: one mark per (class_name, roll_number, date), composite indexes
+for the per-class date and roll lookups, the trigger-maintained
+`attendance_daily_counts` table and the `submit_attendance_atomic` RPC.
+
+Enable it with SUPABASE_URL=sqlite:///records/attendance.sqlite3
+(four slashes for an absolute path).
+"""
+import os
+import re
+import sqlite3
+import threading
+from typing import Callable
+
+from postgrest.exceptions import APIError
+
+from .memory_client import UNIQUE_KEYS, ChangePublisher, MemoryResponse, _split_top_level
+
+DEFAULT_DB_PATH = os.path.join("records", "attendance.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS classroom_settings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    class_name TEXT NOT NULL UNIQUE,
+    code TEXT NOT NULL DEFAULT '1234',
+    daily_limit INTEGER NOT NULL DEFAULT 10,
+    is_open INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS roll_map (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    class_name TEXT NOT NULL,
+    roll_number INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    UNIQUE (class_name, roll_number)
+);
+
+CREATE TABLE IF NOT EXISTS attendance (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    class_name TEXT NOT NULL,
+    roll_number INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+-- One mark per student per day; also serves duplicate checks and
+-- per-student reads.
+CREATE UNIQUE INDEX IF NOT EXISTS attendance_class_roll_date_key
+    ON attendance (class_name, roll_number, date);
+
+-- Per-class reads by date (keyset pages on (date, id) via the implicit rowid).
+CREATE INDEX IF NOT EXISTS attendance_class_date_idx
+    ON attendance (class_name, date);
+
+CREATE TABLE IF NOT EXISTS attendance_daily_counts (
+    class_name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (class_name, date)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS attendance_daily_count_insert
+AFTER INSERT ON attendance
+BEGIN
+    INSERT INTO attendance_daily_counts (class_name, date, count)
+    VALUES (NEW.class_name, NEW.date, 1)
+    ON CONFLICT (class_name, date) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS attendance_daily_count_delete
+AFTER DELETE ON attendance
+BEGIN
+    UPDATE attendance_daily_counts SET count = MAX(count - 1, 0)
+    WHERE class_name = OLD.class_name AND date = OLD.date;
+END;
+"""
+
+# Columns stored as INTEGER 0/1 that the services treat as booleans
+_BOOLEAN_COLUMNS = {"classroom_settings": ("is_open",)}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_SQL_OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _ident(name):
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid column or table name: {name!r}")
+    return name
+
+
+class SQLiteQuery:
+    """Chainable query over one SQLite table."""
+
+    def __init__(self, client, table_name):
+        self._client = client
+        self._table = _ident(table_name)
+        self._action = "select"
+        self._columns = None
+        self._count = None
+        self._payload = None
+        self._where = []
+        self._params = []
+        self._order = []
+        self._limit = None
+
+    # --- Actions ---
+    def select(self, *columns, count=None):
+        self._action = "select"
+        cols = [c.strip() for col in columns for c in col.split(",") if c.strip()]
+        self._columns = None if not cols or "*" in cols else [_ident(c) for c in cols]
+        self._count = count
+        return self
+
+    def insert(self, json, **kwargs):
+        self._action = "insert"
+        self._payload = json if isinstance(json, list) else [json]
+        return self
+
+    def upsert(self, json, *, ignore_duplicates=False, on_conflict="", **kwargs):
+        self._action = "upsert"
+        self._payload = json if isinstance(json, list) else [json]
+        self._ignore_duplicates = ignore_duplicates
+        self._on_conflict = [c.strip() for c in on_conflict.split(",") if c.strip()] or list(UNIQUE_KEYS.get(self._table, ("id",)))
+        return self
+
+    def update(self, json, **kwargs):
+        self._action = "update"
+        self._payload = json
+        return self
+
+    def delete(self, **kwargs):
+        self._action = "delete"
+        return self
+
+    # --- Filters ---
+    def eq(self, column, value):
+        return self._compare(column, "=", value)
+
+    def neq(self, column, value):
+        return self._compare(column, "!=", value)
+
+    def gt(self, column, value):
+        return self._compare(column, ">", value)
+
+    def gte(self, column, value):
+        return self._compare(column, ">=", value)
+
+    def lt(self, column, value):
+        return self._compare(column, "<", value)
+
+    def lte(self, column, value):
+        return self._compare(column, "<=", value)
+
+    def _compare(self, column, op, value):
+        self._where.append(f"{_ident(column)} {op} ?")
+        self._params.append(value)
+        return self
+
+    def or_(self, filters, **kwargs):
+        sql, params = _logic_sql("or", filters)
+        self._where.append(sql)
+        self._params.extend(params)
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            self._where.append("0")
+        else:
+            self._where.append(f"{_ident(column)} IN ({', '.join('?' * len(values))})")
+            self._params.extend(values)
+        return self
+
+    def order(self, column, desc=False, **kwargs):
+        self._order.append((_ident(column), desc))
+        return self
+
+    def limit(self, size, **kwargs):
+        self._limit = size
+        return self
+
+    def execute(self):
+        self._client.simulate_latency()
+        try:
+            with self._client.lock:
+                return getattr(self, f"_execute_{self._action}")()
+        finally:
+            self._client.publish_changes()
+
+    # --- Execution ---
+    def _where_sql(self):
+        return f" WHERE {' AND '.join(self._where)}" if self._where else ""
+
+    def _execute_select(self):
+        columns = "*" if self._columns is None else ", ".join(self._columns)
+        sql = f"SELECT {columns} FROM {self._table}{self._where_sql()}"
+        if self._order:
+            sql += " ORDER BY " + ", ".join(f"{c} {'DESC' if desc else 'ASC'}" for c, desc in self._order)
+        limits = [n for n in (self._limit, self._client.max_rows) if n is not None]
+        if limits:
+            sql += f" LIMIT {int(min(limits))}"
+        conn = self._client.conn
+        rows = [self._client.to_row(self._table, r) for r in conn.execute(sql, self._params)]
+        count = None
+        if self._count:
+            count = conn.execute(f"SELECT COUNT(*) FROM {self._table}{self._where_sql()}", self._params).fetchone()[0]
+        return MemoryResponse(rows, count)
+
+    def _execute_insert(self):
+        with self._client.transaction():
+            inserted = [self._client.insert_row(self._table, row) for row in self._payload]
+        return MemoryResponse(inserted)
+
+    def _execute_upsert(self):
+        conflict = ", ".join(_ident(c) for c in self._on_conflict)
+        written = []
+        with self._client.transaction() as conn:
+            for row in self._payload:
+                columns = [_ident(c) for c in row]
+                sql = (
+                    f"INSERT INTO {self._table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))}) ON CONFLICT ({conflict}) "
+                )
+                if self._ignore_duplicates:
+                    sql += "DO NOTHING RETURNING *"
+                    old = None
+                else:
+                    updates = [c for c in columns if c not in self._on_conflict] or columns[:1]
+                    sql += "DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in updates) + " RETURNING *"
+                    key = " AND ".join(f"{c} = ?" for c in self._on_conflict)
+                    old = conn.execute(f"SELECT * FROM {self._table} WHERE {key}", [row.get(c) for c in self._on_conflict]).fetchone()
+                result = conn.execute(sql, list(row.values())).fetchone()
+                if result is None:
+                    continue
+                record = self._client.to_row(self._table, result)
+                written.append(record)
+                if old is None:
+                    self._client.record_change(self._table, "INSERT", record)
+                else:
+                    self._client.record_change(self._table, "UPDATE", record, self._client.to_row(self._table, old))
+        return MemoryResponse(written)
+
+    def _execute_update(self):
+        columns = [_ident(c) for c in self._payload]
+        assignments = ", ".join(f"{c} = ?" for c in columns)
+        with self._client.transaction() as conn:
+            old = {r["id"]: self._client.to_row(self._table, r) for r in conn.execute(f"SELECT * FROM {self._table}{self._where_sql()}", self._params)}
+            updated = [
+                self._client.to_row(self._table, r)
+                for r in conn.execute(f"UPDATE {self._table} SET {assignments}{self._where_sql()} RETURNING *", [*self._payload.values(), *self._params])
+            ]
+        for record in updated:
+            self._client.record_change(self._table, "UPDATE", record, old.get(record["id"]))
+        return MemoryResponse(updated)
+
+    def _execute_delete(self):
+        with self._client.transaction() as conn:
+            deleted = [
+                self._client.to_row(self._table, r)
+                for r in conn.execute(f"DELETE FROM {self._table}{self._where_sql()} RETURNING *", self._params)
+            ]
+        for record in deleted:
+            self._client.record_change(self._table, "DELETE", {}, record)
+        return MemoryResponse(deleted)
+
+
+class SQLiteRPC:
+    def __init__(self, client, fn, params):
+        self._client = client
+        self._fn = fn
+        self._params = params or {}
+
+    def execute(self):
+        self._client.simulate_latency()
+        handler = self._client.functions.get(self._fn)
+        if handler is None:
+            raise APIError({"code": "PGRST202", "message": f"Could not find the function {self._fn}"})
+        try:
+            with self._client.lock, self._client.transaction():
+                return MemoryResponse(handler(self._client, **self._params))
+        finally:
+            self._client.publish_changes()
+
+
+class SQLiteSupabaseClient(ChangePublisher):
+    """
+    Drop-in replacement for `supabase.Client` backed by a SQLite file.
+    One connection per client guarded by `lock`; writes run in
+    BEGIN IMMEDIATE transactions, which serialise writers across processes
+    the way the Postgres RPC's row lock does. WAL mode lets readers proceed
+    while a write is in flight. Other processes may share the file, so the
+    change feed keeps its polling fallback on.
+    """
+
+    sees_all_writes = False
+
+    def __init__(self, path=DEFAULT_DB_PATH, max_rows=1000):
+        self.path = path
+        self.max_rows = max_rows
+        self.requests = 0
+        self.lock = threading.RLock()
+        self.functions: dict[str, Callable] = {
+            "submit_attendance_atomic": rpc_submit_attendance_atomic,
+        }
+        self.listeners: list[Callable] = []
+        self._changes = []
+        self._depth = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def table(self, table_name):
+        return SQLiteQuery(self, table_name)
+
+    def rpc(self, fn, params=None, **kwargs):
+        return SQLiteRPC(self, fn, params)
+
+    def simulate_latency(self):
+        # No network hop; only counts requests like the other clients
+        with self.lock:
+            self.requests += 1
+
+    def transaction(self):
+        return _Transaction(self)
+
+    def to_row(self, table_name, row):
+        row = dict(row)
+        for column in _BOOLEAN_COLUMNS.get(table_name, ()):
+            if column in row and row[column] is not None:
+                row[column] = bool(row[column])
+        return row
+
+    def find(self, table_name, **filters):
+        where = " AND ".join(f"{_ident(k)} = ?" for k in filters) or "1"
+        rows = self.conn.execute(f"SELECT * FROM {_ident(table_name)} WHERE {where}", list(filters.values()))
+        return [self.to_row(table_name, r) for r in rows]
+
+    def insert_row(self, table_name, row):
+        columns = [_ident(c) for c in row]
+        sql = f"INSERT INTO {_ident(table_name)} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) RETURNING *"
+        try:
+            record = self.to_row(table_name, self.conn.execute(sql, list(row.values())).fetchone())
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE" not in str(e):
+                raise
+            raise APIError({
+                "code": "23505",
+                "message": f"duplicate key value violates unique constraint on {table_name}: {e}",
+            }) from e
+        self.record_change(table_name, "INSERT", record)
+        return record
+
+
+class _Transaction:
+    """Re-entrant BEGIN IMMEDIATE ... COMMIT/ROLLBACK on the client's connection."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __enter__(self):
+        client = self._client
+        client.lock.acquire()
+        if client._depth == 0:
+            client.conn.execute("BEGIN IMMEDIATE")
+        client._depth += 1
+        return client.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        client = self._client
+        client._depth -= 1
+        try:
+            if client._depth == 0:
+                if exc_type is None:
+                    client.conn.execute("COMMIT")
+                else:
+                    client.conn.execute("ROLLBACK")
+                    client._changes.clear()
+        finally:
+            client.lock.release()
+        return False
+
+
+# --- PostgREST logic filters (or=/and= syntax) to SQL ---
+def _logic_sql(kind, expr):
+    parts, params = [], []
+    for text in _split_top_level(expr):
+        sql, part_params = _condition_sql(text)
+        parts.append(sql)
+        params.extend(part_params)
+    return "(" + f" {kind.upper()} ".join(parts) + ")", params
+
+def _condition_sql(text):
+    for kind in ("and", "or"):
+        if text.startswith(kind + "(") and text.endswith(")"):
+            return _logic_sql(kind, text[len(kind) + 1:-1])
+    column, op, value = text.split(".", 2)
+    # Column affinity converts the text value for INTEGER columns
+    return f"{_ident(column)} {_SQL_OPERATORS[op]} ?", [value]
+
+
+# --- RPC functions (keep in sync with sql/submit_attendance_atomic.sql) ---
+def rpc_submit_attendance_atomic(client, p_class_name, p_roll_number, p_name, p_code, p_date):
+    conn = client.conn
+    settings = conn.execute(
+        "SELECT code, daily_limit, is_open FROM classroom_settings WHERE class_name = ?", (p_class_name,)
+    ).fetchone()
+    if settings is None:
+        return "class_not_found"
+    if not settings["is_open"]:
+        return "class_closed"
+    if settings["code"] != p_code:
+        return "invalid_code"
+    if conn.execute(
+        "SELECT 1 FROM attendance WHERE class_name = ? AND roll_number = ? AND date = ?",
+        (p_class_name, p_roll_number, p_date),
+    ).fetchone():
+        return "already_marked"
+    counter = conn.execute(
+        "SELECT count FROM attendance_daily_counts WHERE class_name = ? AND date = ?", (p_class_name, p_date)
+    ).fetchone()
+    if (counter["count"] if counter else 0) >= settings["daily_limit"]:
+        return "limit_reached"
+
+    name = (p_name or "").strip()
+    locked = conn.execute(
+        "SELECT name FROM roll_map WHERE class_name = ? AND roll_number = ?", (p_class_name, p_roll_number)
+    ).fetchone()
+    if locked is None:
+        if not name:
+            return "name_required"
+        client.insert_row("roll_map", {"class_name": p_class_name, "roll_number": p_roll_number, "name": name})
+    else:
+        if name and locked["name"] != name:
+            return "name_mismatch"
+        name = locked["name"]
+
+    client.insert_row("attendance", {
+        "class_name": p_class_name,
+        "roll_number": p_roll_number,
+        "name": name,
+        "date": p_date,
+    })
+    return "accepted"
@@ -0,0 +1,71 @@
+# Attendence/services/answer_cache.py
+"""
+Answer cache for the attendance chatbot.
+
+Questions are normalized (case, whitespace, trailing punctuation; relative
+dates are already resolved by `normalize_dates_in_question`) and cached at
+two levels:
+
+- generated code (or a plain-text reply) per (class, question). It does not
+  depend on the records, so after new attendance the code is re-executed
+  without asking the LLM to write it again;
+- final answers per (class, data version, question), which skip the agent
+  entirely until the class's data changes.
+
+Both are bounded LRUs with a TTL (CHAT_CACHE_SIZE, CHAT_CACHE_TTL seconds);
+their hit rates appear with the other caches in the Diagnostics tab.
+"""
+import re
+
+from Attendence.core.cache import VersionedCache
+from Attendence.core.config import get_env
+from Attendence.core.shared_cache import LocalCacheBackend
+
+SIZE = int(get_env("CHAT_CACHE_SIZE", 256))
+TTL = float(get_env("CHAT_CACHE_TTL", 3600))
+
+# Code is keyed on the question alone, so replicas can share it
+_code = VersionedCache(name="chat_code", maxsize=SIZE, ttl=TTL)
+# Answers are keyed per data version; keep those per process
+_answers = VersionedCache(name="chat_answers", maxsize=SIZE, ttl=TTL, backend=LocalCacheBackend())
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_question(question):
+    """Lower-cased, single-spaced question without trailing punctuation."""
+    return _SPACES.sub(" ", question).strip().lower().rstrip("?.! ")
+
+def get_answer(class_name, version, question):
+    """Returns the cached final answer, or None."""
+    return _answers.get(class_name, key=(version, normalize_question(question)))
+
+def get_code(class_name, question):
+    """Returns {"code": ...} or {"text": ...} generated earlier for this question, or None."""
+    return _code.get(class_name, key=normalize_question(question))
+
+def remember(class_name, version, question, code, answer, text=None):
+    """
+    Stores a successful exchange: the generated `code` (or the LLM's plain
+    `text` reply) and the final `answer`, if already known.
+    """
+    key = normalize_question(question)
+    if code:
+        _code.put(class_name, {"code": code}, key=key)
+    elif text:
+        _code.put(class_name, {"text": text}, key=key)
+    if answer is not None:
+        remember_answer(class_name, version, question, answer)
+
+def remember_answer(class_name, version, question, answer):
+    """Stores a final answer, e.g. once a streamed summary has completed."""
+    _answers.put(class_name, answer, key=(version, normalize_question(question)))
+
+def invalidate(class_name=None):
+    """Drops cached code and answers for a class (or all classes)."""
+    if class_name is None:
+        _code.clear()
+        _answers.clear()
+    else:
+        _code.bump(class_name)
+        _answers.bump(class_name)
@@ -0,0 +1,132 @@
+# Attendence/services/attendance_matrix.py
+"""
+Shared wide attendance matrix (one row per student, one column per date).
+
+The admin, analytics and chatbot panels all need the same P/A matrix. It is
+built once per synced data version and memoized per class, so switching tabs
+or rerunning a script reuses the same object instead of re-pivoting.
+"""
+import math
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from Attendence.core.logger import get_logger
+from Attendence.core.metrics import instrument
+from Attendence.services.attendance_sync import get_attendance_sync
+from Attendence.services.presence import PresenceMatrix
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class MatrixWindow:
+    """One page of students over the most recent dates of a matrix."""
+    frame: pd.DataFrame
+    page: int
+    pages: int
+    matches: int
+    first_row: int
+    dates: tuple
+
+
+class AttendanceMatrix:
+    """
+    Immutable attendance matrix for one class at one data version, backed by
+    a bit-packed PresenceMatrix. The "P"/"A" `frame` is built on first access.
+    `frame`, `roster` and `dates` are shared between sessions: copy before
+    mutating.
+    """
+
+    def __init__(self, class_name, version, presence):
+        self.class_name = class_name
+        self.version = version
+        self.presence = presence
+        self._frame = None
+
+    @classmethod
+    def from_records(cls, class_name, records, version=0):
+        """Builds the matrix from a records frame with roll_number, name and date columns."""
+        return cls(class_name, version, PresenceMatrix.from_records(records))
+
+    @property
+    def frame(self):
+        """Wide frame: roll_number, name, then one P/A column per date."""
+        if self._frame is None:
+            self._frame = self.presence.to_display_frame()
+        return self._frame
+
+    @property
+    def roster(self):
+        """roll_number and name per student, in matrix row order."""
+        return pd.DataFrame({"roll_number": self.presence.roll_numbers, "name": self.presence.names})
+
+    @property
+    def dates(self):
+        """Class dates (YYYY-MM-DD), oldest first."""
+        return tuple(self.presence.dates)
+
+    @property
+    def is_empty(self):
+        return self.presence.n_students == 0
+
+    def search(self, query):
+        """Row positions of students whose roll number is `query` or whose name contains it."""
+        return self.presence.search(query)
+
+    def window(self, rows=None, page=1, page_size=50, last_dates=30):
+        """
+        Page `page` (1-based, clamped) of the students at `rows` (default:
+        all, see `search`), over the `last_dates` most recent dates. Only that
+        window is materialised.
+        """
+        presence = self.presence
+        matching = np.arange(presence.n_students) if rows is None else rows
+        pages = max(1, math.ceil(len(matching) / page_size))
+        page = min(max(page, 1), pages)
+        first = (page - 1) * page_size
+        start = max(presence.n_dates - last_dates, 0)
+        return MatrixWindow(
+            frame=presence.window_frame(matching[first:first + page_size], start, presence.n_dates),
+            page=page,
+            pages=pages,
+            matches=len(matching),
+            first_row=first,
+            dates=tuple(presence.dates[start:]),
+        )
+
+    @cached_property
+    def _csv(self):
+        return self.frame.to_csv(index=False)
+
+    def to_csv(self):
+        # Memoized: the matrix never changes once built
+        return self._csv
+
+
+_matrices = {}
+_lock = threading.Lock()
+
+@instrument()
+def get_attendance_matrix(class_name, supabase=None):
+    """
+    Returns the matrix for a class, rebuilding it only when the synced
+    records version has changed.
+    """
+    state = get_attendance_sync().sync(class_name, supabase)
+    cached = _matrices.get(class_name)
+    if cached is not None and cached.version == state.version:
+        return cached
+
+    matrix = AttendanceMatrix.from_records(class_name, state.frame, state.version)
+    with _lock:
+        _matrices[class_name] = matrix
+    logger.debug(f"Built attendance matrix for {class_name} v{state.version}: {matrix.presence.n_students} x {matrix.presence.n_dates}")
+    return matrix
+
+def drop(class_name):
+    with _lock:
+        _matrices.pop(class_name, None)
@@ -0,0 +1,103 @@
+# Attendence/services/attendance_reader.py
+"""
+Paginated reads of the `attendance` table.
+
+PostgREST caps every response at the server's `max_rows`, so a single
+`execute()` silently truncates large classes. These helpers walk a class with
+keyset pagination on (date, id) and only project the requested columns.
+`iter_class_pages` does the same for any per-class table with a unique key
+column (e.g. `roll_map` by roll_number).
+"""
+import pandas as pd
+
+from Attendence.core.clients import create_supabase_client
+from Attendence.core.logger import get_logger
+from Attendence.core.metrics import instrument
+
+logger = get_logger(__name__)
+
+DEFAULT_COLUMNS = ("roll_number", "name", "date")
+DEFAULT_PAGE_SIZE = 1000
+
+# Columns the keyset cursor needs on every row
+_CURSOR_COLUMNS = ("date", "id")
+
+def iter_attendance_pages(class_name, columns=DEFAULT_COLUMNS, page_size=DEFAULT_PAGE_SIZE, supabase=None):
+    """
+    Yields lists of attendance rows for a class ordered by (date, id), one page
+    at a time. `columns=None` selects every column. Rows always include `date`
+    and `id`, which the cursor needs. `page_size` should not exceed the
+    server's max_rows.
+    """
+    if not supabase:
+        supabase = create_supabase_client()
+    if columns is None:
+        select = ["*"]
+    else:
+        select = list(dict.fromkeys([*columns, *_CURSOR_COLUMNS]))
+
+    cursor = None
+    while True:
+        query = supabase.table("attendance").select(",".join(select)).eq("class_name", class_name)
+        if cursor is not None:
+            last_date, last_id = cursor
+            query = query.or_(f"date.gt.{last_date},and(date.eq.{last_date},id.gt.{last_id})")
+        try:
+            page = query.order("date").order("id").limit(page_size).execute().data or []
+        except Exception:
+            logger.exception(f"Failed to fetch attendance page for {class_name}")
+            raise
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        cursor = (page[-1]["date"], page[-1]["id"])
+
+def iter_class_pages(table, class_name, columns, key="id", filters=None, page_size=DEFAULT_PAGE_SIZE, supabase=None):
+    """
+    Yields lists of `table` rows for a class ordered by `key`, which must be
+    unique within the class. `filters` adds equality filters (column ->
+    value). Rows always include `key`.
+    """
+    if not supabase:
+        supabase = create_supabase_client()
+    select = ",".join(dict.fromkeys([*columns, key]))
+
+    after = None
+    while True:
+        query = supabase.table(table).select(select).eq("class_name", class_name)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        if after is not None:
+            query = query.gt(key, after)
+        try:
+            page = query.order(key).limit(page_size).execute().data or []
+        except Exception:
+            logger.exception(f"Failed to fetch {table} page for {class_name}")
+            raise
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        after = page[-1][key]
+
+def iter_attendance_records(class_name, columns=DEFAULT_COLUMNS, page_size=DEFAULT_PAGE_SIZE, supabase=None):
+    """Yields attendance rows for a class one at a time (see iter_attendance_pages)."""
+    for page in iter_attendance_pages(class_name, columns, page_size, supabase):
+        yield from page
+
+@instrument()
+def build_attendance_frame(class_name, columns=DEFAULT_COLUMNS, page_size=DEFAULT_PAGE_SIZE, supabase=None):
+    """
+    Builds a DataFrame of a class's records page by page, so at most one page
+    of row dicts is alive at a time. Only the requested columns are kept.
+    """
+    chunks = []
+    for page in iter_attendance_pages(class_name, columns, page_size, supabase):
+        chunk = pd.DataFrame.from_records(page)
+        if columns is not None:
+            chunk = chunk[list(columns)]
+        chunks.append(chunk)
+    if not chunks:
+        return pd.DataFrame(columns=list(columns) if columns is not None else None)
+    return pd.concat(chunks, ignore_index=True)
@@ -1,24 +1,82 @@
 # Attendence/services/attendance_service.py
+import threading
+from dataclasses import dataclass
+from enum import Enum
 import streamlit as st
+from Attendence.core.cache import VersionedCache
 from Attendence.core.clients import create_supabase_client
+from Attendence.core.config import get_env
 from Attendence.core.logger import get_logger
+from Attendence.core.metrics import instrument
 from Attendence.core.utils import current_ist_date
+from Attendence.services import class_index, class_service, counter_service
+from Attendence.services.attendance_reader import build_attendance_frame, iter_attendance_records
+from Attendence.services.attendance_sync import get_attendance_sync
+from Attendence.services.submission_queue import DEFAULT_JOURNAL_PATH, SubmissionQueue
 
 logger = get_logger(__name__)
 
-@st.cache_data(ttl=30)
-def fetch_attendance_records(class_name, supabase=None):
-    if not supabase:
-        supabase = create_supabase_client()
+# Per-class distinct record dates for student summaries
+_class_dates = VersionedCache(name="class_dates", maxsize=256, ttl=60)
+
+# Full record lists per class, keyed on (class_name, generation). A write only
+# bumps its own class; with a shared cache backend (core/shared_cache) the bump
+# reaches every replica, otherwise the TTL bounds staleness from other
+# processes' writes.
+_records_cache = VersionedCache(name="attendance_records", maxsize=64, ttl=30)
+
+class SubmitOutcome(str, Enum):
+    """
+    Result of `submit_attendance_atomic`. Values match the text returned by
+    the `submit_attendance_atomic` Postgres function (sql/submit_attendance_atomic.sql).
+    """
+    ACCEPTED = "accepted"
+    CLASS_NOT_FOUND = "class_not_found"
+    CLASS_CLOSED = "class_closed"
+    INVALID_CODE = "invalid_code"
+    ALREADY_MARKED = "already_marked"
+    LIMIT_REACHED = "limit_reached"
+    NAME_REQUIRED = "name_required"
+    NAME_MISMATCH = "name_mismatch"
+    # Write-behind mode only: validated and journaled, insert pending
+    QUEUED = "queued"
+
+def _load_attendance_records(class_name, supabase=None):
     try:
-        # Defaults to ordering by date desc
-        response = supabase.table("attendance").select("*").eq("class_name", class_name).order("date", desc=True).execute()
-        return response.data if response.data else []
+        # Paginated so large classes are not truncated at the server's max_rows
+        records = list(iter_attendance_records(class_name, columns=None, supabase=supabase))
+        records.sort(key=lambda r: r["date"], reverse=True)
+        return records
     except Exception:
         logger.exception(f"Failed to fetch attendance for {class_name}")
         raise
 
+@instrument()
+def fetch_attendance_records(class_name, supabase=None):
+    """Records of a class, newest first. Shared across sessions: do not mutate."""
+    return _records_cache.get_or_load(class_name, lambda: _load_attendance_records(class_name, supabase))
+
+def invalidate_records(class_name=None):
+    """Drops the cached records and dates of one class, or all classes."""
+    if class_name is None:
+        _records_cache.clear()
+        _class_dates.clear()
+    else:
+        _records_cache.bump(class_name)
+        _class_dates.bump(class_name)
+
+def get_attendance_frame(class_name, supabase=None):
+    """
+    Attendance records for a class as a DataFrame, kept current by
+    incremental sync. Shared across sessions: copy before mutating.
+    """
+    return get_attendance_sync().get_frame(class_name, supabase)
+
+@instrument()
 def fetch_roll_map(class_name, roll_number, supabase=None):
+    index = class_index.get(class_name)
+    if index is not None:
+        return index.roll_names.get(roll_number)
     if not supabase:
         supabase = create_supabase_client()
     try:
@@ -28,6 +86,7 @@ def fetch_roll_map(class_name, roll_number, supabase=None):
         logger.exception("Failed to fetch roll map")
         raise
 
+@instrument()
 def lock_roll_map(class_name, roll_number, name, supabase=None):
     if not supabase:
         supabase = create_supabase_client()
@@ -37,13 +96,18 @@ def lock_roll_map(class_name, roll_number, name, supabase=None):
             "roll_number": roll_number,
             "name": name
         }).execute()
+        class_index.record_roll(class_name, roll_number, name)
     except Exception:
         logger.exception("Failed to lock roll map")
         raise
 
+@instrument()
 def check_existing_attendance(class_name, roll_number, date=None, supabase=None):
     if not date:
         date = current_ist_date()
+    index = class_index.get(class_name)
+    if index is not None and index.date == date:
+        return roll_number in index.present_today
     if not supabase:
         supabase = create_supabase_client()
     try:
@@ -53,18 +117,97 @@ def check_existing_attendance(class_name, roll_number, date=None, supabase=None)
         logger.exception("Failed to check existing attendance")
         raise
 
-def get_daily_count(class_name, date=None, supabase=None):
-    if not date:
-        date = current_ist_date()
+@dataclass(frozen=True)
+class StudentSummary:
+    class_name: str
+    roll_number: int
+    class_dates: tuple
+    present_dates: frozenset
+
+    @property
+    def total_classes(self):
+        return len(self.class_dates)
+
+    @property
+    def present_count(self):
+        return len(self.present_dates)
+
+    @property
+    def absent_count(self):
+        return self.total_classes - self.present_count
+
+    @property
+    def percentage(self):
+        return self.present_count / self.total_classes * 100 if self.total_classes else 0.0
+
+@instrument()
+def get_class_dates(class_name, supabase=None):
+    """
+    Sorted distinct dates a class has records for, read from the daily
+    counter table and cached per class.
+    """
+    return _class_dates.get_or_load(class_name, lambda: _load_class_dates(class_name, supabase))
+
+def _load_class_dates(class_name, supabase=None):
     if not supabase:
         supabase = create_supabase_client()
     try:
-        response = supabase.table("attendance").select("*", count="exact").eq("class_name", class_name).eq("date", date).execute()
-        return response.count or 0
+        response = supabase.table("attendance_daily_counts").select("date").eq("class_name", class_name).gt("count", 0).order("date").execute()
+        return tuple(row["date"] for row in response.data or [])
     except Exception:
-        logger.exception("Failed to get daily count")
+        logger.exception(f"Failed to fetch class dates for {class_name}")
         raise
 
+@instrument()
+def get_student_summary(class_name, roll_number, supabase=None):
+    """
+    One student's attendance: total class days, the dates they were present
+    and their percentage. Reads only the student's own rows plus the cached
+    class date list, never the whole class history.
+    """
+    if not supabase:
+        supabase = create_supabase_client()
+    class_dates = get_class_dates(class_name, supabase)
+    try:
+        response = supabase.table("attendance").select("date").eq("class_name", class_name).eq("roll_number", roll_number).execute()
+    except Exception:
+        logger.exception(f"Failed to fetch attendance of roll {roll_number} in {class_name}")
+        raise
+    present = frozenset(row["date"] for row in response.data or [])
+    missing = present.difference(class_dates)
+    if missing:
+        # Another replica recorded a new class day after the date list was cached
+        class_dates = tuple(sorted(missing.union(class_dates)))
+        _class_dates.bump(class_name)
+        _class_dates.put(class_name, class_dates)
+    return StudentSummary(class_name, roll_number, class_dates, present)
+
+def records_version(class_name):
+    """Data version of a class's attendance records; changes whenever they do."""
+    return _records_cache.generation(class_name)
+
+@instrument()
+def get_daily_count(class_name, date=None, supabase=None):
+    # Reads the per-(class, date) counter row instead of counting records
+    return counter_service.get_daily_count(class_name, date, supabase)
+
+@instrument()
+def get_daily_counts(class_names, date=None, supabase=None):
+    return counter_service.get_daily_counts(class_names, date, supabase)
+
+def _after_insert(class_name, roll_number, date):
+    """Brings the in-process caches in line with a newly inserted record."""
+    counter_service.record_submission(class_name, date)
+    class_index.record_presence(class_name, roll_number, date)
+    # Class dates only change on a class's first record of the day
+    dates = _class_dates.get(class_name)
+    if dates is not None and date not in dates:
+        _class_dates.bump(class_name)
+        _class_dates.put(class_name, tuple(sorted((*dates, date))))
+    get_attendance_sync().mark_stale(class_name)
+    _records_cache.bump(class_name)
+
+@instrument()
 def submit_attendance(class_name, roll_number, name, date=None, supabase=None):
     if not date:
         date = current_ist_date()
@@ -77,8 +220,110 @@ def submit_attendance(class_name, roll_number, name, date=None, supabase=None):
             "name": name,
             "date": date
         }).execute()
-        fetch_attendance_records.clear()
+        _after_insert(class_name, roll_number, date)
         return True
     except Exception:
         logger.exception("Failed to submit attendance")
         raise
+
+@instrument()
+def submit_attendance_atomic(class_name, roll_number, name, code, date=None, supabase=None):
+    """
+    Validates the code, checks for duplicates and the daily limit, locks the
+    roll number and inserts the record in a single RPC round trip.
+    Returns a SubmitOutcome.
+    """
+    if not date:
+        date = current_ist_date()
+    if not supabase:
+        supabase = create_supabase_client()
+    try:
+        response = supabase.rpc("submit_attendance_atomic", {
+            "p_class_name": class_name,
+            "p_roll_number": roll_number,
+            "p_name": name,
+            "p_code": code,
+            "p_date": date
+        }).execute()
+        outcome = SubmitOutcome(response.data)
+        if outcome is SubmitOutcome.ACCEPTED:
+            if name and name.strip():
+                class_index.record_roll(class_name, roll_number, name.strip())
+            _after_insert(class_name, roll_number, date)
+        return outcome
+    except Exception:
+        logger.exception("Failed to submit attendance atomically")
+        raise
+
+# --- Write-behind mode ---
+_admission_lock = threading.Lock()
+
+def write_behind_enabled():
+    return str(get_env("ATTENDANCE_WRITE_BEHIND", "")).lower() in ("1", "true", "yes")
+
+def _on_queue_flushed(rows):
+    for row in rows:
+        _after_insert(row["class_name"], row["roll_number"], row["date"])
+
+@st.cache_resource
+def get_submission_queue():
+    """
+    Returns the process-wide write-behind queue with its flusher running.
+    """
+    return SubmissionQueue(
+        path=get_env("SUBMISSION_QUEUE_PATH", DEFAULT_JOURNAL_PATH),
+        batch_size=int(get_env("WRITE_BEHIND_BATCH_SIZE", 50)),
+        flush_interval_ms=int(get_env("WRITE_BEHIND_FLUSH_MS", 250)),
+        on_flushed=_on_queue_flushed,
+        commit_lock=_admission_lock,
+    ).start()
+
+@instrument()
+def submit_attendance_queued(class_name, roll_number, name, code, date=None, supabase=None, queue=None):
+    """
+    Write-behind variant of submit_attendance_atomic. Runs the same checks,
+    journals the submission locally and returns SubmitOutcome.QUEUED without
+    waiting for the insert. The daily limit counts journaled rows too; it is
+    enforced per process, not across replicas. Code and open state come from
+    the versioned class registry (or, with an explicit client, from that
+    client), never from the warm index, which can be minutes old.
+    """
+    if not date:
+        date = current_ist_date()
+    if queue is None:
+        queue = get_submission_queue()
+    try:
+        if supabase:
+            settings = class_service.get_class_settings(class_name, supabase)
+        else:
+            supabase = create_supabase_client()
+            settings = class_service.get_class_registry().get(class_name)
+        if not settings:
+            return SubmitOutcome.CLASS_NOT_FOUND
+        if not settings.get("is_open"):
+            return SubmitOutcome.CLASS_CLOSED
+        if settings.get("code") != code:
+            return SubmitOutcome.INVALID_CODE
+        if queue.contains(class_name, roll_number, date) or check_existing_attendance(class_name, roll_number, date, supabase):
+            return SubmitOutcome.ALREADY_MARKED
+
+        name = (name or "").strip()
+        locked_name = fetch_roll_map(class_name, roll_number, supabase)
+        if locked_name and name and locked_name != name:
+            return SubmitOutcome.NAME_MISMATCH
+        if not locked_name and not name:
+            return SubmitOutcome.NAME_REQUIRED
+
+        with _admission_lock:
+            count = get_daily_count(class_name, date, supabase) + queue.pending_count(class_name, date)
+            if count >= settings["daily_limit"]:
+                return SubmitOutcome.LIMIT_REACHED
+            if not locked_name:
+                lock_roll_map(class_name, roll_number, name, supabase)
+            receipt = queue.enqueue(class_name, roll_number, locked_name or name, date)
+            class_index.record_presence(class_name, roll_number, date)
+
+        return SubmitOutcome.ALREADY_MARKED if receipt.duplicate else SubmitOutcome.QUEUED
+    except Exception:
+        logger.exception("Failed to queue attendance submission")
+        raise
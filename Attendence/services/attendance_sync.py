@@ -0,0 +1,164 @@
+# Attendence/services/attendance_sync.py
+"""
+Incremental sync of per-class attendance records.
+
+Each class keeps a cached DataFrame plus a high-water mark (the largest
+`id` seen). Reads fetch only rows above the mark and append them. A periodic
+full reconcile replaces the frame to pick up deletes and any rows committed
+out of id order. While the change feed is live (`push_enabled`) a class is
+only re-queried after a change to it was pushed, not on a timer. Delta pulls
+are single-flight per class: sessions rerunning together wait for one pull
+instead of each appending the same rows.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+import streamlit as st
+
+from Attendence.core.clients import create_supabase_client
+from Attendence.core.logger import get_logger
+from Attendence.core.metrics import instrument
+from Attendence.services.attendance_reader import DEFAULT_PAGE_SIZE, build_attendance_frame
+
+logger = get_logger(__name__)
+
+RECORD_COLUMNS = ("id", "roll_number", "name", "date")
+
+
+@dataclass
+class SyncedRecords:
+    class_name: str
+    frame: pd.DataFrame
+    high_water: int = 0
+    version: int = 0
+    synced_at: float = field(default_factory=time.monotonic)
+    reconciled_at: float = field(default_factory=time.monotonic)
+    stale: bool = False
+
+
+class AttendanceSync:
+    """
+    `delta_interval`: minimum seconds between delta queries for a class.
+    `reconcile_interval`: seconds between full re-reads of a class.
+    """
+
+    def __init__(self, supabase=None, delta_interval=5, reconcile_interval=600):
+        self.delta_interval = delta_interval
+        self.reconcile_interval = reconcile_interval
+        self.push_enabled = False
+        self._supabase = supabase
+        self._states = {}
+        self._pull_locks = {}
+        self._lock = threading.Lock()
+
+    def _client(self, supabase=None):
+        return supabase or self._supabase or create_supabase_client()
+
+    # --- Reads ---
+    def get_frame(self, class_name, supabase=None):
+        """Returns the synced records frame for a class. Treat it as read-only."""
+        return self.sync(class_name, supabase).frame
+
+    def version(self, class_name):
+        state = self._states.get(class_name)
+        return state.version if state else 0
+
+    def sync(self, class_name, supabase=None):
+        now = time.monotonic()
+        state = self._states.get(class_name)
+        if state is None or now - state.reconciled_at >= self.reconcile_interval:
+            return self.reconcile(class_name, supabase)
+        if state.stale or (not self.push_enabled and now - state.synced_at >= self.delta_interval):
+            return self._pull_delta(state, supabase)
+        return state
+
+    @instrument()
+    def reconcile(self, class_name, supabase=None):
+        """Full (paginated) re-read of a class's records."""
+        try:
+            frame = build_attendance_frame(class_name, RECORD_COLUMNS, supabase=self._client(supabase))
+        except Exception:
+            logger.exception(f"Failed to reconcile attendance for {class_name}")
+            raise
+        with self._lock:
+            previous = self._states.get(class_name)
+            changed = previous is None or set(previous.frame["id"]) != set(frame["id"])
+            state = SyncedRecords(
+                class_name=class_name,
+                frame=frame,
+                high_water=int(frame["id"].max()) if len(frame) else 0,
+                version=(previous.version if previous else 0) + (1 if changed else 0),
+            )
+            self._states[class_name] = state
+        return state
+
+    def _pull_lock(self, class_name):
+        with self._lock:
+            return self._pull_locks.setdefault(class_name, threading.Lock())
+
+    @instrument()
+    def _pull_delta(self, state, supabase=None):
+        requested = time.monotonic()
+        with self._pull_lock(state.class_name):
+            with self._lock:
+                state = self._states.get(state.class_name, state)
+            if state.synced_at >= requested and not state.stale:
+                # Another session pulled while this one waited
+                return state
+            return self._fetch_delta(state, self._client(supabase))
+
+    def _fetch_delta(self, state, client):
+        rows = []
+        after = state.high_water
+        try:
+            while True:
+                page = (
+                    client.table("attendance").select(",".join(RECORD_COLUMNS))
+                    .eq("class_name", state.class_name).gt("id", after)
+                    .order("id").limit(DEFAULT_PAGE_SIZE).execute().data or []
+                )
+                rows.extend(page)
+                if len(page) < DEFAULT_PAGE_SIZE:
+                    break
+                after = page[-1]["id"]
+        except Exception:
+            logger.exception(f"Failed to pull attendance delta for {state.class_name}")
+            raise
+        with self._lock:
+            delta = pd.DataFrame.from_records(rows, columns=list(RECORD_COLUMNS))
+            # Never append a row the frame already holds
+            delta = delta[delta["id"] > state.high_water]
+            if len(delta):
+                state.frame = pd.concat([state.frame, delta], ignore_index=True)
+                state.high_water = int(state.frame["id"].max())
+                state.version += 1
+            state.synced_at = time.monotonic()
+            state.stale = False
+        return state
+
+    # --- Invalidation ---
+    def mark_stale(self, class_name):
+        """Forces the next read of a class to pull a delta."""
+        state = self._states.get(class_name)
+        if state is not None:
+            state.stale = True
+
+    def expire(self, class_name=None):
+        """Forces the next read of one class, or all classes, to run a full reconcile."""
+        names = list(self._states) if class_name is None else [class_name]
+        for name in names:
+            state = self._states.get(name)
+            if state is not None:
+                state.reconciled_at -= self.reconcile_interval
+
+    def drop(self, class_name):
+        with self._lock:
+            self._states.pop(class_name, None)
+
+
+@st.cache_resource
+def get_attendance_sync():
+    """Returns the process-wide AttendanceSync."""
+    return AttendanceSync()
@@ -0,0 +1,238 @@
+# Attendence/services/change_feed.py
+"""
+Push-based change feed for `classroom_settings`, `attendance` and `roll_map`.
+
+Postgres change notifications (Supabase Realtime, or the in-process
+publisher of the memory:// and sqlite:/// clients) are applied to the shared
+caches in place: the class registry, class indexes, daily-count mirror, record
+caches and delta sync. Every change also bumps a per-(table, class) version
+that sessions watch (see components/live_updates.py) to rerun only when
+their class changed. While the feed is live the registry and delta sync stop
+polling on timers, so query load no longer grows with the number of viewers.
+
+Set CHANGE_FEED=0 to disable and fall back to TTL polling. The tables must be
+in the `supabase_realtime` publication (sql/realtime_publication.sql).
+"""
+import asyncio
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+
+import streamlit as st
+from realtime import AsyncRealtimeClient, RealtimeSubscribeStates
+
+from Attendence.core.clients import create_supabase_client
+from Attendence.core.config import get_env
+from Attendence.core.logger import get_logger
+from Attendence.core.memory_client import ChangePublisher
+from Attendence.services import answer_cache, attendance_matrix, attendance_service, class_index, counter_service
+from Attendence.services.attendance_sync import get_attendance_sync
+from Attendence.services.class_registry import get_class_registry
+
+logger = get_logger(__name__)
+
+TABLES = ("classroom_settings", "attendance", "roll_map")
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    table: str
+    type: str
+    record: dict = field(default_factory=dict)
+    old_record: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_payload(cls, payload):
+        """Builds an event from a Realtime postgres_changes payload."""
+        data = payload["data"]
+        return cls(
+            table=data["table"],
+            type=str(getattr(data["type"], "value", data["type"])),
+            record=data.get("record") or {},
+            old_record=data.get("old_record") or {},
+        )
+
+    @property
+    def row(self):
+        return self.old_record if self.type == "DELETE" else self.record
+
+    @property
+    def class_name(self):
+        return self.record.get("class_name") or self.old_record.get("class_name")
+
+
+class ChangeFeed:
+    """
+    Applies change events to the shared caches and tracks per-class versions.
+    `live` is True while a source is connected and delivering events.
+    """
+
+    def __init__(self):
+        self.live = False
+        self.events = 0
+        self._versions = Counter()
+        self._lock = threading.Lock()
+
+    # --- Versions ---
+    def version(self, class_name=None, tables=TABLES):
+        """
+        Sum of change counts for a class (or any class if None) over `tables`.
+        Sessions compare it with the value seen on their last run.
+        """
+        return sum(self._versions[(table, class_name)] for table in tables)
+
+    def set_live(self, live, complete=True):
+        """
+        `complete`: the source sees every write, so timed polling can stop.
+        False for sources that miss writes made by other processes.
+        """
+        if live and not self.live:
+            # Events may have been missed while disconnected
+            self._resync()
+        self.live = live
+        get_class_registry().push_enabled = live and complete
+        get_attendance_sync().push_enabled = live and complete
+        logger.info(f"Change feed {'live' if live else 'offline; polling'}")
+
+    def _resync(self):
+        get_class_registry().expire()
+        get_attendance_sync().expire()
+        class_index.drop()
+        counter_service.invalidate()
+        attendance_service.invalidate_records()
+        with self._lock:
+            for key in list(self._versions):
+                self._versions[key] += 1
+
+    # --- Dispatch ---
+    def apply(self, event):
+        if event.table not in TABLES:
+            return
+        handler = getattr(self, f"_apply_{event.table}")
+        try:
+            handler(event)
+        except Exception:
+            logger.exception(f"Failed to apply {event.type} on {event.table}", extra={"rate_limit": 30})
+        with self._lock:
+            self.events += 1
+            self._versions[(event.table, None)] += 1
+            if event.class_name:
+                self._versions[(event.table, event.class_name)] += 1
+
+    def _apply_classroom_settings(self, event):
+        class_name = event.class_name
+        if not class_name:
+            get_class_registry().expire()
+            return
+        if event.type == "DELETE":
+            get_class_registry().remove(class_name)
+            class_index.drop(class_name)
+            counter_service.invalidate(class_name)
+            get_attendance_sync().drop(class_name)
+            attendance_matrix.drop(class_name)
+            attendance_service.invalidate_records(class_name)
+            answer_cache.invalidate(class_name)
+            return
+        get_class_registry().apply(event.record)
+        if event.record.get("is_open"):
+            settings = {k: v for k, v in event.record.items() if k != "class_name"}
+            class_index.update_settings(class_name, **settings)
+        else:
+            class_index.drop(class_name)
+
+    def _apply_attendance(self, event):
+        class_name = event.class_name
+        if not class_name:
+            logger.warning("Attendance change without class_name; is REPLICA IDENTITY FULL set?", extra={"rate_limit": 300})
+            return
+        # The daily counter is re-read rather than bumped: the local submit
+        # path has usually counted this row already.
+        counter_service.invalidate(class_name)
+        attendance_service.invalidate_records(class_name)
+        if event.type == "INSERT":
+            class_index.record_presence(class_name, event.record.get("roll_number"), event.record.get("date"))
+            get_attendance_sync().mark_stale(class_name)
+        else:
+            class_index.drop(class_name)
+            get_attendance_sync().expire(class_name)
+
+    def _apply_roll_map(self, event):
+        class_name = event.class_name
+        if not class_name:
+            logger.warning("roll_map change without class_name; is REPLICA IDENTITY FULL set?", extra={"rate_limit": 300})
+            return
+        if event.type == "DELETE":
+            class_index.drop(class_name)
+        else:
+            class_index.record_roll(class_name, event.record.get("roll_number"), event.record.get("name"))
+
+
+# --- Sources ---
+class LocalChangeSource:
+    """Subscribes to the row changes of an in-process client."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def start(self, feed):
+        self.client.subscribe(lambda payload: feed.apply(ChangeEvent.from_payload(payload)))
+        feed.set_live(True, complete=self.client.sees_all_writes)
+
+
+class RealtimeChangeSource:
+    """
+    Listens to Supabase Realtime postgres_changes on a background thread with
+    its own event loop. The realtime client reconnects on its own; the feed
+    is marked offline (and callers fall back to polling) until it resubscribes.
+    """
+
+    def __init__(self, url, key, channel="attendance-changes"):
+        self.url = url.rstrip("/") + "/realtime/v1"
+        self.key = key
+        self.channel = channel
+
+    def start(self, feed):
+        threading.Thread(target=self._run, args=(feed,), name="change-feed", daemon=True).start()
+
+    def _run(self, feed):
+        try:
+            asyncio.run(self._listen(feed))
+        except Exception:
+            logger.exception("Change feed stopped")
+            feed.set_live(False)
+
+    async def _listen(self, feed):
+        client = AsyncRealtimeClient(self.url, self.key)
+        channel = client.channel(self.channel)
+        for table in TABLES:
+            channel.on_postgres_changes(
+                "*", table=table, schema="public",
+                callback=lambda payload: feed.apply(ChangeEvent.from_payload(payload)),
+            )
+
+        def on_state(state, error):
+            if error:
+                logger.warning(f"Change feed subscription error: {error}")
+            feed.set_live(state == RealtimeSubscribeStates.SUBSCRIBED)
+
+        await channel.subscribe(on_state)
+        await asyncio.Event().wait()
+
+
+def source_for(client):
+    if isinstance(client, ChangePublisher):
+        return LocalChangeSource(client)
+    return RealtimeChangeSource(get_env("SUPABASE_URL"), get_env("SUPABASE_KEY"))
+
+@st.cache_resource
+def get_change_feed():
+    """Returns the process-wide ChangeFeed, started unless CHANGE_FEED=0."""
+    feed = ChangeFeed()
+    if str(get_env("CHANGE_FEED", "1")).lower() in ("0", "false", "no"):
+        logger.info("Change feed disabled; caches poll on their TTLs.")
+        return feed
+    try:
+        source_for(create_supabase_client()).start(feed)
+    except Exception:
+        logger.exception("Failed to start change feed; caches poll on their TTLs")
+    return feed
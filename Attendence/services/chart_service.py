@@ -0,0 +1,142 @@
+# Attendence/services/chart_service.py
+"""
+Rendered chart images for the analytics and student views.
+
+Charts are drawn with matplotlib's object API onto an Agg canvas, never
+through pyplot, so no figure is registered globally and each one is released
+as soon as its PNG/SVG bytes are written. Images are cached in a bounded LRU
+keyed on the ChartSpec (kind, class, data version, student and the plotted
+values), so reruns and other sessions viewing the same data reuse them.
+
+Rendering runs on a single background worker by default: `submit()` returns a
+Future, letting a view lay out the rest of the page while the chart draws.
+Set CHART_WORKER=0 to render inline in the calling thread instead.
+"""
+import io
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import streamlit as st
+
+from Attendence.core.cache import VersionedCache
+from Attendence.core.config import get_env
+from Attendence.core.metrics import instrument
+from Attendence.core.shared_cache import LocalCacheBackend
+
+LABELS = ("Present", "Absent")
+COLORS = ("#4CAF50", "#FF5252")
+DPI = 200
+
+# Kept per process: images are cheap to redraw and would only bloat a shared store
+_charts = VersionedCache(
+    name="charts", maxsize=int(get_env("CHART_CACHE_SIZE", 128)), backend=LocalCacheBackend()
+)
+# Matplotlib's text and font caches are not thread-safe
+_render_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """
+    Everything a chart is drawn from; also its cache key.
+    `kind`: "pie" (class distribution) or "donut" (one student's percentage).
+    `version`: data version of the class the counts were read at.
+    """
+    kind: str
+    class_name: str
+    version: int
+    present: int
+    absent: int
+    student: Optional[int] = None
+    fmt: str = "png"
+
+    @property
+    def percentage(self):
+        total = self.present + self.absent
+        return self.present / total * 100 if total else 0.0
+
+
+# --- Drawing ---
+def _draw_pie(fig, spec):
+    ax = fig.subplots()
+    ax.pie(
+        [spec.present, spec.absent],
+        labels=LABELS,
+        colors=COLORS,
+        autopct="%1.0f%%",
+        startangle=90,
+        textprops={'fontsize': 10, 'color': 'white'}
+    )
+    ax.axis("equal")
+
+def _draw_donut(fig, spec):
+    ax = fig.subplots()
+    ax.pie(
+        [spec.present, spec.absent],
+        labels=LABELS,
+        colors=COLORS,
+        autopct=None,
+        startangle=90,
+        wedgeprops=dict(width=0.4),
+        textprops={'color': "white"}
+    )
+    ax.text(0, 0, f"{spec.percentage:.0f}%", ha='center', va='center', fontsize=20, fontweight='bold', color="white")
+
+# kind -> (draw function, figure size in inches)
+_CHARTS = {
+    "pie": (_draw_pie, (2, 2)),
+    "donut": (_draw_donut, (3, 3)),
+}
+
+@instrument()
+def _render(spec):
+    # Imported here so the dashboards start without matplotlib
+    from matplotlib.figure import Figure
+
+    draw, size = _CHARTS[spec.kind]
+    with _render_lock:
+        fig = Figure(figsize=size)
+        try:
+            draw(fig, spec)
+            # Transparent background
+            fig.patch.set_alpha(0)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=spec.fmt, dpi=DPI, bbox_inches="tight")
+            return buffer.getvalue()
+        finally:
+            fig.clear()
+
+def _render_and_store(spec):
+    image = _render(spec)
+    _charts.put(spec.class_name, image, key=spec)
+    return image
+
+
+# --- Public API ---
+@st.cache_resource
+def _get_worker():
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-render")
+
+def _use_worker():
+    return str(get_env("CHART_WORKER", "1")).lower() not in ("0", "false", "no")
+
+def submit(spec):
+    """
+    Returns a Future for the chart's image bytes. Cached charts (and every
+    chart when CHART_WORKER=0) come back as an already completed Future.
+    """
+    cached = _charts.get(spec.class_name, key=spec)
+    if cached is not None or not _use_worker():
+        future = Future()
+        try:
+            future.set_result(cached if cached is not None else _render_and_store(spec))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return _get_worker().submit(_render_and_store, spec)
+
+def render(spec):
+    """Returns the chart's PNG (or SVG) bytes, rendering it if not cached."""
+    return submit(spec).result()
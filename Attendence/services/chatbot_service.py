@@ -1,36 +1,50 @@
 # Attendence/services/chatbot_service.py
 import pandas as pd
 import re
+import streamlit as st
+from dataclasses import dataclass
 from datetime import datetime
-from dateparser import parse as parse_date
+from functools import cached_property
 from typing import Optional, Any
 from pydantic import BaseModel
-from langgraph.graph import StateGraph
-from langchain_google_genai import ChatGoogleGenerativeAI
+from Attendence.core.config import get_env
 from Attendence.core.logger import get_logger
-from langchain_groq import ChatGroq
+from Attendence.core.metrics import instrument, timer
+from Attendence.services import answer_cache, code_sandbox
+from Attendence.services.intent_router import IntentRouter
+from Attendence.services.result_formatter import format_result
 
 logger = get_logger(__name__)
 
+# Results the typed formatters cannot present are summarized by the LLM only if enabled
+LLM_SUMMARY = str(get_env("CHAT_LLM_SUMMARY", "")).lower() in ("1", "true", "yes")
+
+# langchain_groq, langgraph and dateparser take seconds to import, so they are
+# loaded on first use instead of when the admin dashboard starts.
+
 # --- LLM Setup ---
-# Note: Ensure GOOGLE_API_KEY is in .env or environment
-try:
-    gemini_llm = ChatGroq(
-    model_name = "llama-3.3-70b-versatile",
-    temperature=0.3
-    )
-    
-except Exception:
-    logger.warning("Failed to initialize ChatGoogleGenerativeAI. Check API Key.")
-    gemini_llm = None
+@st.cache_resource
+def get_llm():
+    """Returns the shared chat model, or None if it cannot be created (e.g. no GROQ_API_KEY)."""
+    try:
+        from langchain_groq import ChatGroq
+        return ChatGroq(
+            model_name="llama-3.3-70b-versatile",
+            temperature=0.3
+        )
+    except Exception:
+        logger.warning("Failed to initialize ChatGroq. Check API Key.")
+        return None
 
 # --- Load prompt examples ---
-try:
-    with open("Prompts/few_shot_prompt.txt", "r", encoding="utf-8") as f:
-        EXAMPLES = f.read()
-except FileNotFoundError:
-    logger.warning("Prompts/few_shot_prompt.txt not found.")
-    EXAMPLES = ""
+@st.cache_resource
+def get_examples():
+    try:
+        with open("Prompts/few_shot_prompt.txt", "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        logger.warning("Prompts/few_shot_prompt.txt not found.")
+        return ""
 
 # --- Schemas ---
 class AppState(BaseModel):
@@ -38,67 +52,101 @@ class AppState(BaseModel):
     code: Optional[str] = None
     result: Optional[Any] = None
     answer: Optional[str] = None
+    cached: Optional[str] = None  # "answer" or "code" when served from answer_cache
+    intent: Optional[str] = None  # set when answered by the intent router
+    summary_prompt: Optional[str] = None  # set when the answer is left to stream_summary
 
 
 # --- Context Engineering ---
-def generate_context_summary(df: pd.DataFrame) -> str:
+SAMPLE_ROWS = 3
+SAMPLE_DATES = 3
+_DATE_COLUMN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+@dataclass(frozen=True)
+class PromptContext:
     """
-    Generates a rich semantic summary of the DataFrame to help the LLM understand
-    the structure (Students vs Dates) and key statistics.
+    What the code-generation prompt says about a class's DataFrame, computed
+    once per data version. Date columns are described by their range and
+    count rather than listed, and the sample rows show only the latest
+    SAMPLE_DATES of them, so the prompt stays the same size as the semester grows.
     """
-    total_students = len(df)
-    
-    # Identify Date Columns (YYYY-MM-DD)
-    date_cols = [c for c in df.columns if re.match(r"\d{4}-\d{2}-\d{2}", str(c))]
-    date_cols.sort()
-    
-    total_classes = len(date_cols)
-    start_date = date_cols[0] if date_cols else "N/A"
-    end_date = date_cols[-1] if date_cols else "N/A"
-    
-    # Identify Metadata Columns
-    meta_cols = [c for c in df.columns if c not in date_cols]
-    
-    summary = f"""
+    students: int
+    meta_columns: tuple
+    first_date: str
+    last_date: str
+    n_dates: int
+    sample: str
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, presence=None) -> "PromptContext":
+        """Builds the context from `df`; with the class's PresenceMatrix its dates are not re-scanned."""
+        if presence is not None:
+            date_cols = [str(d) for d in presence.dates]
+        else:
+            date_cols = sorted(str(c) for c in df.columns if _DATE_COLUMN.match(str(c)))
+        dated = set(date_cols)
+        meta_cols = tuple(str(c) for c in df.columns if str(c) not in dated)
+
+        recent = date_cols[-SAMPLE_DATES:]
+        sample = df.head(SAMPLE_ROWS)[[*meta_cols, *recent]].to_string(index=False)
+        if len(date_cols) > len(recent):
+            sample += f"\n({len(date_cols) - len(recent)} earlier date columns not shown)"
+
+        return cls(
+            students=len(df),
+            meta_columns=meta_cols,
+            first_date=date_cols[0] if date_cols else "N/A",
+            last_date=date_cols[-1] if date_cols else "N/A",
+            n_dates=len(date_cols),
+            sample=sample,
+        )
+
+    @cached_property
+    def summary(self) -> str:
+        """Semantic summary of the structure (students vs dates) and key statistics."""
+        return f"""
     ### Dataset Structure (Wide Format)
     - **Rows**: Each row represents a SINGLE STUDENT.
-    - **Metadata Columns**: {', '.join(map(str, meta_cols))} (Use these to identify students)
-    - **Data Columns**: {total_classes} columns representing class dates from {start_date} to {end_date}.
+    - **Metadata Columns**: {', '.join(self.meta_columns)} (Use these to identify students)
+    - **Data Columns**: {self.n_dates} columns named YYYY-MM-DD, one per class date from {self.first_date} to {self.last_date}.
     
     ### Statistics
-    - **Total Students**: {total_students}
-    - **Total Class Days**: {total_classes}
-    - **Latest Date**: {end_date}
+    - **Total Students**: {self.students}
+    - **Total Class Days**: {self.n_dates}
+    - **Latest Date**: {self.last_date}
     
     ### Attendance Codes
     - 'P' = Present
     - '' (Empty String) or 'A' or NaN = Absent
     """
-    return summary
 
-# --- Prompt Builder ---
-def build_prompt(question: str, df: pd.DataFrame) -> str:
-    context_summary = generate_context_summary(df)
-    head_sample = df.head(3).to_string(index=False)
-    
-    return f"""
-You are a pandas expert. You are given a DataFrame named `df` tracking student attendance.
+    def build_prompt(self, question: str) -> str:
+        return f"""
+You are a smart attendance assistant. You have access to a pandas DataFrame `df`.
 
-{context_summary}
+{self.summary}
 
-### Sample Data (First 3 rows)
-{head_sample}
+### Sample Data (latest dates only)
+{self.sample}
 
-### Task
-Write a SINGLE line of Python code using pandas to answer the question.
-- The `df` is already loaded.
-- `date_cols` list is NOT pre-defined; filter columns using regex if needed (e.g. `[c for c in df.columns if re.match(r'\d{4}-\d{2}-\d{2}', str(c))]`).
-- Return ONLY the code. No markdown, no explanations.
+### Instructions
+1. **Analyze the User's Input**:
+   - If it is a **Greeting** (e.g., "hi", "hello") or **General Chat**, return `TEXT: <your friendly response>`.
+   - If it is a **Data Question**, return `CODE: <single line of pandas code>`.
+
+2. **Rules for Code**:
+   - Use `df` variable.
+   - Filter `date_cols` dynamically if needed.
+   - Return ONLY the code prefixed with `CODE:`.
 
 ### Examples
-{EXAMPLES}
+Q: Hi, who are you?
+A: TEXT: I am your Attendance Assistant. Ask me anything about class records!
+
+Q: {get_examples()}
 
-### Question: {question}
+### User Input: {question}
 """
 
 
@@ -112,6 +160,9 @@ def normalize_dates_in_question(inputs: dict, df) -> dict:
         re.IGNORECASE,
     )
 
+    if possible_phrases:
+        from dateparser import parse as parse_date
+
     for phrase in possible_phrases:
         resolved = parse_date(phrase)
         if resolved:
@@ -132,38 +183,6 @@ def normalize_dates_in_question(inputs: dict, df) -> dict:
 
     return {"question": question}
 
-# --- Prompt Builder ---
-def build_prompt(question: str, df: pd.DataFrame) -> str:
-    context_summary = generate_context_summary(df)
-    head_sample = df.head(3).to_string(index=False)
-    
-    return f"""
-You are a smart attendance assistant. You have access to a pandas DataFrame `df`.
-
-{context_summary}
-
-### Sample Data
-{head_sample}
-
-### Instructions
-1. **Analyze the User's Input**:
-   - If it is a **Greeting** (e.g., "hi", "hello") or **General Chat**, return `TEXT: <your friendly response>`.
-   - If it is a **Data Question**, return `CODE: <single line of pandas code>`.
-
-2. **Rules for Code**:
-   - Use `df` variable.
-   - Filter `date_cols` dynamically if needed.
-   - Return ONLY the code prefixed with `CODE:`.
-
-### Examples
-Q: Hi, who are you?
-A: TEXT: I am your Attendance Assistant. Ask me anything about class records!
-
-Q: {EXAMPLES}
-
-### User Input: {question}
-"""
-
 # --- Nodes ---
 def normalize_node(state: AppState, df) -> AppState:
     try:
@@ -175,12 +194,38 @@ def normalize_node(state: AppState, df) -> AppState:
         logger.exception("Error in normalize_node")
         return AppState(question=state.question, result=f"Error processing dates: {e}")
 
-def generate_code_node(state: AppState, df: pd.DataFrame) -> AppState:
-    if not gemini_llm:
-        return AppState(question=state.question, code="", result="LLM not initialized.")
+def lookup_node(state: AppState, class_name, version) -> AppState:
+    """Serves a cached answer for this question at this data version, if any."""
+    if class_name is None or state.answer:
+        return state
+    answer = answer_cache.get_answer(class_name, version, state.question)
+    if answer is None:
+        return state
+    return AppState(question=state.question, answer=answer, cached="answer")
+
+@instrument("chatbot.intent_router")
+def route_node(state: AppState, router) -> AppState:
+    """Answers common questions from precomputed statistics, without the LLM."""
+    routed = router.route(state.question) if router else None
+    if routed is None:
+        return state
+    return AppState(question=state.question, result=routed.result, answer=routed.answer, intent=routed.intent)
+
+def generate_code_node(state: AppState, context: PromptContext, class_name=None) -> AppState:
+    # Code written for this question earlier still applies to newer data
+    generated = answer_cache.get_code(class_name, state.question) if class_name else None
+    if generated:
+        if "code" in generated:
+            return AppState(question=state.question, code=generated["code"], cached="code")
+        return AppState(question=state.question, code=None, result=generated["text"], cached="code")
+
+    llm = get_llm()
+    if not llm:
+        return AppState(question=state.question, code="", result="LLM Error: not initialized.")
     try:
-        prompt = build_prompt(state.question, df)
-        response = gemini_llm.invoke(prompt).content.strip()
+        prompt = context.build_prompt(state.question)
+        with timer("chatbot.llm.generate_code"):
+            response = llm.invoke(prompt).content.strip()
         
         # Intent Parsing
         if response.startswith("TEXT:"):
@@ -202,35 +247,33 @@ def generate_code_node(state: AppState, df: pd.DataFrame) -> AppState:
         logger.exception("Error in generate_code_node")
         return AppState(question=state.question, code="", result=f"LLM Error: {e}")
 
-def execute_code_node(state: AppState, df: pd.DataFrame) -> AppState:
+@instrument()
+def execute_code_node(state: AppState, df: pd.DataFrame, class_name=None, version=None, presence=None) -> AppState:
+    """
+    Runs the generated code. With the class's PresenceMatrix it goes to the
+    code_sandbox worker pool (time, memory and result-size limits); otherwise,
+    or with CHAT_SANDBOX=0, it is evaluated in-process on a copy of `df`.
+    """
     if not state.code:
         # No code to execute (was a greeting or error)
-        return AppState(question=state.question, code=None, result=state.result)
+        return AppState(question=state.question, code=None, result=state.result, cached=state.cached)
+    if class_name is not None and presence is not None and code_sandbox.enabled():
+        ok, result = code_sandbox.get_sandbox().run(state.code, (class_name, version), presence)
+        if not ok:
+            return AppState(question=state.question, code=state.code, result=f"ERROR executing code: {result}")
+        return AppState(question=state.question, code=state.code, result=result, cached=state.cached)
     try:
         # Unsafe eval (as per user request domain)
         result = eval(state.code, {"df": df.copy(), "pd": pd, "re": re})
-        return AppState(question=state.question, code=state.code, result=result)
+        return AppState(question=state.question, code=state.code, result=result, cached=state.cached)
     except Exception as e:
         return AppState(question=state.question, code=state.code, result=f"ERROR executing code: {str(e)}")
 
-def format_response(state: AppState) -> AppState:
-    """
-    Synthesizes a final natural language response using the LLM.
-    """
-    question = state.question
-    result = state.result
-    
-    # If the result is an error, just return it
-    if isinstance(result, str) and (result.startswith("ERROR") or "Error" in result or "Traceback" in result):
-         return AppState(question=question, result=result, answer=f"❌ I encountered an issue: {result}")
-
-    # If we already have a text result (from greeting), refine it or pass through
-    if not state.code and isinstance(result, str):
-         # It was a greeting, just ensure it's clean
-         return AppState(question=question, result=result, answer=result)
+def is_error(result) -> bool:
+    return isinstance(result, str) and (result.startswith("ERROR") or "Error" in result or "Traceback" in result)
 
-    # Synthesis Prompt
-    summary_prompt = f"""
+def build_summary_prompt(question, result) -> str:
+    return f"""
     You are an AI assistant summarizing data results.
     
     **User's Question**: "{question}"
@@ -244,35 +287,98 @@ def format_response(state: AppState) -> AppState:
     
     **Response**:
     """
-    
+
+def stream_summary(prompt, fallback=""):
+    """Yields the LLM summary token by token (for st.write_stream), or `fallback` on failure."""
+    llm = get_llm()
+    if not llm:
+        yield fallback
+        return
     try:
-        final_answer = gemini_llm.invoke(summary_prompt).content.strip()
+        with timer("chatbot.llm.summarize"):
+            for chunk in llm.stream(prompt):
+                yield chunk.content
     except Exception:
-        final_answer = str(result)
+        logger.exception("Failed to stream summary")
+        yield fallback
+
+def format_response(state: AppState) -> AppState:
+    """
+    Turns the result into the final answer. Plain values are formatted
+    locally by result_formatter; anything else is left as a `summary_prompt`
+    for the UI to stream when CHAT_LLM_SUMMARY is on, or shown raw.
+    """
+    question = state.question
+    result = state.result
+    
+    # If the result is an error, just return it
+    if is_error(result):
+         return AppState(question=question, result=result, answer=f"❌ I encountered an issue: {result}")
+
+    # If we already have a text result (from greeting), refine it or pass through
+    if not state.code and isinstance(result, str):
+         # It was a greeting, just ensure it's clean
+         return AppState(question=question, result=result, answer=result, cached=state.cached)
 
-    # Update state
     state_dict = state.model_dump()
-    state_dict["answer"] = final_answer
+    answer = format_result(result, question)
+    if answer is None and LLM_SUMMARY:
+        state_dict["summary_prompt"] = build_summary_prompt(question, result)
+        return AppState(**state_dict)
+
+    state_dict["answer"] = answer if answer is not None else f"```\n{result}\n```"
     return AppState(**state_dict)
 
 
+def remember_node(state: AppState, class_name, version) -> AppState:
+    """Caches the code and answer of a successful exchange (the answer later, if streamed)."""
+    if class_name is not None and (state.answer or state.summary_prompt) and not is_error(state.result):
+        text = state.result if not state.code and isinstance(state.result, str) else None
+        answer_cache.remember(class_name, version, state.question, state.code, state.answer, text=text)
+    return state
+
+
 # --- Entry Point ---
-def get_agent_for_df(df: pd.DataFrame):
+def get_agent_for_df(df: pd.DataFrame, class_name=None, version=None, presence=None):
+    """
+    Builds the question-answering graph over `df`. With `class_name` and the
+    matrix `version`, answers and generated code go through answer_cache;
+    with the class's PresenceMatrix, common questions skip the LLM and
+    generated code runs in the code_sandbox pool.
+    """
+    from langgraph.graph import END, StateGraph
+
+    router = IntentRouter(presence) if presence is not None else None
+    context = PromptContext.from_frame(df, presence)
+    if class_name is not None and presence is not None and code_sandbox.enabled():
+        # Start the workers and publish this version's matrix before the first question
+        code_sandbox.get_sandbox().publish((class_name, version), presence)
+
     def norm(state): return normalize_node(state, df)
-    def codegen(state): return generate_code_node(state, df)
-    def execute(state): return execute_code_node(state, df)
+    def lookup(state): return lookup_node(state, class_name, version)
+    def route(state): return route_node(state, router)
+    def codegen(state): return generate_code_node(state, context, class_name)
+    def execute(state): return execute_code_node(state, df, class_name, version, presence)
     def respond(state): return format_response(state)
+    def remember(state): return remember_node(state, class_name, version)
 
     graph = StateGraph(AppState)
     graph.add_node("normalize", norm)
+    graph.add_node("lookup", lookup)
+    graph.add_node("route", route)
     graph.add_node("generate_code", codegen)
     graph.add_node("execute", execute)
     graph.add_node("respond", respond)
+    graph.add_node("remember", remember)
 
     graph.set_entry_point("normalize")
-    graph.add_edge("normalize", "generate_code")
+    graph.add_edge("normalize", "lookup")
+    # A cached or routed answer (or a date error from normalize) ends the run
+    graph.add_conditional_edges("lookup", lambda state: END if state.answer else "route")
+    graph.add_conditional_edges("route", lambda state: END if state.answer else "generate_code")
     graph.add_edge("generate_code", "execute")
     graph.add_edge("execute", "respond")
-    graph.set_finish_point("respond")
+    graph.add_edge("respond", "remember")
+    graph.set_finish_point("remember")
 
     return graph.compile()
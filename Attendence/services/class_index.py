@@ -0,0 +1,124 @@
+# Attendence/services/class_index.py
+"""
+Per-class in-memory index, warmed when a class is opened.
+
+Holds roll_number -> name from `roll_map`, the roll numbers already marked
+present today and the class settings, so student-side lookups are dict hits
+instead of network round trips. `attendance_service` keeps it current in
+place; it is dropped when the class closes.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+
+from Attendence.core.clients import create_supabase_client
+from Attendence.core.logger import get_logger
+from Attendence.core.metrics import instrument
+from Attendence.core.utils import current_ist_date
+from Attendence.services.attendance_reader import iter_class_pages
+
+logger = get_logger(__name__)
+
+# Indexes warmed by another process's open (e.g. the student app) are
+# re-read after this many seconds so closes and edits elsewhere are picked up.
+MAX_AGE_SECONDS = 300
+
+
+@dataclass
+class ClassIndex:
+    class_name: str
+    settings: dict
+    date: str
+    roll_names: dict = field(default_factory=dict)
+    present_today: set = field(default_factory=set)
+    warmed_at: float = field(default_factory=time.monotonic)
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+@instrument()
+def warm(class_name, supabase=None):
+    """Loads settings, roll map and today's presence for a class. Returns the index."""
+    if not supabase:
+        supabase = create_supabase_client()
+    today = current_ist_date()
+    try:
+        settings = supabase.table("classroom_settings").select("*").eq("class_name", class_name).execute().data
+        # Paged: a single select stops at PostgREST's max_rows
+        roll_map = [
+            row for page in iter_class_pages("roll_map", class_name, ("roll_number", "name"), key="roll_number", supabase=supabase)
+            for row in page
+        ]
+        present = [
+            row for page in iter_class_pages("attendance", class_name, ("roll_number",), filters={"date": today}, supabase=supabase)
+            for row in page
+        ]
+    except Exception:
+        logger.exception(f"Failed to warm index for {class_name}")
+        raise
+
+    if not settings:
+        drop(class_name)
+        return None
+
+    index = ClassIndex(
+        class_name=class_name,
+        settings=settings[0],
+        date=today,
+        roll_names={row["roll_number"]: row["name"] for row in roll_map},
+        present_today={row["roll_number"] for row in present},
+    )
+    with _lock:
+        _indexes[class_name] = index
+    logger.info(f"Warmed index for {class_name}: {len(index.roll_names)} rolls, {len(index.present_today)} present")
+    return index
+
+def get(class_name):
+    """
+    Returns the warm index for a class, or None. Present-today is reset when
+    the date rolls over.
+    """
+    index = _indexes.get(class_name)
+    if index is None:
+        return None
+    today = current_ist_date()
+    if index.date != today:
+        with _lock:
+            index.date = today
+            index.present_today = set()
+    return index
+
+def ensure_warm(class_name, supabase=None):
+    """Returns the index for a class, warming it if missing or older than MAX_AGE_SECONDS."""
+    index = get(class_name)
+    if index is None or time.monotonic() - index.warmed_at > MAX_AGE_SECONDS:
+        index = warm(class_name, supabase)
+    return index
+
+def drop(class_name=None):
+    """Drops the index of one class, or all classes."""
+    with _lock:
+        if class_name is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(class_name, None)
+
+# --- In-place updates ---
+def record_roll(class_name, roll_number, name):
+    index = _indexes.get(class_name)
+    if index is not None:
+        with _lock:
+            index.roll_names[roll_number] = name
+
+def record_presence(class_name, roll_number, date):
+    index = get(class_name)
+    if index is not None and index.date == date:
+        with _lock:
+            index.present_today.add(roll_number)
+
+def update_settings(class_name, **changes):
+    index = _indexes.get(class_name)
+    if index is not None:
+        with _lock:
+            index.settings = {**index.settings, **changes}
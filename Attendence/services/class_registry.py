@@ -0,0 +1,149 @@
+# Attendence/services/class_registry.py
+"""
+Name-keyed, versioned snapshot of `classroom_settings`.
+
+Lookups by class name and open-class checks are O(1) dict/set operations.
+Mutations in class_service refresh or drop the single affected row instead of
+re-reading the whole table; a full reload only happens when the snapshot is
+older than `ttl` seconds (to pick up edits made by other processes). While the
+change feed is live (`push_enabled`) rows are applied as they change and the
+TTL reload is skipped. With a shared cache backend, class_service mutations
+`publish()` a version stamp that makes the other replicas reload on their next
+lookup.
+"""
+import threading
+import time
+
+import streamlit as st
+
+from Attendence.core.clients import create_supabase_client
+from Attendence.core.logger import get_logger
+from Attendence.core.metrics import instrument
+from Attendence.core.shared_cache import get_cache_backend
+
+logger = get_logger(__name__)
+
+# Cache-backend namespace whose version changes on every class mutation
+STAMP = "class_registry"
+
+
+class ClassRegistry:
+    def __init__(self, supabase=None, ttl=60):
+        self.ttl = ttl
+        self.version = 0
+        self.push_enabled = False
+        self._expired = False
+        self._stamp = None
+        self._supabase = supabase
+        self._by_name = {}
+        self._open = set()
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    def _client(self, supabase=None):
+        return supabase or self._supabase or create_supabase_client()
+
+    # --- Loading ---
+    @instrument()
+    def load(self, supabase=None):
+        """Replaces the snapshot with a full read of classroom_settings."""
+        stamp = get_cache_backend().version(STAMP)
+        try:
+            rows = self._client(supabase).table("classroom_settings").select("*").execute().data or []
+        except Exception:
+            logger.exception("Failed to load class registry")
+            raise
+        with self._lock:
+            self._by_name = {row["class_name"]: row for row in rows}
+            self._open = {row["class_name"] for row in rows if row.get("is_open")}
+            self._loaded_at = time.monotonic()
+            self._expired = False
+            self._stamp = stamp
+            self.version += 1
+        return self
+
+    @instrument()
+    def refresh(self, class_name, supabase=None):
+        """Re-reads a single class row (or drops it if it no longer exists)."""
+        try:
+            rows = self._client(supabase).table("classroom_settings").select("*").eq("class_name", class_name).execute().data
+        except Exception:
+            logger.exception(f"Failed to refresh registry entry for {class_name}")
+            raise
+        if rows:
+            self.apply(rows[0])
+        else:
+            self.remove(class_name)
+
+    def apply(self, row):
+        """Inserts or replaces one class row in the snapshot."""
+        name = row["class_name"]
+        with self._lock:
+            self._by_name[name] = {**self._by_name.get(name, {}), **row}
+            if self._by_name[name].get("is_open"):
+                self._open.add(name)
+            else:
+                self._open.discard(name)
+            self.version += 1
+
+    def publish(self):
+        """Tells other replicas sharing the cache backend to reload."""
+        backend = get_cache_backend()
+        if backend.shared:
+            self._stamp = backend.bump(STAMP)
+
+    def expire(self):
+        """Forces a full reload on the next lookup."""
+        self._expired = True
+
+    def remove(self, class_name):
+        with self._lock:
+            self._by_name.pop(class_name, None)
+            self._open.discard(class_name)
+            self.version += 1
+
+    def _ensure_fresh(self):
+        backend = get_cache_backend()
+        if backend.shared and backend.version(STAMP) != self._stamp:
+            self._expired = True
+        if self._loaded_at is not None and not self._expired:
+            if self.push_enabled or time.monotonic() - self._loaded_at < self.ttl:
+                return
+        try:
+            self.load()
+        except Exception:
+            # Keep serving the previous snapshot if there is one
+            if self._loaded_at is None:
+                raise
+
+    # --- Lookups ---
+    def get(self, class_name):
+        self._ensure_fresh()
+        row = self._by_name.get(class_name)
+        return dict(row) if row is not None else None
+
+    def all(self):
+        self._ensure_fresh()
+        return [dict(row) for row in self._by_name.values()]
+
+    def names(self):
+        self._ensure_fresh()
+        return list(self._by_name)
+
+    def open_classes(self):
+        self._ensure_fresh()
+        return sorted(self._open)
+
+    def is_open(self, class_name):
+        self._ensure_fresh()
+        return class_name in self._open
+
+    def is_any_other_open(self, class_name):
+        self._ensure_fresh()
+        return len(self._open) > (1 if class_name in self._open else 0)
+
+
+@st.cache_resource
+def get_class_registry():
+    """Returns the process-wide ClassRegistry."""
+    return ClassRegistry()
@@ -1,32 +1,38 @@
 # Attendence/services/class_service.py
-import streamlit as st
 from Attendence.core.clients import create_supabase_client
 from Attendence.core.logger import get_logger
+from Attendence.core.metrics import instrument
+from Attendence.services import answer_cache, attendance_matrix, attendance_service, class_index, counter_service
+from Attendence.services.attendance_sync import get_attendance_sync
+from Attendence.services.class_registry import get_class_registry
 
 logger = get_logger(__name__)
 
-@st.cache_data(ttl=60)
-def get_all_classes(supabase=None):
-    if not supabase:
-        supabase = create_supabase_client()
-    try:
-        response = supabase.table("classroom_settings").select("*").execute()
-        return response.data if response.data else []
-    except Exception:
-        logger.exception("Failed to fetch classes")
-        raise
+def get_all_classes():
+    """All class settings rows, served from the in-memory ClassRegistry."""
+    return get_class_registry().all()
+
+def get_open_classes():
+    """Names of classes currently open for attendance."""
+    return get_class_registry().open_classes()
+
+@instrument()
+def refresh_classes():
+    """Forces a full reload of the class registry (e.g. from a Refresh button)."""
+    get_class_registry().load()
 
-@st.cache_data(ttl=60)
-def get_open_classes(supabase=None):
+@instrument()
+def get_class_settings(class_name, supabase=None):
     if not supabase:
         supabase = create_supabase_client()
     try:
-        response = supabase.table("classroom_settings").select("class_name").eq("is_open", True).execute()
-        return [entry["class_name"] for entry in response.data] if response.data else []
+        response = supabase.table("classroom_settings").select("*").eq("class_name", class_name).execute()
+        return response.data[0] if response.data else None
     except Exception:
-        logger.exception("Failed to fetch open classes")
+        logger.exception(f"Failed to fetch settings for {class_name}")
         raise
 
+@instrument()
 def create_class(class_name, code="1234", daily_limit=10, supabase=None):
     if not supabase:
         supabase = create_supabase_client()
@@ -42,43 +48,64 @@ def create_class(class_name, code="1234", daily_limit=10, supabase=None):
             "daily_limit": daily_limit,
             "is_open": False
         }).execute()
-        get_all_classes.clear()
+        get_class_registry().refresh(class_name, supabase)
+        get_class_registry().publish()
         return True, f"Class '{class_name}' created."
     except Exception as e:
         logger.exception(f"Failed to create class {class_name}")
         return False, str(e)
 
+@instrument()
 def delete_class(class_name, supabase=None):
     if not supabase:
         supabase = create_supabase_client()
     try:
         supabase.table("attendance").delete().eq("class_name", class_name).execute()
+        supabase.table("attendance_daily_counts").delete().eq("class_name", class_name).execute()
         supabase.table("roll_map").delete().eq("class_name", class_name).execute()
         supabase.table("classroom_settings").delete().eq("class_name", class_name).execute()
-        get_all_classes.clear()
-        get_open_classes.clear()
+        counter_service.invalidate(class_name)
+        class_index.drop(class_name)
+        get_attendance_sync().drop(class_name)
+        attendance_matrix.drop(class_name)
+        attendance_service.invalidate_records(class_name)
+        answer_cache.invalidate(class_name)
+        get_class_registry().remove(class_name)
+        get_class_registry().publish()
         return True
     except Exception:
         logger.exception(f"Failed to delete class {class_name}")
         raise
 
+@instrument()
 def update_class_status(class_name, is_open, supabase=None):
     if not supabase:
         supabase = create_supabase_client()
     try:
         supabase.table("classroom_settings").update({"is_open": is_open}).eq("class_name", class_name).execute()
-        get_all_classes.clear()
-        get_open_classes.clear()
+        # Warm the lookup index on open so student checks skip the network
+        if is_open:
+            try:
+                class_index.warm(class_name, supabase)
+            except Exception:
+                logger.warning(f"Opened {class_name} without a warm index")
+        else:
+            class_index.drop(class_name)
+        get_class_registry().refresh(class_name, supabase)
+        get_class_registry().publish()
     except Exception:
         logger.exception(f"Failed to update status for {class_name}")
         raise
 
+@instrument()
 def update_class_settings(class_name, code, daily_limit, supabase=None):
     if not supabase:
         supabase = create_supabase_client()
     try:
         supabase.table("classroom_settings").update({"code": code, "daily_limit": daily_limit}).eq("class_name", class_name).execute()
-        get_all_classes.clear()
+        class_index.update_settings(class_name, code=code, daily_limit=daily_limit)
+        get_class_registry().refresh(class_name, supabase)
+        get_class_registry().publish()
     except Exception:
         logger.exception(f"Failed to update settings for {class_name}")
         raise
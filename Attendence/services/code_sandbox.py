@@ -0,0 +1,173 @@
+# Attendence/services/code_sandbox.py
+"""
+Process-pool execution of the chatbot's generated pandas code.
+
+Generated expressions run in pre-warmed worker processes (sandbox_worker)
+instead of the Streamlit server thread. Each class's PresenceMatrix is
+published once per data version into a shared-memory segment; workers attach
+to it read-only and build the P/A frame themselves, so no frame is copied or
+pickled per question. Every call has a wall-clock timeout (CHAT_EXEC_TIMEOUT),
+a CPU-time limit (CHAT_EXEC_CPU_SECONDS), an address-space limit per worker
+(CHAT_EXEC_MEMORY_MB) and a cap on the encoded result (CHAT_EXEC_MAX_RESULT_KB).
+A worker that times out or dies is killed and replaced; the caller never waits
+longer than the timeout. Set CHAT_SANDBOX=0 to evaluate in-process instead.
+
+This is resource isolation, not a security boundary: workers run as the
+server's user and generated code can still reach the OS. It keeps a runaway
+or oversized expression from stalling or bloating the server, and results
+come back as JSON or Arrow IPC, decoded without pickle.
+"""
+import atexit
+import multiprocessing as mp
+import queue
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import streamlit as st
+
+from Attendence.core.config import get_env
+from Attendence.core.logger import get_logger
+from Attendence.services import sandbox_worker
+
+logger = get_logger(__name__)
+
+WORKERS = int(get_env("CHAT_EXEC_WORKERS", 2))
+TIMEOUT = float(get_env("CHAT_EXEC_TIMEOUT", 5))
+CPU_SECONDS = float(get_env("CHAT_EXEC_CPU_SECONDS", TIMEOUT))
+MEMORY_MB = int(get_env("CHAT_EXEC_MEMORY_MB", 512))
+MAX_RESULT_BYTES = int(get_env("CHAT_EXEC_MAX_RESULT_KB", 1024)) * 1024
+SEGMENTS_KEPT = 8
+
+
+def enabled():
+    return str(get_env("CHAT_SANDBOX", "1")).lower() not in ("0", "false", "no")
+
+
+class _Worker:
+    """One sandbox process and the parent's end of its pipe."""
+
+    def __init__(self, ctx, memory_mb):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=sandbox_worker.serve, args=(child, memory_mb), name="code-sandbox", daemon=True
+        )
+        self.process.start()
+        self.ready = False
+        child.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.kill(grace=1.0)
+
+    def kill(self, grace=0.0):
+        self.process.join(grace)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1.0)
+        self.conn.close()
+
+
+class CodeSandbox:
+    """A fixed pool of sandbox workers sharing per-class presence segments."""
+
+    def __init__(self, workers=WORKERS, timeout=TIMEOUT, cpu_seconds=CPU_SECONDS,
+                 memory_mb=MEMORY_MB, max_result_bytes=MAX_RESULT_BYTES, segments=SEGMENTS_KEPT):
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_result_bytes = max_result_bytes
+        self.segments_kept = segments
+        # spawn: workers must not inherit the server's threads and locks
+        self._ctx = mp.get_context("spawn")
+        self._segments = OrderedDict()
+        self._lock = threading.Lock()
+        self._idle = queue.Queue()
+        self._closed = False
+        for _ in range(workers):
+            self._idle.put(_Worker(self._ctx, memory_mb))
+
+    # --- Shared memory ---
+    def publish(self, key, presence):
+        """Returns the segment name holding `presence` for `key` (class, version), creating it once."""
+        with self._lock:
+            shm = self._segments.get(key)
+            if shm is not None:
+                self._segments.move_to_end(key)
+                return shm.name
+            meta = sandbox_worker.segment_meta(presence)
+            size = sandbox_worker.segment_offset(meta) + max(presence.bits.nbytes, 1)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            sandbox_worker.write_segment(shm, presence)
+            self._segments[key] = shm
+            while len(self._segments) > self.segments_kept:
+                _, old = self._segments.popitem(last=False)
+                old.close()
+                old.unlink()
+            return shm.name
+
+    # --- Execution ---
+    def run(self, code, key, presence):
+        """
+        Evaluates `code` against the class's frame as `df`. Returns
+        (True, result) or (False, error message); never blocks longer than
+        the timeout.
+        """
+        deadline = time.monotonic() + self.timeout
+        segment = self.publish(key, presence)
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            return False, f"no free worker within {self.timeout:g}s"
+
+        try:
+            if not worker.ready:
+                # A fresh worker reports once its imports are done
+                if not worker.conn.poll(max(deadline - time.monotonic(), 0)):
+                    return False, "the code sandbox is still starting, please try again"
+                worker.ready = sandbox_worker.is_ready(worker.conn.recv_bytes())
+            worker.conn.send((segment, code, self.cpu_seconds, self.max_result_bytes))
+            if not worker.conn.poll(max(deadline - time.monotonic(), 0)):
+                logger.warning("Generated code timed out after %gs: %s", self.timeout, code)
+                worker = self._replace(worker)
+                return False, f"timed out after {self.timeout:g}s"
+            reply = worker.conn.recv_bytes(self.max_result_bytes + 1)
+        except (EOFError, OSError):
+            logger.warning("Sandbox worker exited while running: %s", code)
+            worker = self._replace(worker)
+            return False, "the code used too much memory or crashed the worker"
+        finally:
+            self._idle.put(worker)
+
+        return sandbox_worker.decode_reply(reply)
+
+    def _replace(self, worker):
+        # Killing is immediate; the new worker does its imports in the background
+        worker.kill()
+        return _Worker(self._ctx, self.memory_mb)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+        with self._lock:
+            for shm in self._segments.values():
+                shm.close()
+                shm.unlink()
+            self._segments.clear()
+
+
+@st.cache_resource
+def get_sandbox():
+    sandbox = CodeSandbox()
+    atexit.register(sandbox.close)
+    return sandbox
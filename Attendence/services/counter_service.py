@@ -0,0 +1,77 @@
+# Attendence/services/counter_service.py
+"""
+Per-(class, date) attendance counters.
+
+The `attendance_daily_counts` table is kept current by a trigger on
+`attendance` (sql/attendance_daily_counts.sql), so reading a day's count is a
+single-row lookup. A short-lived mirror absorbs repeated reads during the
+check-in burst; it is versioned per class, so with a shared cache backend a
+submission in one replica invalidates that class's counts in all of them.
+"""
+from Attendence.core.cache import VersionedCache
+from Attendence.core.clients import create_supabase_client
+from Attendence.core.logger import get_logger
+from Attendence.core.metrics import instrument
+from Attendence.core.utils import current_ist_date
+
+logger = get_logger(__name__)
+
+MIRROR_TTL_SECONDS = 5
+
+_mirror = VersionedCache(name="daily_counts", maxsize=256, ttl=MIRROR_TTL_SECONDS)
+
+def get_daily_count(class_name, date=None, supabase=None):
+    """Returns the number of attendance marks for a class on a date."""
+    return get_daily_counts([class_name], date, supabase)[class_name]
+
+@instrument()
+def get_daily_counts(class_names, date=None, supabase=None):
+    """
+    Batch form of get_daily_count for the admin panel.
+    Returns {class_name: count}, with 0 for classes without a counter row.
+    """
+    if not date:
+        date = current_ist_date()
+
+    counts = {}
+    missing = {}
+    for class_name in class_names:
+        cached = _mirror.get(class_name, date)
+        if cached is None:
+            missing[class_name] = _mirror.generation(class_name)
+        else:
+            counts[class_name] = cached
+
+    if not missing:
+        return counts
+
+    if not supabase:
+        supabase = create_supabase_client()
+    try:
+        response = supabase.table("attendance_daily_counts").select("class_name", "count").in_("class_name", list(missing)).eq("date", date).execute()
+        fetched = {row["class_name"]: row["count"] for row in response.data or []}
+    except Exception:
+        logger.exception("Failed to fetch daily counts")
+        raise
+
+    for class_name, generation in missing.items():
+        counts[class_name] = fetched.get(class_name, 0)
+        # Skipped if a submission bumped the class while we were reading
+        _mirror.put(class_name, counts[class_name], date, generation)
+    return counts
+
+def record_submission(class_name, date):
+    """
+    Invalidates the class's mirrored counts after a successful insert. The
+    database counter is already updated by the trigger, so the next read is
+    a single-row lookup; bumping the version (rather than incrementing in
+    place) keeps other replicas coherent too.
+    """
+    _mirror.bump(class_name)
+
+def invalidate(class_name=None):
+    """Drops mirrored counts for one class, or all classes."""
+    if class_name is None:
+        _mirror.clear()
+    else:
+        _mirror.bump(class_name)
@@ -1,16 +1,20 @@
 # Attendence/services/github_service.py
-from github import GithubException
 from Attendence.core.clients import create_github_repo
 from Attendence.core.logger import get_logger
+from Attendence.core.metrics import instrument
 from Attendence.core.utils import current_ist_date
 
 logger = get_logger(__name__)
 
+@instrument()
 def push_attendance_matrix(class_name, csv_content):
     """
     Pushes the attendance matrix CSV to the configured GitHub repo.
     Returns: (success: bool, message: str)
     """
+    # PyGithub is only loaded when a push is requested
+    from github import GithubException
+
     try:
         gh, repo = create_github_repo()
         if not repo:
@@ -0,0 +1,240 @@
+# Attendence/services/intent_router.py
+"""
+Rule-based answers for the chatbot's most common questions.
+
+Questions arrive with relative dates already resolved to YYYY-MM-DD and are
+normalized like the answer cache keys (lower case, single spaces, no trailing
+punctuation). Each intent is a precompiled pattern whose handler answers from
+the class's PresenceMatrix statistics, computed once per data version. The
+top questions (the ones in Prompts/few_shot_prompt.txt) are answered in well
+under 10 ms without an LLM call. A question no pattern matches gets None
+back and goes to the LLM.
+"""
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any
+
+import numpy as np
+
+from Attendence.services.answer_cache import normalize_question
+
+DATE = r"(\d{4}-\d{2}-\d{2})"
+NUMBER = r"(\d+(?:\.\d+)?)"
+WHO = r"(?:who|which students|list(?: all)?(?: the)? students(?: who)?|show(?: me)?(?: the)? students(?: who)?)"
+
+_INTENTS = []
+
+
+@dataclass(frozen=True)
+class RoutedAnswer:
+    intent: str
+    result: Any
+    answer: str
+
+
+def intent(name, *patterns):
+    """Registers a handler for questions fully matching any of `patterns`."""
+    compiled = [re.compile(pattern) for pattern in patterns]
+
+    def register(handler):
+        _INTENTS.extend((name, pattern, handler) for pattern in compiled)
+        return handler
+    return register
+
+def _join(names):
+    return ", ".join(names) if names else "nobody"
+
+
+class IntentRouter:
+    """Answers matching questions about one class at one data version."""
+
+    def __init__(self, presence):
+        self.presence = presence
+
+    # --- Statistics (computed once per router) ---
+    @cached_property
+    def counts(self):
+        return self.presence.student_counts()
+
+    @cached_property
+    def percentages(self):
+        return self.presence.student_percentages()
+
+    @cached_property
+    def names(self):
+        return [str(name) for name in self.presence.names]
+
+    @cached_property
+    def by_name(self):
+        return {name.casefold(): i for i, name in enumerate(self.names)}
+
+    def names_where(self, mask):
+        return [self.names[i] for i in np.flatnonzero(mask)]
+
+    def route(self, question):
+        """Returns a RoutedAnswer, or None if no intent matches."""
+        question = normalize_question(question)
+        for name, pattern, handler in _INTENTS:
+            match = pattern.fullmatch(question)
+            if match:
+                answered = handler(self, *match.groups())
+                if answered is not None:
+                    return RoutedAnswer(name, *answered)
+        return None
+
+
+# --- Intents ---
+# Handlers return (result, answer text), or None to fall through to the LLM.
+@intent(
+    "student_count",
+    r"(?:how many|number of|total(?: number of)?|count(?: of)?(?: the)?) students"
+    r"(?: are there| are in (?:the|this) class| in (?:the|this) class| do we have| enrolled)?",
+    r"what is the (?:total )?number of students(?: in (?:the|this) class)?",
+)
+def _student_count(router):
+    n = router.presence.n_students
+    return n, f"There are {n} students in this class."
+
+@intent(
+    "class_count",
+    r"(?:what is the )?total number of (?:classes|class days|lectures|sessions)",
+    r"how many (?:classes|class days|lectures|sessions)(?: (?:were|have been) (?:held|conducted|taken))?(?: so far)?(?: are there)?",
+)
+def _class_count(router):
+    n = router.presence.n_dates
+    return n, f"{n} classes have been held."
+
+@intent("present_on", rf"{WHO}(?: was| were)? present on {DATE}")
+def _present_on(router, date):
+    column = router.presence.date_index(date)
+    if column is None:
+        return None
+    names = router.names_where(router.presence.present_on(column))
+    return names, f"{len(names)} students were present on {date}: {_join(names)}."
+
+@intent("absent_on", rf"{WHO}(?: was| were)? absent on {DATE}")
+def _absent_on(router, date):
+    column = router.presence.date_index(date)
+    if column is None:
+        return None
+    names = router.names_where(~router.presence.present_on(column))
+    return names, f"{len(names)} students were absent on {date}: {_join(names)}."
+
+@intent(
+    "count_present_on",
+    rf"(?:count )?how many students (?:were|was) present on {DATE}",
+    rf"(?:count|number) of students present on {DATE}",
+)
+def _count_present_on(router, date):
+    column = router.presence.date_index(date)
+    if column is None:
+        return None
+    n = int(router.presence.date_counts()[column])
+    return n, f"{n} of {router.presence.n_students} students were present on {date}."
+
+@intent(
+    "count_absent_on",
+    rf"(?:count )?how many students (?:were|was) (?:distinctively )?absent on {DATE}",
+    rf"(?:count|number) of students absent on {DATE}",
+)
+def _count_absent_on(router, date):
+    column = router.presence.date_index(date)
+    if column is None:
+        return None
+    n = router.presence.n_students - int(router.presence.date_counts()[column])
+    return n, f"{n} of {router.presence.n_students} students were absent on {date}."
+
+@intent(
+    "student_percentage",
+    r"what(?: is|'s) (?:the )?attendance (?:percentage|%) of (.+)",
+    r"what(?: is|'s) (.+?)(?:'s|') attendance(?: percentage| %)?",
+    r"attendance (?:percentage|%) of (.+)",
+)
+def _student_percentage(router, name):
+    i = router.by_name.get(name.strip().casefold())
+    if i is None:
+        return None
+    pct = float(router.percentages[i])
+    return pct, (
+        f"{router.names[i]} has {pct:.2f}% attendance "
+        f"({int(router.counts[i])} of {router.presence.n_dates} classes)."
+    )
+
+@intent(
+    "perfect_attendance",
+    rf"{WHO}(?: (?:has|have|with))? (?:100 ?%|full|perfect) attendance",
+    r"students with (?:100 ?%|full|perfect) attendance",
+)
+def _perfect_attendance(router):
+    names = router.names_where(router.counts == router.presence.n_dates)
+    return names, f"{len(names)} students have 100% attendance: {_join(names)}."
+
+@intent("below_threshold", rf"{WHO}(?: (?:has|have|is|are|with))? (?:less than|below|under) {NUMBER} ?%(?: attendance)?")
+def _below_threshold(router, threshold):
+    names = router.names_where(router.percentages < float(threshold))
+    return names, f"{len(names)} students are below {threshold}% attendance: {_join(names)}."
+
+@intent("above_threshold", rf"{WHO}(?: (?:has|have|is|are|with))? (?:more than|above|over) {NUMBER} ?%(?: attendance)?")
+def _above_threshold(router, threshold):
+    names = router.names_where(router.percentages > float(threshold))
+    return names, f"{len(names)} students are above {threshold}% attendance: {_join(names)}."
+
+@intent("top_students", r"(?:who are )?(?:the )?top (\d+) students(?: by attendance)?")
+def _top_students(router, n):
+    order = np.argsort(-router.percentages, kind="stable")[:int(n)]
+    names = [router.names[i] for i in order]
+    return names, f"Top {len(names)} students by attendance: {_join(names)}."
+
+@intent("bottom_students", r"(?:who are )?(?:the )?bottom (\d+) students(?: by attendance)?")
+def _bottom_students(router, n):
+    order = np.argsort(router.percentages, kind="stable")[:int(n)]
+    names = [router.names[i] for i in order]
+    return names, f"Bottom {len(names)} students by attendance: {_join(names)}."
+
+@intent("best_date", r"which (?:date|day) had the (?:highest|most|best) attendance")
+def _best_date(router):
+    counts = router.presence.date_counts()
+    column = int(counts.argmax())
+    date = str(router.presence.dates[column])
+    return date, f"{date} had the highest attendance ({int(counts[column])} students present)."
+
+@intent("worst_date", r"which (?:date|day) had the (?:lowest|least|worst) attendance")
+def _worst_date(router):
+    counts = router.presence.date_counts()
+    column = int(counts.argmin())
+    date = str(router.presence.dates[column])
+    return date, f"{date} had the lowest attendance ({int(counts[column])} students present)."
+
+@intent(
+    "class_average",
+    r"what is the (?:average|overall|mean) attendance(?: of the (?:whole )?class)?",
+    r"(?:class|overall) average attendance",
+)
+def _class_average(router):
+    presence = router.presence
+    cells = presence.n_students * presence.n_dates
+    pct = presence.total_present() * 100.0 / cells if cells else 0.0
+    return pct, f"The class's average attendance is {pct:.2f}%."
+
+@intent(
+    "roll_record",
+    r"(?:show(?: me)? )?the record of roll(?: number| no)? (\d+)",
+    r"(?:record|details) (?:of|for) roll(?: number| no)? (\d+)",
+)
+def _roll_record(router, roll_number):
+    rows = np.flatnonzero(router.presence.roll_numbers == int(roll_number))
+    if not len(rows):
+        return None
+    i = int(rows[0])
+    record = {
+        "roll_number": int(roll_number),
+        "name": router.names[i],
+        "present": int(router.counts[i]),
+        "classes": router.presence.n_dates,
+        "attendance_pct": round(float(router.percentages[i]), 2),
+    }
+    return record, (
+        f"Roll {roll_number} ({record['name']}) was present for {record['present']} of "
+        f"{record['classes']} classes ({record['attendance_pct']:.2f}%)."
+    )
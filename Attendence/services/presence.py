@@ -0,0 +1,181 @@
+# Attendence/services/presence.py
+"""
+Compact presence representation for attendance statistics.
+
+A class is stored as a bit-packed uint8 array (one bit per student per date)
+alongside roster and date index arrays. Counts, percentages, streaks and range
+filters are computed with NumPy instead of Python loops over "P"/"A" strings;
+the P/A display frame is only materialised when a view asks for it.
+"""
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+# Number of set bits in every possible byte, for counting on packed rows
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class PresenceMatrix:
+    """
+    `roll_numbers`, `names`: per-student arrays (matrix row order).
+    `dates`: sorted date strings (matrix column order).
+    `bits`: np.packbits(present, axis=1), shape (students, ceil(dates / 8)).
+    """
+
+    def __init__(self, roll_numbers, names, dates, bits):
+        self.roll_numbers = np.asarray(roll_numbers)
+        self.names = np.asarray(names, dtype=object)
+        self.dates = np.asarray(dates, dtype=object)
+        self.bits = bits
+
+    # --- Construction ---
+    @classmethod
+    def from_bool(cls, roll_numbers, names, dates, present):
+        return cls(roll_numbers, names, dates, np.packbits(np.asarray(present, dtype=bool), axis=1))
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Builds the matrix straight from long records (roll_number, name, date),
+        one row per (roll_number, name) sorted by roll number. Rows whose roll
+        number is not numeric are dropped.
+        """
+        rolls = pd.to_numeric(records["roll_number"], errors="coerce")
+        valid = rolls.notna().to_numpy()
+        rolls = rolls.to_numpy()[valid].astype(np.int64)
+        names = records["name"].fillna("").astype(str).to_numpy()[valid]
+        date_codes, dates = pd.factorize(records["date"].to_numpy()[valid], sort=True)
+
+        # One student per (roll, name) pair; sorted codes give roll-then-name order
+        roll_codes, roll_values = pd.factorize(rolls, sort=True)
+        name_codes, name_values = pd.factorize(names, sort=True)
+        stride = max(len(name_values), 1)
+        pairs, student_codes = np.unique(roll_codes.astype(np.int64) * stride + name_codes, return_inverse=True)
+        student_rolls = roll_values[pairs // stride]
+        student_names = np.asarray(name_values, dtype=object)[pairs % stride]
+
+        present = np.zeros((len(pairs), len(dates)), dtype=bool)
+        present[student_codes, date_codes] = True
+        return cls.from_bool(student_rolls, student_names, dates, present)
+
+    # --- Shape ---
+    @property
+    def n_students(self):
+        return len(self.roll_numbers)
+
+    @property
+    def n_dates(self):
+        return len(self.dates)
+
+    @cached_property
+    def present(self):
+        """Unpacked (students x dates) boolean array. Read-only."""
+        present = np.unpackbits(self.bits, axis=1, count=self.n_dates).astype(bool)
+        present.flags.writeable = False
+        return present
+
+    # --- Statistics ---
+    def student_counts(self):
+        """Days present per student."""
+        return _POPCOUNT[self.bits].sum(axis=1, dtype=np.int64)
+
+    def date_counts(self):
+        """Students present per date."""
+        return self.present.sum(axis=0, dtype=np.int64)
+
+    def student_percentages(self):
+        if not self.n_dates:
+            return np.zeros(self.n_students)
+        return self.student_counts() * 100.0 / self.n_dates
+
+    def date_percentages(self):
+        if not self.n_students:
+            return np.zeros(self.n_dates)
+        return self.date_counts() * 100.0 / self.n_students
+
+    def total_present(self):
+        return int(_POPCOUNT[self.bits].sum(dtype=np.int64))
+
+    def total_absent(self):
+        return self.n_students * self.n_dates - self.total_present()
+
+    def longest_streaks(self, present=True):
+        """Longest run of consecutive present (or absent) dates per student."""
+        marks = self.present if present else ~self.present
+        padded = np.zeros((self.n_students, self.n_dates + 2), dtype=np.int8)
+        padded[:, 1:-1] = marks
+        edges = np.diff(padded, axis=1)
+        start_rows, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+        streaks = np.zeros(self.n_students, dtype=np.int64)
+        np.maximum.at(streaks, start_rows, ends - starts)
+        return streaks
+
+    def current_streaks(self, present=True):
+        """Run of present (or absent) dates ending at the latest date, per student."""
+        marks = self.present if present else ~self.present
+        breaks = ~marks[:, ::-1]
+        return np.where(breaks.any(axis=1), breaks.argmax(axis=1), self.n_dates)
+
+    def present_on(self, column):
+        """Boolean mask of students present at date position `column`, read from the packed bits."""
+        return (self.bits[:, column // 8] >> (7 - column % 8)) & 1 == 1
+
+    def students_in_range(self, low, high):
+        """
+        Boolean mask of students whose attendance %, rounded to 2 decimals as
+        in summary_frame(), lies in [low, high].
+        """
+        pct = self.student_percentages().round(2)
+        return (pct >= low) & (pct <= high)
+
+    def search(self, query):
+        """Row indices of students whose roll number equals `query` or whose name contains it (any case)."""
+        query = str(query).strip().lower()
+        if not query:
+            return np.arange(self.n_students)
+        mask = np.char.find(self._names_lower, query) >= 0
+        if query.isdigit():
+            mask |= self.roll_numbers == int(query)
+        return np.flatnonzero(mask)
+
+    @cached_property
+    def _names_lower(self):
+        return np.char.lower(self.names.astype(str))
+
+    def date_index(self, date):
+        """Column position of a date, or None."""
+        pos = np.searchsorted(self.dates, date)
+        return int(pos) if pos < self.n_dates and self.dates[pos] == date else None
+
+    # --- Views ---
+    def summary_frame(self):
+        """roll_number, name, Present_Count and Attendance % per student."""
+        return pd.DataFrame({
+            "roll_number": self.roll_numbers,
+            "name": self.names,
+            "Present_Count": self.student_counts(),
+            "Attendance %": self.student_percentages().round(2),
+        })
+
+    def window_frame(self, rows, start, stop):
+        """
+        Display frame for the students at `rows` and dates [start, stop) only.
+        Unpacks just the bytes covering those dates, so the cost follows the
+        window size rather than the class size.
+        """
+        first_byte = start // 8
+        chunk = np.unpackbits(self.bits[rows, first_byte:(stop + 7) // 8], axis=1)
+        present = chunk[:, start - first_byte * 8:stop - first_byte * 8].astype(bool)
+        marks = pd.DataFrame(np.where(present, "P", "A"), columns=list(self.dates[start:stop]))
+        marks.insert(0, "name", self.names[rows])
+        marks.insert(0, "roll_number", self.roll_numbers[rows])
+        return marks
+
+    def to_display_frame(self):
+        """Wide roll_number, name, then one "P"/"A" column per date."""
+        marks = pd.DataFrame(np.where(self.present, "P", "A"), columns=list(self.dates))
+        marks.insert(0, "name", self.names)
+        marks.insert(0, "roll_number", self.roll_numbers)
+        return marks
@@ -0,0 +1,111 @@
+# Attendence/services/result_formatter.py
+"""
+Local, typed formatting of chatbot results into markdown answers.
+
+The generated pandas code returns plain values: counts, percentages, yes/no,
+lists of names, Series, small DataFrames or a record dict. Turning those into
+a sentence does not need a second LLM round trip. `format_result` dispatches
+on the result type and returns markdown, or None for results it cannot
+present well, which the chatbot then hands to the LLM summarizer (if enabled).
+"""
+import numbers
+from functools import singledispatch
+
+import numpy as np
+import pandas as pd
+
+MAX_ITEMS = 50
+MAX_ROWS = 20
+MAX_COLUMNS = 8
+INLINE_ITEMS = 15
+
+
+def _is_percentage(question):
+    question = question.lower()
+    return "%" in question or "percent" in question
+
+def _cell(value):
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+def _markdown_table(frame):
+    """Markdown table of the first MAX_ROWS rows, with a note if truncated."""
+    shown = frame.head(MAX_ROWS)
+    columns = [str(c) for c in shown.columns]
+    lines = [
+        "| " + " | ".join(_cell(c) for c in columns) + " |",
+        "|" + "---|" * len(columns),
+    ]
+    lines += ["| " + " | ".join(_cell(v) for v in row) + " |" for row in shown.itertuples(index=False)]
+    if len(frame) > MAX_ROWS:
+        lines.append(f"\n_Showing {MAX_ROWS} of {len(frame)} rows._")
+    return "\n".join(lines)
+
+
+@singledispatch
+def format_result(result, question=""):
+    """Markdown answer for `result`, or None if it needs the LLM summarizer."""
+    return None
+
+@format_result.register
+def _(result: bool, question=""):
+    return "Yes." if result else "No."
+
+@format_result.register
+def _(result: numbers.Integral, question=""):
+    return f"The answer is **{result}**."
+
+@format_result.register
+def _(result: numbers.Real, question=""):
+    if _is_percentage(question):
+        return f"The answer is **{result:.2f}%**."
+    return f"The answer is **{result:,.2f}**."
+
+@format_result.register
+def _(result: str, question=""):
+    return f"The answer is **{result}**."
+
+@format_result.register
+def _(result: np.generic, question=""):
+    # NumPy scalars (np.int64, np.float64, np.bool_) format like Python ones
+    return format_result(result.item(), question)
+
+@format_result.register(list)
+@format_result.register(tuple)
+@format_result.register(set)
+@format_result.register(frozenset)
+@format_result.register(np.ndarray)
+def _(result, question=""):
+    if isinstance(result, np.ndarray):
+        items = result.ravel().tolist()
+    else:
+        items = [item.item() if isinstance(item, np.generic) else item for item in result]
+    if not items:
+        return "No matching records found."
+    if any(isinstance(item, (list, dict, tuple)) for item in items):
+        return None
+    if len(items) <= INLINE_ITEMS:
+        return f"Found **{len(items)}**: {', '.join(str(item) for item in items)}."
+    lines = [f"Found **{len(items)}**:"] + [f"- {item}" for item in items[:MAX_ITEMS]]
+    if len(items) > MAX_ITEMS:
+        lines.append(f"- … and {len(items) - MAX_ITEMS} more")
+    return "\n".join(lines)
+
+@format_result.register
+def _(result: dict, question=""):
+    if not result:
+        return "No matching records found."
+    return "\n".join(f"- **{key}**: {value}" for key, value in result.items())
+
+@format_result.register
+def _(result: pd.Series, question=""):
+    if result.empty:
+        return "No matching records found."
+    return _markdown_table(result.to_frame(result.name or "value").reset_index())
+
+@format_result.register
+def _(result: pd.DataFrame, question=""):
+    if result.empty:
+        return "No matching records found."
+    if len(result.columns) > MAX_COLUMNS:
+        return None
+    return _markdown_table(result)
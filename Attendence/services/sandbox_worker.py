@@ -0,0 +1,248 @@
+# Attendence/services/sandbox_worker.py
+"""
+Worker-process side of code_sandbox.
+
+Imports only NumPy, pandas, PyArrow and the presence matrix so a worker
+starts fast. A worker attaches to a class's shared-memory segment
+(read-only, zero-copy), builds the P/A frame from it once per data version,
+and evaluates generated expressions against a copy-on-write view of that
+frame, so they cannot modify the cached frame for the next question.
+
+This is resource isolation, not a security boundary: the trimmed builtins
+only keep well-behaved one-liners tidy, and code can still reach the OS
+through module attributes (e.g. `pd.io.common.os`). Results go back as JSON
+or Arrow IPC, never pickle, so the server does not execute anything a
+worker sends.
+"""
+import builtins
+import json
+import math
+import os
+import re
+import struct
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import resource
+    import signal
+except ImportError:  # Windows: no per-call CPU or memory limits
+    resource = None
+
+from Attendence.services.presence import PresenceMatrix
+
+HEADER = struct.Struct("<QQ")  # metadata length, offset of the packed bits
+FRAMES_KEPT = 4
+
+# Reply tags: one byte, then the payload
+_READY = b"R"
+_JSON = b"J"
+_FRAME = b"F"
+_SERIES = b"S"
+_ERROR = b"E"
+
+# What generated one-liners need; trimmed for tidiness, not for security
+BUILTINS = {
+    name: getattr(builtins, name)
+    for name in (
+        "abs", "all", "any", "bool", "dict", "enumerate", "filter", "float", "int", "isinstance",
+        "len", "list", "map", "max", "min", "range", "reversed", "round", "set", "sorted", "str",
+        "sum", "tuple", "zip", "True", "False", "None",
+    )
+}
+
+
+def write_segment(shm, presence):
+    """Lays out a PresenceMatrix in `shm`: header, roster/dates as JSON, packed bits."""
+    meta = segment_meta(presence)
+    offset = segment_offset(meta)
+    HEADER.pack_into(shm.buf, 0, len(meta), offset)
+    shm.buf[HEADER.size:HEADER.size + len(meta)] = meta
+    np.ndarray(presence.bits.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)[:] = presence.bits
+
+def segment_meta(presence):
+    return json.dumps([
+        presence.roll_numbers.tolist(), [str(n) for n in presence.names],
+        [str(d) for d in presence.dates], list(presence.bits.shape),
+    ]).encode()
+
+def segment_offset(meta):
+    # Bits start on a 64-byte boundary after the header and metadata
+    return -(-(HEADER.size + len(meta)) // 64) * 64
+
+def _attach(name):
+    shm = shared_memory.SharedMemory(name=name)
+    meta_size, offset = HEADER.unpack_from(shm.buf, 0)
+    rolls, names, dates, shape = json.loads(bytes(shm.buf[HEADER.size:HEADER.size + meta_size]))
+    bits = np.ndarray(tuple(shape), dtype=np.uint8, buffer=shm.buf, offset=offset)
+    bits.flags.writeable = False
+    return shm, PresenceMatrix(rolls, names, dates, bits).to_display_frame()
+
+def _frame(frames, name):
+    if name in frames:
+        frames.move_to_end(name)
+        return frames[name][1]
+    frames[name] = _attach(name)
+    while len(frames) > FRAMES_KEPT:
+        _, (shm, _) = frames.popitem(last=False)
+        shm.close()
+    return frames[name][1]
+
+
+# --- Results ---
+# JSON has no tuples, sets or non-string keys; these one-key objects carry them
+_TUPLE = "__tuple__"
+_SET = "__set__"
+_PAIRS = "__pairs__"
+
+def _to_json(value):
+    """Converts a result to JSON-ready values, tagging what JSON would otherwise narrow."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return _to_json(value.item())
+    if isinstance(value, (list, np.ndarray, pd.Index)):
+        return [_to_json(item) for item in (value.tolist() if not isinstance(value, list) else value)]
+    if isinstance(value, tuple):
+        return {_TUPLE: [_to_json(item) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {_SET: [_to_json(item) for item in value]}
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value) and not (len(value) == 1 and next(iter(value)) in (_TUPLE, _SET, _PAIRS)):
+            return {key: _to_json(item) for key, item in value.items()}
+        return {_PAIRS: [[_to_json(key), _to_json(item)] for key, item in value.items()]}
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return str(value)
+    raise TypeError(f"a result of type {type(value).__name__} cannot be returned")
+
+def _from_json(obj):
+    if len(obj) == 1:
+        (key, value), = obj.items()
+        if key == _TUPLE:
+            return tuple(value)
+        if key == _SET:
+            return {_hashable(item) for item in value}
+        if key == _PAIRS:
+            return {_hashable(k): v for k, v in value}
+    return obj
+
+def _hashable(value):
+    # Set members and dict keys were hashable before encoding; nested sets were frozensets
+    if isinstance(value, set):
+        return frozenset(value)
+    return tuple(value) if isinstance(value, list) else value
+
+def _arrow(frame):
+    try:
+        table = pa.Table.from_pandas(frame, preserve_index=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        # Mixed-type object columns: send them as text
+        table = pa.Table.from_pandas(frame.astype({c: str for c in frame.columns[frame.dtypes == object]}), preserve_index=True)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def encode_result(result):
+    """
+    Tagged bytes for a result: Arrow IPC for DataFrames and Series (index
+    kept), JSON otherwise. Tuples, sets and dicts with non-string keys keep
+    their types; NumPy scalars and arrays come back as Python values and
+    lists, timestamps as strings.
+    """
+    if isinstance(result, pd.DataFrame):
+        return _FRAME + _arrow(result)
+    if isinstance(result, pd.Series):
+        return _SERIES + _arrow(result.to_frame(str(result.name) if result.name is not None else "value"))
+    return _JSON + json.dumps(_to_json(result)).encode()
+
+def decode_reply(data):
+    """(True, result) or (False, error message) from a worker reply."""
+    tag, payload = data[:1], data[1:]
+    if tag == _ERROR:
+        return False, payload.decode()
+    if tag == _JSON:
+        return True, json.loads(payload, object_hook=_from_json)
+    if tag in (_FRAME, _SERIES):
+        frame = pa.ipc.open_stream(pa.py_buffer(payload)).read_all().to_pandas()
+        return True, frame.iloc[:, 0] if tag == _SERIES else frame
+    return False, "unrecognized reply from the worker"
+
+def is_ready(data):
+    return data == _READY
+
+
+# --- Limits ---
+# Handled between bytecodes: a single long C call (e.g. sum(range(10**10)))
+# runs on until the parent's wall-clock timeout kills the worker.
+def _cpu_exceeded(signum, frame):
+    raise TimeoutError("CPU time limit exceeded")
+
+def _apply_memory_limit(memory_mb):
+    """Caps the address space at its current size plus `memory_mb`."""
+    if resource is None or not memory_mb or not os.path.exists("/proc/self/statm"):
+        return
+    with open("/proc/self/statm") as f:
+        current = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    limit = current + memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+
+def _limit_cpu(seconds):
+    """
+    Raises TimeoutError in this process after `seconds` more of CPU time;
+    None lifts the soft limit back to the hard one.
+    """
+    if resource is None:
+        return
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    if seconds:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = math.ceil(usage.ru_utime + usage.ru_stime + seconds)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    else:
+        soft = hard
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def serve(conn, memory_mb):
+    """
+    Worker loop. Signals ready once started; requests are (segment name,
+    code, cpu seconds, max result bytes) and replies are encode_result()
+    bytes or an error tag and message.
+    """
+    pd.set_option("mode.copy_on_write", True)
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _cpu_exceeded)
+    _apply_memory_limit(memory_mb)
+    frames = OrderedDict()
+    conn.send_bytes(_READY)
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        segment, code, cpu_seconds, max_result_bytes = request
+        try:
+            # Frame builds and encoding run without a per-call limit; only eval is charged
+            df = _frame(frames, segment)
+            _limit_cpu(cpu_seconds)
+            try:
+                result = eval(code, {"__builtins__": BUILTINS, "df": df.copy(deep=False), "pd": pd, "np": np, "re": re})
+            finally:
+                _limit_cpu(None)
+            reply = encode_result(result)
+            if len(reply) > max_result_bytes:
+                reply = _ERROR + f"result too large ({len(reply):,} bytes, limit {max_result_bytes:,})".encode()
+        except MemoryError:
+            reply = _ERROR + b"memory limit exceeded"
+        except Exception as e:
+            reply = _ERROR + str(e).encode()
+        conn.send_bytes(reply)
@@ -0,0 +1,290 @@
+# Attendence/services/submission_queue.py
+"""
+Write-behind queue for attendance submissions.
+
+Validated submissions are journaled to a local SQLite file (under `records/`
+by default) and acknowledged immediately. A background thread bulk-inserts
+them into the `attendance` table in batches of `batch_size` rows or every
+`flush_interval_ms`, whichever comes first. Rows are deduplicated on
+(class_name, roll_number, date) both in the journal and on insert, so a retry
+after a partial failure never double-marks a student.
+
+While the backend is unreachable nothing is given up: the flusher keeps
+retrying with a capped backoff. When a batch fails but the backend answers,
+the batch is split until the offending rows are isolated, so the rest still
+go through; a row that fails on its own `max_attempts` times is moved to the
+`failed` table, which `contains()` and `pending_count()` ignore and the
+Diagnostics tab shows.
+"""
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from Attendence.core.clients import create_supabase_client
+from Attendence.core.logger import get_logger
+from Attendence.core.metrics import instrument
+
+logger = get_logger(__name__)
+
+DEFAULT_JOURNAL_PATH = os.path.join("records", "submission_queue.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    class_name TEXT NOT NULL,
+    roll_number INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    UNIQUE (class_name, roll_number, date)
+);
+CREATE TABLE IF NOT EXISTS failed (
+    id INTEGER PRIMARY KEY,
+    class_name TEXT NOT NULL,
+    roll_number INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    failed_at REAL NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class SubmissionReceipt:
+    id: int
+    class_name: str
+    roll_number: int
+    date: str
+    duplicate: bool = False
+
+
+class SubmissionQueue:
+    """
+    Durable write-behind queue. Call `start()` to run the background flusher,
+    or `flush()` to drain synchronously.
+
+    `on_flushed(rows)` runs for inserted rows before they leave the journal,
+    both under `commit_lock`; pass the lock that guards admission checks
+    reading pending_count() so they never see a row in neither place.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, supabase=None, batch_size=50,
+                 flush_interval_ms=250, max_attempts=5, on_flushed=None, commit_lock=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_attempts = max_attempts
+        self.on_flushed = on_flushed
+        self.last_error = None
+        self._supabase = supabase
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._commit_lock = commit_lock or threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._outage = False
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # One shared connection guarded by _lock; WAL keeps appends cheap and
+        # survives an app crash (synchronous=NORMAL).
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    # --- Producer side ---
+    def enqueue(self, class_name, roll_number, name, date):
+        """Journals a submission and returns a receipt without touching the network."""
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO pending (class_name, roll_number, name, date, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+                (class_name, roll_number, name, date, time.time()),
+            )
+            duplicate = cur.rowcount == 0
+            if duplicate:
+                row_id = self._conn.execute(
+                    "SELECT id FROM pending WHERE class_name = ? AND roll_number = ? AND date = ?",
+                    (class_name, roll_number, date),
+                ).fetchone()[0]
+            else:
+                row_id = cur.lastrowid
+            pending = self._pending_count_locked()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+        return SubmissionReceipt(row_id, class_name, roll_number, date, duplicate)
+
+    def contains(self, class_name, roll_number, date):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM pending WHERE class_name = ? AND roll_number = ? AND date = ?",
+                (class_name, roll_number, date),
+            ).fetchone() is not None
+
+    def pending_count(self, class_name=None, date=None):
+        with self._lock:
+            if class_name is None:
+                return self._pending_count_locked()
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM pending WHERE class_name = ? AND date = ?",
+                (class_name, date),
+            ).fetchone()[0]
+
+    def _pending_count_locked(self):
+        return self._conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def failed_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM failed").fetchone()[0]
+
+    def failed_rows(self, limit=100):
+        """Most recently dead-lettered submissions, newest first."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT class_name, roll_number, name, date, attempts, last_error, failed_at "
+                "FROM failed ORDER BY failed_at DESC LIMIT ?",
+                (limit,),
+            )
+            columns = [c[0] for c in cur.description]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    # --- Consumer side ---
+    @instrument()
+    def flush(self):
+        """Drains the journal batch by batch. Returns the number of rows inserted."""
+        inserted = 0
+        with self._flush_lock:
+            while True:
+                batch, written = self._flush_batch()
+                inserted += written
+                if len(batch) < self.batch_size:
+                    return inserted
+
+    def _flush_batch(self):
+        with self._lock:
+            batch = self._conn.execute(
+                "SELECT id, class_name, roll_number, name, date FROM pending ORDER BY id LIMIT ?",
+                (self.batch_size,),
+            ).fetchall()
+        if not batch:
+            return batch, 0
+
+        supabase = self._supabase or create_supabase_client()
+        try:
+            written = self._upsert(supabase, batch)
+        except Exception as e:
+            self.last_error = e
+            if not self._reachable(supabase):
+                # Backend down: keep every row and let _run back off
+                logger.warning(f"Backend unreachable; {len(batch)} queued submissions will be retried: {e}",
+                               extra={"rate_limit": 60, "log_key": "submission_queue.outage"})
+                return [], 0
+            logger.exception(f"Failed to flush {len(batch)} queued submissions; isolating bad rows")
+            self._outage = False
+            written = self._write_split(supabase, batch)
+            if self._outage:
+                # The backend went away mid-split; stop draining until _run retries
+                batch = []
+        else:
+            self.last_error = None
+            self._commit(batch, written)
+        return batch, len(written)
+
+    def _commit(self, batch, written):
+        """Applies on_flushed for the inserted rows, then drops the batch from the journal."""
+        with self._commit_lock:
+            if self.on_flushed and written:
+                try:
+                    self.on_flushed(written)
+                except Exception:
+                    logger.exception("on_flushed callback failed")
+            with self._lock:
+                self._conn.executemany("DELETE FROM pending WHERE id = ?", [(row[0],) for row in batch])
+
+    def _upsert(self, supabase, batch):
+        rows = [
+            {"class_name": c, "roll_number": r, "name": n, "date": d}
+            for _, c, r, n, d in batch
+        ]
+        response = supabase.table("attendance").upsert(
+            rows, on_conflict="class_name,roll_number,date", ignore_duplicates=True
+        ).execute()
+        return response.data or []
+
+    def _reachable(self, supabase):
+        try:
+            supabase.table("attendance").select("id").limit(1).execute()
+            return True
+        except Exception:
+            return False
+
+    def _write_split(self, supabase, batch):
+        """Writes `batch` in halves until failing rows are isolated; returns the rows written."""
+        try:
+            written = self._upsert(supabase, batch)
+        except Exception as e:
+            if self._outage or not self._reachable(supabase):
+                self._outage = True
+                return []
+            if len(batch) > 1:
+                mid = len(batch) // 2
+                return self._write_split(supabase, batch[:mid]) + self._write_split(supabase, batch[mid:])
+            self._record_failure(batch[0][0], e)
+            return []
+        self._commit(batch, written)
+        return written
+
+    def _record_failure(self, row_id, error):
+        """Counts a failed attempt for one row; moves it to `failed` once it has used max_attempts."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pending SET attempts = attempts + 1, last_error = ? WHERE id = ?", (str(error), row_id)
+            )
+            moved = self._conn.execute(
+                "INSERT INTO failed (id, class_name, roll_number, name, date, enqueued_at, attempts, last_error, failed_at) "
+                "SELECT id, class_name, roll_number, name, date, enqueued_at, attempts, last_error, ? "
+                "FROM pending WHERE id = ? AND attempts >= ?",
+                (time.time(), row_id, self.max_attempts),
+            ).rowcount
+            if moved:
+                self._conn.execute("DELETE FROM pending WHERE id = ?", (row_id,))
+        if moved:
+            logger.error(f"Gave up on queued submission {row_id} after {self.max_attempts} attempts: {error}")
+
+    def _run(self):
+        backoff = self.flush_interval
+        while not self._stopping.is_set():
+            self._wakeup.wait(backoff)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                # Back off while the backend is failing, reset once it recovers
+                backoff = min(backoff * 2, 30.0) if self.last_error else self.flush_interval
+            except Exception:
+                logger.exception("Submission flusher crashed; retrying")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="submission-flusher", daemon=True)
+            self._thread.start()
+            # Flush rows journaled before a crash or restart right away
+            self._wakeup.set()
+        return self
+
+    def close(self, drain=True):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+        if drain:
+            self.flush()
+        self._conn.close()
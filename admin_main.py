@@ -3,6 +3,7 @@ import streamlit as st
 from Attendence.components.admin_ui import show_admin_panel
 from Attendence.components.analytics_ui import show_analytics_panel
 from Attendence.components.chatbot_ui import show_chatbot_panel
+from Attendence.components.diagnostics_ui import show_diagnostics_panel
 
 st.set_page_config(
     page_title="Admin Dashboard",
@@ -22,7 +23,7 @@ st.markdown(
 if "admin_logged_in" not in st.session_state:
     st.session_state.admin_logged_in = False
 
-admin_tab, analytics_tab , chatbot_tab = st.tabs(["🧑‍🏫 Admin Panel", "📊 Analytics", "🤖 Chatbot"])
+admin_tab, analytics_tab , chatbot_tab, diagnostics_tab = st.tabs(["🧑‍🏫 Admin Panel", "📊 Analytics", "🤖 Chatbot", "🩺 Diagnostics"])
 
 with admin_tab:
     show_admin_panel()
@@ -38,3 +39,9 @@ with chatbot_tab:
         show_chatbot_panel()
     else:
         st.info("🔒 Please login in the 'Admin Panel' tab to use the Chatbot.")
+
+with diagnostics_tab:
+    if st.session_state.admin_logged_in:
+        show_diagnostics_panel()
+    else:
+        st.info("🔒 Please login in the 'Admin Panel' tab to view Diagnostics.")
@@ -0,0 +1,226 @@
+# benchmarks/bench_checkin_load.py
+"""
+Check-in load test of the student submission flow, against the in-memory
+Supabase stand-in with an injected per-request latency.
+
+N students spread over M open classes walk the service calls the student form
+makes (open classes, class settings, warm index, roll map, atomic submit) on a
+pool of worker threads. Then `student_main.py` is driven end to end for a
+number of sessions with streamlit.testing.AppTest. Reports throughput and
+p50/p95/p99 latency per call and writes a JSON report; pass --compare with an
+earlier report to see p95 regressions.
+
+    python -m benchmarks.bench_checkin_load --students 500 --classes 4 --latency-ms 20 \
+        --output checkin_load.json [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Every service and the AppTest script resolve the client through this
+os.environ["SUPABASE_URL"] = "memory://"
+
+from Attendence.core.clients import create_supabase_client
+from Attendence.core.utils import current_ist_date
+from Attendence.services import attendance_service, class_index, class_service
+from Attendence.services.class_registry import get_class_registry
+
+CODE = "4242"
+STUDENT_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "student_main.py")
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def time(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.samples[name].append(elapsed)
+
+    def summary(self):
+        stats = {}
+        for name, samples in self.samples.items():
+            ms = np.asarray(samples) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            stats[name] = {
+                "calls": len(ms),
+                "mean_ms": round(float(ms.mean()), 3),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(ms.max()), 3),
+            }
+        return stats
+
+
+def setup_classes(classes, daily_limit):
+    names = [f"Class {i + 1}" for i in range(classes)]
+    for name in names:
+        class_service.create_class(name, code=CODE, daily_limit=daily_limit)
+        class_service.update_class_status(name, True)
+    return names
+
+
+def check_in(recorder, class_name, roll_number, date):
+    """The service calls show_student_panel makes for one submission."""
+    with recorder.time("check_in_total"):
+        with recorder.time("get_open_classes"):
+            class_service.get_open_classes()
+        with recorder.time("class_settings"):
+            get_class_registry().get(class_name)
+        with recorder.time("class_index.ensure_warm"):
+            class_index.ensure_warm(class_name)
+        with recorder.time("fetch_roll_map"):
+            locked_name = attendance_service.fetch_roll_map(class_name, roll_number)
+        with recorder.time("submit_attendance_atomic"):
+            return attendance_service.submit_attendance_atomic(
+                class_name, roll_number, locked_name or f"Student {roll_number}", CODE, date
+            )
+
+
+def run_services(class_names, students, concurrency, date):
+    recorder = LatencyRecorder()
+    client = create_supabase_client()
+    requests_before = client.requests
+    jobs = [(class_names[i % len(class_names)], i + 1) for i in range(students)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(lambda job: check_in(recorder, job[0], job[1], date), jobs))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "students": students,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "checkins_per_minute": round(students / elapsed * 60, 1),
+        "requests": client.requests - requests_before,
+        "outcomes": dict(Counter(o.value for o in outcomes)),
+        "calls": recorder.summary(),
+    }
+
+
+def _by_label(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def run_apptest(class_names, sessions, first_roll):
+    """Loads the student portal and submits once per session, like a browser would."""
+    from streamlit.testing.v1 import AppTest
+
+    recorder = LatencyRecorder()
+    succeeded = exceptions = failed_sessions = 0
+    start = time.perf_counter()
+    for i in range(sessions):
+        roll_number = first_roll + i
+        # Each run re-executes the script; count its exceptions before the next run replaces them
+        run_exceptions = []
+        try:
+            with recorder.time("apptest.load"):
+                at = AppTest.from_file(STUDENT_APP, default_timeout=30)
+                run_exceptions.append(len(at.run().exception))
+            with recorder.time("apptest.fill_form"):
+                run_exceptions.append(len(_by_label(at.selectbox, "Select Your Class").select(class_names[i % len(class_names)]).run().exception))
+                run_exceptions.append(len(_by_label(at.text_input, "Roll Number").input(str(roll_number)).run().exception))
+                _by_label(at.text_input, "Name (Will be locked after first time)").input(f"Student {roll_number}")
+                run_exceptions.append(len(_by_label(at.text_input, "Attendance Code").input(CODE).run().exception))
+            with recorder.time("apptest.submit"):
+                run_exceptions.append(len(_by_label(at.button, "✅ Submit Attendance").click().run().exception))
+        except StopIteration:
+            # A widget the session needs never rendered (usually after an exception)
+            failed_sessions += 1
+            exceptions += sum(run_exceptions)
+            continue
+        session_exceptions = sum(run_exceptions)
+        exceptions += session_exceptions
+        if session_exceptions:
+            failed_sessions += 1
+        if any("submitted successfully" in s.value for s in at.success):
+            succeeded += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "sessions": sessions,
+        "succeeded": succeeded,
+        "exceptions": exceptions,
+        "failed_sessions": failed_sessions,
+        "seconds": round(elapsed, 3),
+        "calls": recorder.summary(),
+    }
+
+
+def print_calls(title, calls, baseline=None):
+    print(title)
+    print(f"  {'call':<28} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}" + (f" {'p95 vs base':>12}" if baseline else ""))
+    for name, s in calls.items():
+        line = f"  {name:<28} {s['calls']:>6} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f}"
+        base = (baseline or {}).get(name)
+        if base and base["p95_ms"]:
+            line += f" {(s['p95_ms'] / base['p95_ms'] - 1) * 100:>+11.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--classes", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent students (worker threads)")
+    parser.add_argument("--apptest-sessions", type=int, default=20, help="0 skips the AppTest phase")
+    parser.add_argument("--output", default="checkin_load.json", help="JSON report path")
+    parser.add_argument("--compare", help="earlier JSON report to compare p95 latencies against")
+    args = parser.parse_args()
+
+    client = create_supabase_client()
+    client.latency = args.latency_ms / 1000
+    date = current_ist_date()
+    class_names = setup_classes(args.classes, daily_limit=args.students + args.apptest_sessions)
+
+    report = {
+        "benchmark": "checkin_load",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "services": run_services(class_names, args.students, args.concurrency, date),
+    }
+    if args.apptest_sessions:
+        report["apptest"] = run_apptest(class_names, args.apptest_sessions, first_roll=args.students + 1)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    services = report["services"]
+    print(f"{args.students} students, {args.classes} classes, {args.concurrency} concurrent, {args.latency_ms:.0f} ms per request")
+    print(f"  {services['checkins_per_minute']:.0f} check-ins/min, {services['requests']} requests, outcomes {services['outcomes']}")
+    print_calls("Service calls", services["calls"], baseline.get("services", {}).get("calls"))
+    if "apptest" in report:
+        apptest = report["apptest"]
+        print(f"AppTest: {apptest['succeeded']}/{apptest['sessions']} sessions submitted in {apptest['seconds']:.1f} s, "
+              f"{apptest['exceptions']} exceptions in {apptest['failed_sessions']} sessions")
+        print_calls("AppTest steps", apptest["calls"], baseline.get("apptest", {}).get("calls"))
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_import_time.py
+"""
+Cold-start time of the admin login screen.
+
+Runs `admin_main.py` (logged out, Streamlit bare mode) in fresh interpreters
+under `python -X importtime`, and reports the median wall time and the
+slowest imports. Fails if the median exceeds --budget-ms, or if a module that
+should only load on first use (LLM stack, dateparser, pyplot) was imported.
+
+    python -m benchmarks.bench_import_time --runs 5 --budget-ms 2500 [--top 15]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = (
+    "import time, runpy; start = time.perf_counter(); "
+    "runpy.run_path('admin_main.py', run_name='__main__'); "
+    "print(f'WALL {time.perf_counter() - start:.6f}')"
+)
+LAZY_MODULES = ("langgraph", "langchain_groq", "langchain_google_genai", "dateparser", "matplotlib.figure", "matplotlib.pyplot")
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_once():
+    env = dict(os.environ, SUPABASE_URL="memory://", LOG_FILE="", PYTHONWARNINGS="ignore")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = float(re.search(r"WALL (\S+)", proc.stdout).group(1))
+    imports = {}
+    for self_us, cumulative_us, indent, module in LINE.findall(proc.stderr):
+        imports[module] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return wall, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=2500.0, help="maximum median cold start")
+    parser.add_argument("--top", type=int, default=15, help="slowest top-level imports to list")
+    args = parser.parse_args()
+
+    walls, imports = [], {}
+    for _ in range(args.runs):
+        wall, imports = run_once()
+        walls.append(wall * 1000)
+    median = statistics.median(walls)
+
+    top_level = sorted(
+        ((cumulative, module) for module, (_, cumulative, depth) in imports.items() if depth == 0),
+        reverse=True,
+    )
+    print(f"admin_main.py cold start: median {median:.0f} ms over {args.runs} runs "
+          f"(min {min(walls):.0f}, max {max(walls):.0f}); {len(imports)} modules imported")
+    print(f"  {'top-level import':<44} {'cumulative ms':>14}")
+    for cumulative, module in top_level[:args.top]:
+        print(f"  {module:<44} {cumulative / 1000:>14.1f}")
+
+    failures = []
+    eager = [m for m in LAZY_MODULES if m in imports]
+    if eager:
+        failures.append(f"imported at login but should be lazy: {', '.join(eager)}")
+    if median > args.budget_ms:
+        failures.append(f"median {median:.0f} ms exceeds budget {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: within {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/bench_intent_router.py
+"""
+Hit rate, latency and correctness of the chatbot's rule-based intent router.
+
+Routes a corpus of admin questions (the few-shot examples, paraphrases and
+questions only the LLM can answer) against a synthetic class. Reports the
+router hit rate, p50/p99 latency per question and end-to-end through the
+agent graph, and checks every routed answer against the pandas code the LLM
+is prompted with.
+
+    python -m benchmarks.bench_intent_router --students 1000 --dates 150 [--repeat 200]
+"""
+import argparse
+import re
+import time
+
+import numpy as np
+
+from benchmarks.bench_presence import make_records
+from Attendence.services import chatbot_service
+from Attendence.services.attendance_matrix import AttendanceMatrix
+from Attendence.services.intent_router import IntentRouter
+
+PCT = "df[date_cols].apply(lambda x: (x == 'P').mean(), axis=1)"
+
+# (question, pandas reference or None); {d1}/{d2} are dates, {name} a student
+CORPUS = [
+    ("How many students are there?", "df.shape[0]"),
+    ("how many students", "df.shape[0]"),
+    ("Total number of students in this class", "df.shape[0]"),
+    ("What is the total number of classes?", "len(date_cols)"),
+    ("How many classes have been held so far?", "len(date_cols)"),
+    ("Who was present on {d1}?", "df[df['{d1}'] == 'P']['name'].tolist()"),
+    ("List students who were present on {d2}", "df[df['{d2}'] == 'P']['name'].tolist()"),
+    ("Who was absent on {d1}?", "df[df['{d1}'] != 'P']['name'].tolist()"),
+    ("Which students were absent on {d2}", "df[df['{d2}'] != 'P']['name'].tolist()"),
+    ("Count how many students were present on {d1}.", "int((df['{d1}'] == 'P').sum())"),
+    ("How many students were distinctively absent on {d2}?", "int((df['{d2}'] != 'P').sum())"),
+    ("What is the attendance percentage of {name}?", "float(" + PCT + "[df['name'] == '{name}'].iloc[0] * 100)"),
+    ("what's {name}'s attendance", "float(" + PCT + "[df['name'] == '{name}'].iloc[0] * 100)"),
+    ("List students with 100% attendance.", "df[df[date_cols].apply(lambda x: (x == 'P').all(), axis=1)]['name'].tolist()"),
+    ("Who has perfect attendance?", "df[df[date_cols].apply(lambda x: (x == 'P').all(), axis=1)]['name'].tolist()"),
+    ("Who has less than 75% attendance?", "df[" + PCT + " * 100 < 75]['name'].tolist()"),
+    ("Which students are below 60%?", "df[" + PCT + " * 100 < 60]['name'].tolist()"),
+    ("List students above 90% attendance", "df[" + PCT + " * 100 > 90]['name'].tolist()"),
+    ("Who are the top 5 students by attendance?", "df.assign(p=" + PCT + ").nlargest(5, 'p')['name'].tolist()"),
+    ("Who are the bottom 3 students by attendance?", "df.assign(p=" + PCT + ").nsmallest(3, 'p')['name'].tolist()"),
+    ("Which date had the highest attendance?", "date_cols[int(df[date_cols].apply(lambda x: (x == 'P').sum()).argmax())]"),
+    ("Which day had the lowest attendance?", "date_cols[int(df[date_cols].apply(lambda x: (x == 'P').sum()).argmin())]"),
+    ("What is the average attendance of the whole class?", "float((df[date_cols] == 'P').stack().mean() * 100)"),
+    ("Show me the record of roll number 101.", None),
+    # Only the LLM can answer these
+    ("Did more students attend on {d1} or {d2}?", None),
+    ("List all dates where attendance was above 90%.", None),
+    ("Which students were absent on both {d1} and {d2}?", None),
+    ("Who has the longest absence streak?", None),
+    ("Plot attendance over time", None),
+    ("Hi, who are you?", None),
+]
+
+
+def build(students, dates):
+    matrix = AttendanceMatrix.from_records("Bench", make_records(students, dates, density=0.8), version=1)
+    df = matrix.frame
+    date_cols = [c for c in df.columns if re.match(r"\d{4}-\d{2}-\d{2}", str(c))]
+    fill = {"d1": date_cols[-1], "d2": date_cols[len(date_cols) // 2], "name": df["name"].iloc[len(df) // 3]}
+    corpus = [(q.format(**fill), ref.format(**fill) if ref else None) for q, ref in CORPUS]
+    return matrix, df, date_cols, corpus
+
+
+def same(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        return abs(float(a) - float(b)) < 1e-6
+    return a == b
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--dates", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    matrix, df, date_cols, corpus = build(args.students, args.dates)
+    router = IntentRouter(matrix.presence)
+    agent = chatbot_service.get_agent_for_df(df, presence=matrix.presence)
+    # The first dated question loads dateparser; keep that out of the timings
+    agent.invoke(chatbot_service.AppState(question=corpus[5][0]))
+
+    hits, mismatches, route_ms, agent_ms = 0, [], [], []
+    print(f"{args.students} students x {args.dates} dates, {len(corpus)} questions")
+    for question, reference in corpus:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            routed = router.route(question)
+        route_ms.append((time.perf_counter() - start) / args.repeat * 1000)
+
+        if routed is None:
+            print(f"  {'(llm)':<20} {route_ms[-1]:>8.3f} ms  {question}")
+            continue
+        hits += 1
+        start = time.perf_counter()
+        agent.invoke(chatbot_service.AppState(question=question))
+        agent_ms.append((time.perf_counter() - start) * 1000)
+        print(f"  {routed.intent:<20} {route_ms[-1]:>8.3f} ms  {question}")
+
+        if reference is not None:
+            expected = eval(reference, {"df": df, "date_cols": date_cols, "re": re})
+            if not same(routed.result, expected):
+                mismatches.append(question)
+
+    route_ms, agent_ms = np.asarray(route_ms), np.asarray(agent_ms)
+    print(f"Router hit rate: {hits}/{len(corpus)} ({hits / len(corpus):.0%})")
+    print(f"route(): p50 {np.percentile(route_ms, 50):.3f} ms, p99 {np.percentile(route_ms, 99):.3f} ms")
+    if len(agent_ms):
+        print(f"agent.invoke() on routed questions: p50 {np.percentile(agent_ms, 50):.2f} ms, "
+              f"p99 {np.percentile(agent_ms, 99):.2f} ms")
+    print(f"Answers disagreeing with the pandas reference: {mismatches or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
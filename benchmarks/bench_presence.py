@@ -0,0 +1,86 @@
+# benchmarks/bench_presence.py
+"""
+Analytics statistics on the bit-packed PresenceMatrix vs. the "P"/"A" string
+pivot the analytics panel used to build.
+
+    python -m benchmarks.bench_presence --students 5000 --dates 200
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from Attendence.services.presence import PresenceMatrix
+
+
+def make_records(students, dates, density, seed=0):
+    rng = np.random.default_rng(seed)
+    day_names = pd.date_range("2026-01-01", periods=dates).strftime("%Y-%m-%d").to_numpy()
+    present = rng.random((students, dates)) < density
+    rows, cols = np.nonzero(present)
+    return pd.DataFrame({
+        "roll_number": rows + 1,
+        "name": np.char.add("Student ", (rows + 1).astype(str)),
+        "date": day_names[cols],
+    })
+
+
+def string_pivot_stats(records):
+    """The previous analytics_ui code path."""
+    pivot_df = records.assign(status="P").pivot_table(
+        index=["roll_number", "name"], columns="date", values="status", aggfunc="first", fill_value="A"
+    ).reset_index()
+    date_cols = pivot_df.columns[2:]
+    pivot_df["Present_Count"] = pivot_df[date_cols].apply(lambda row: sum(val == "P" for val in row), axis=1)
+    pivot_df["Attendance %"] = (pivot_df["Present_Count"] / len(date_cols) * 100).round(2)
+    flattened = pivot_df[date_cols].values.flatten()
+    present = sum(val == "P" for val in flattened)
+    absent = sum(val != "P" for val in flattened)
+    return pivot_df["Present_Count"].to_numpy(), present, absent
+
+
+def presence_stats(records):
+    return presence_stats_prebuilt(PresenceMatrix.from_records(records))
+
+
+def presence_stats_prebuilt(presence):
+    """Stats on an already-built matrix (the memoized case in the app)."""
+    summary = presence.summary_frame()
+    presence.date_counts()
+    presence.longest_streaks()
+    presence.students_in_range(50, 100)
+    return summary["Present_Count"].to_numpy(), presence.total_present(), presence.total_absent()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--dates", type=int, default=200)
+    parser.add_argument("--density", type=float, default=0.75)
+    args = parser.parse_args()
+
+    records = make_records(args.students, args.dates, args.density)
+    print(f"{args.students} students x {args.dates} dates, {len(records)} records")
+
+    pivot_seconds, expected = timed(string_pivot_stats, records)
+    packed_seconds, actual = timed(presence_stats, records)
+    assert np.array_equal(expected[0], actual[0]) and expected[1:] == actual[1:], "statistics differ"
+
+    presence = PresenceMatrix.from_records(records)
+    stats_seconds, _ = timed(presence_stats_prebuilt, presence)
+    print(f"{'string pivot':<28} {pivot_seconds:>8.3f} s")
+    print(f"{'presence build + stats':<28} {packed_seconds:>8.3f} s   ({pivot_seconds / packed_seconds:.1f}x faster)")
+    print(f"{'presence stats (memoized)':<28} {stats_seconds:>8.3f} s   ({pivot_seconds / stats_seconds:.0f}x faster)")
+    print(f"packed size: {presence.bits.nbytes / 1e6:.2f} MB "
+          f"(string frame: {presence.to_display_frame().memory_usage(deep=True).sum() / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_prompt_context.py
+"""
+Size and cost of the chatbot's code-generation prompt as the semester grows.
+
+Builds a class at increasing numbers of dates and reports the prompt length
+(characters and a rough chars/4 token estimate), the one-off PromptContext
+build time and the per-question build_prompt time. Exits non-zero if the
+prompt at the largest date count is more than --slack characters longer than
+at the smallest, i.e. if prompt size grows with the date range.
+
+    python -m benchmarks.bench_prompt_context --students 200 --dates 10 30 100 300 [--slack 64]
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.bench_presence import make_records
+from Attendence.services.attendance_matrix import AttendanceMatrix
+from Attendence.services.chatbot_service import PromptContext
+
+QUESTION = "Which students were absent on both 2026-01-02 and 2026-01-03?"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--dates", type=int, nargs="+", default=[10, 30, 100, 300])
+    parser.add_argument("--slack", type=int, default=64, help="allowed growth in characters")
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    lengths = []
+    print(f"{'dates':>6} {'chars':>8} {'~tokens':>8} {'context ms':>11} {'prompt us':>10}")
+    for dates in sorted(args.dates):
+        matrix = AttendanceMatrix.from_records("Bench", make_records(args.students, dates, density=0.8), version=1)
+        df = matrix.frame
+
+        start = time.perf_counter()
+        context = PromptContext.from_frame(df, matrix.presence)
+        context_ms = (time.perf_counter() - start) * 1000
+
+        context.build_prompt(QUESTION)  # loads the few-shot examples
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            prompt = context.build_prompt(QUESTION)
+        prompt_us = (time.perf_counter() - start) / args.repeat * 1e6
+
+        lengths.append(len(prompt))
+        print(f"{dates:>6} {len(prompt):>8} {len(prompt) // 4:>8} {context_ms:>11.2f} {prompt_us:>10.1f}")
+
+    growth = lengths[-1] - lengths[0]
+    print(f"Prompt growth from {min(args.dates)} to {max(args.dates)} dates: {growth} chars (allowed {args.slack})")
+    if growth > args.slack:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
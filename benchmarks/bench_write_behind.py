@@ -0,0 +1,61 @@
+# benchmarks/bench_write_behind.py
+"""
+Inserts/sec of the write-behind queue vs. one insert per submission, against
+the in-memory Supabase stand-in with an injected per-request latency.
+
+    python -m benchmarks.bench_write_behind --rows 1000 --latency-ms 20
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from Attendence.core.memory_client import MemorySupabaseClient
+from Attendence.services import attendance_service
+from Attendence.services.submission_queue import SubmissionQueue
+
+
+def run_unbatched(rows, latency):
+    client = MemorySupabaseClient(latency=latency)
+    start = time.perf_counter()
+    for roll in range(rows):
+        attendance_service.submit_attendance("Bench", roll, f"Student {roll}", "2026-01-01", supabase=client)
+    elapsed = time.perf_counter() - start
+    return {"mode": "unbatched", "rows": rows, "seconds": elapsed, "requests": client.requests}
+
+
+def run_batched(rows, latency, batch_size):
+    client = MemorySupabaseClient(latency=latency)
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = SubmissionQueue(os.path.join(tmp, "queue.sqlite3"), supabase=client, batch_size=batch_size)
+        start = time.perf_counter()
+        for roll in range(rows):
+            queue.enqueue("Bench", roll, f"Student {roll}", "2026-01-01")
+        acked = time.perf_counter() - start
+        queue.flush()
+        elapsed = time.perf_counter() - start
+        queue.close()
+    assert len(client.tables["attendance"]) == rows
+    return {"mode": f"batched(batch={batch_size})", "rows": rows, "seconds": elapsed,
+            "requests": client.requests, "ack_seconds": acked}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    results = [run_unbatched(args.rows, latency), run_batched(args.rows, latency, args.batch_size)]
+
+    print(f"{args.rows} submissions, {args.latency_ms:.0f} ms per request")
+    print(f"{'mode':<20} {'requests':>9} {'seconds':>9} {'inserts/sec':>12} {'acks/sec':>10}")
+    for r in results:
+        acks = r["rows"] / r["ack_seconds"] if "ack_seconds" in r else r["rows"] / r["seconds"]
+        print(f"{r['mode']:<20} {r['requests']:>9} {r['seconds']:>9.3f} {r['rows'] / r['seconds']:>12.1f} {acks:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
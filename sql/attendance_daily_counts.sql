@@ -0,0 +1,47 @@
+-- sql/attendance_daily_counts.sql
+-- Per-(class, date) attendance counter read by counter_service.
+--
+-- The counter row is maintained by a trigger on public.attendance, so it is
+-- updated in the same transaction as every insert or delete. Limit checks
+-- then read a single integer instead of counting the day's rows.
+--
+-- Apply before sql/submit_attendance_atomic.sql.
+
+create table if not exists public.attendance_daily_counts (
+    class_name text    not null,
+    date       date    not null,
+    count      integer not null default 0,
+    primary key (class_name, date)
+);
+
+create or replace function public.bump_attendance_daily_count()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        insert into public.attendance_daily_counts as c (class_name, date, count)
+        values (new.class_name, new.date, 1)
+        on conflict (class_name, date) do update set count = c.count + 1;
+        return new;
+    end if;
+
+    update public.attendance_daily_counts
+       set count = greatest(count - 1, 0)
+     where class_name = old.class_name
+       and date = old.date;
+    return old;
+end;
+$$;
+
+drop trigger if exists attendance_daily_count_trg on public.attendance;
+create trigger attendance_daily_count_trg
+    after insert or delete on public.attendance
+    for each row execute function public.bump_attendance_daily_count();
+
+-- Backfill from existing records.
+insert into public.attendance_daily_counts as c (class_name, date, count)
+select class_name, date, count(*)
+  from public.attendance
+ group by class_name, date
+on conflict (class_name, date) do update set count = excluded.count;
@@ -0,0 +1,13 @@
+-- sql/realtime_publication.sql
+-- Publishes row changes of the tables the app's change feed listens to
+-- (Attendence/services/change_feed.py) over Supabase Realtime.
+-- REPLICA IDENTITY FULL makes DELETE events carry the whole old row,
+-- so the feed knows which class a deleted row belonged to.
+
+alter table public.classroom_settings replica identity full;
+alter table public.attendance replica identity full;
+alter table public.roll_map replica identity full;
+
+alter publication supabase_realtime add table public.classroom_settings;
+alter publication supabase_realtime add table public.attendance;
+alter publication supabase_realtime add table public.roll_map;
@@ -0,0 +1,92 @@
+-- sql/submit_attendance_atomic.sql
+-- Single round-trip attendance submission used by
+-- attendance_service.submit_attendance_atomic().
+--
+-- Validates the class code, rejects duplicates, enforces daily_limit, locks
+-- the roll number to a name and inserts the attendance row in one
+-- transaction. The classroom_settings row is locked FOR UPDATE, so
+-- concurrent submissions for the same class are serialised and the limit
+-- check cannot be raced.
+--
+-- Returns one of: accepted, class_not_found, class_closed, invalid_code,
+-- already_marked, limit_reached, name_required, name_mismatch
+-- (see attendance_service.SubmitOutcome).
+--
+-- Requires sql/attendance_daily_counts.sql (the daily counter table).
+--
+-- The in-process stand-in lives in Attendence/core/memory_client.py; keep
+-- the two in sync.
+
+-- One mark per student per day.
+create unique index if not exists attendance_class_roll_date_key
+    on public.attendance (class_name, roll_number, date);
+
+create or replace function public.submit_attendance_atomic(
+    p_class_name  text,
+    p_roll_number bigint,
+    p_name        text,
+    p_code        text,
+    p_date        date
+) returns text
+language plpgsql
+as $$
+declare
+    v_settings    public.classroom_settings%rowtype;
+    v_locked_name text;
+    v_name        text := btrim(coalesce(p_name, ''));
+    v_count       integer;
+begin
+    select * into v_settings
+      from public.classroom_settings
+     where class_name = p_class_name
+       for update;
+
+    if not found then
+        return 'class_not_found';
+    end if;
+    if not coalesce(v_settings.is_open, false) then
+        return 'class_closed';
+    end if;
+    if v_settings.code is distinct from p_code then
+        return 'invalid_code';
+    end if;
+
+    if exists (
+        select 1 from public.attendance
+         where class_name = p_class_name
+           and roll_number = p_roll_number
+           and date = p_date
+    ) then
+        return 'already_marked';
+    end if;
+
+    select count into v_count
+      from public.attendance_daily_counts
+     where class_name = p_class_name
+       and date = p_date;
+    if coalesce(v_count, 0) >= v_settings.daily_limit then
+        return 'limit_reached';
+    end if;
+
+    select name into v_locked_name
+      from public.roll_map
+     where class_name = p_class_name
+       and roll_number = p_roll_number;
+
+    if v_locked_name is null then
+        if v_name = '' then
+            return 'name_required';
+        end if;
+        insert into public.roll_map (class_name, roll_number, name)
+        values (p_class_name, p_roll_number, v_name);
+        v_locked_name := v_name;
+    elsif v_name <> '' and v_name <> v_locked_name then
+        return 'name_mismatch';
+    end if;
+
+    insert into public.attendance (class_name, roll_number, name, date)
+    values (p_class_name, p_roll_number, v_locked_name, p_date);
+
+    return 'accepted';
+end;
+$$;
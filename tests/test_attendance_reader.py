@@ -0,0 +1,60 @@
+import random
+
+from Attendence.core.memory_client import MemorySupabaseClient
+from Attendence.services.attendance_reader import build_attendance_frame, iter_attendance_records
+
+
+def _seeded_client(rows=2500, dates=20):
+    """A client capped at 1,000 rows per response, holding `rows` records of one class
+    (about rows / dates per date, inserted out of date order) plus another class."""
+    client = MemorySupabaseClient(max_rows=1000)
+    records = [
+        {"class_name": "Big", "roll_number": i, "name": f"Student {i}", "date": f"2026-01-{i % dates + 1:02d}"}
+        for i in range(rows)
+    ]
+    random.Random(0).shuffle(records)
+    client.table("attendance").insert(records).execute()
+    client.table("attendance").insert(
+        {"class_name": "Other", "roll_number": 1, "name": "Someone", "date": "2026-01-01"}
+    ).execute()
+    return client
+
+
+def test_iter_attendance_records_returns_every_row_once_in_date_id_order():
+    client = _seeded_client()
+    records = list(iter_attendance_records("Big", supabase=client))
+
+    assert len(records) == 2500
+    ids = [row["id"] for row in records]
+    assert len(set(ids)) == len(ids)
+    keys = [(row["date"], row["id"]) for row in records]
+    assert keys == sorted(keys)
+    assert {row["roll_number"] for row in records} == set(range(2500))
+
+
+def test_iter_attendance_records_pages_within_one_date():
+    # Every row on the same date: the cursor must advance on id alone
+    client = MemorySupabaseClient(max_rows=1000)
+    client.table("attendance").insert([
+        {"class_name": "Big", "roll_number": i, "name": f"Student {i}", "date": "2026-01-01"}
+        for i in range(2500)
+    ]).execute()
+
+    records = list(iter_attendance_records("Big", supabase=client))
+    assert [row["roll_number"] for row in records] == list(range(2500))
+
+
+def test_build_attendance_frame_returns_every_row_with_only_the_requested_columns():
+    client = _seeded_client()
+    frame = build_attendance_frame("Big", columns=("roll_number", "date"), supabase=client)
+
+    assert list(frame.columns) == ["roll_number", "date"]
+    assert len(frame) == 2500
+    assert sorted(frame["roll_number"]) == list(range(2500))
+    assert frame["date"].is_monotonic_increasing
+
+
+def test_build_attendance_frame_for_a_class_without_records():
+    frame = build_attendance_frame("Missing", supabase=_seeded_client(rows=10))
+    assert frame.empty
+    assert list(frame.columns) == ["roll_number", "name", "date"]
@@ -0,0 +1,16 @@
+import logging
+
+from Attendence.core.logger import _level
+
+
+def test_level_accepts_names_and_numbers():
+    assert _level("warning") == logging.WARNING
+    assert _level(" error ") == logging.ERROR
+    assert _level("15") == 15
+    assert _level("") == logging.DEBUG
+
+
+def test_unknown_level_falls_back_to_info_and_reports_it():
+    problems = []
+    assert _level("verbose", problems=problems) == logging.INFO
+    assert problems == ["Unknown log level 'VERBOSE'; using INFO"]
@@ -0,0 +1,34 @@
+import numpy as np
+
+from Attendence.services.presence import PresenceMatrix
+
+
+def _matrix(present):
+    present = np.asarray(present, dtype=bool)
+    n_students, n_dates = present.shape
+    return PresenceMatrix.from_bool(
+        np.arange(1, n_students + 1),
+        [f"Student {i}" for i in range(1, n_students + 1)],
+        [f"2026-01-{d:02d}" for d in range(1, n_dates + 1)],
+        present,
+    )
+
+
+def test_default_range_keeps_every_student():
+    # 2/3 rounds up to 66.67, above the unrounded 66.666...
+    presence = _matrix([[True, True, False], [True, True, True]])
+    summary = presence.summary_frame()
+    low, high = float(summary["Attendance %"].min()), float(summary["Attendance %"].max())
+
+    assert low == 66.67
+    assert presence.students_in_range(low, high).tolist() == [True, True]
+    assert summary["Attendance %"].between(low, high).all()
+
+
+def test_students_in_range_matches_the_rounded_summary_column():
+    presence = _matrix([[True, True, False], [True, True, True], [True, False, False]])
+    summary = presence.summary_frame()
+
+    assert presence.students_in_range(66.67, 100.0).tolist() == [True, True, False]
+    assert presence.students_in_range(66.67, 100.0).tolist() == summary["Attendance %"].between(66.67, 100.0).tolist()
+    assert presence.students_in_range(0.0, 33.33).tolist() == [False, False, True]
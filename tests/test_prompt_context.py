@@ -0,0 +1,40 @@
+import pandas as pd
+
+from Attendence.services.attendance_matrix import AttendanceMatrix
+from Attendence.services.chatbot_service import SAMPLE_DATES, PromptContext
+
+QUESTION = "Which students were absent on both 2026-01-02 and 2026-01-03?"
+
+
+def _matrix(students, dates):
+    days = pd.date_range("2026-01-01", periods=dates).strftime("%Y-%m-%d")
+    records = pd.DataFrame(
+        [(roll, f"Student {roll}", day) for roll in range(1, students + 1) for i, day in enumerate(days) if (roll + i) % 3],
+        columns=["roll_number", "name", "date"],
+    )
+    return AttendanceMatrix.from_records("Prompt", records, version=1)
+
+
+def _prompt(dates, with_presence=True):
+    matrix = _matrix(20, dates)
+    context = PromptContext.from_frame(matrix.frame, matrix.presence if with_presence else None)
+    return context, context.build_prompt(QUESTION)
+
+
+def test_prompt_length_stays_bounded_at_300_dates():
+    _, small = _prompt(5)
+    _, large = _prompt(300)
+    # Only the date count and range digits may differ
+    assert len(large) - len(small) <= 16
+
+
+def test_context_describes_the_date_range_without_listing_columns():
+    context, prompt = _prompt(300)
+    assert (context.first_date, context.last_date, context.n_dates) == ("2026-01-01", "2026-10-27", 300)
+    assert context.meta_columns == ("roll_number", "name")
+    assert "2026-05-01" not in prompt
+    assert f"({300 - SAMPLE_DATES} earlier date columns not shown)" in prompt
+
+
+def test_context_from_the_frame_alone_matches_the_presence_matrix():
+    assert _prompt(40, with_presence=False)[0] == _prompt(40)[0]
@@ -0,0 +1,39 @@
+from Attendence.core.memory_client import MemorySupabaseClient
+from Attendence.services import attendance_service
+
+
+def _record(client, class_name, roll_number, date):
+    client.table("attendance").insert(
+        {"class_name": class_name, "roll_number": roll_number, "name": f"Student {roll_number}", "date": date}
+    ).execute()
+
+
+def test_summary_counts_a_class_day_missing_from_the_cached_dates():
+    client = MemorySupabaseClient()
+    _record(client, "StaleDates", 1, "2026-01-01")
+    assert attendance_service.get_class_dates("StaleDates", client) == ("2026-01-01",)
+
+    # Another replica records the class's first check-in of a new day; this
+    # process's cached date list does not know about it yet.
+    _record(client, "StaleDates", 1, "2026-01-02")
+
+    summary = attendance_service.get_student_summary("StaleDates", 1, client)
+    assert summary.class_dates == ("2026-01-01", "2026-01-02")
+    assert summary.present_count == 2
+    assert summary.total_classes == 2
+    assert summary.absent_count == 0
+    assert summary.percentage == 100.0
+    assert attendance_service.get_class_dates("StaleDates", client) == ("2026-01-01", "2026-01-02")
+
+
+def test_summary_of_an_absent_student():
+    client = MemorySupabaseClient()
+    _record(client, "Absences", 1, "2026-01-01")
+    _record(client, "Absences", 1, "2026-01-02")
+    _record(client, "Absences", 2, "2026-01-02")
+
+    summary = attendance_service.get_student_summary("Absences", 2, client)
+    assert summary.total_classes == 2
+    assert summary.present_count == 1
+    assert summary.absent_count == 1
+    assert summary.percentage == 50.0
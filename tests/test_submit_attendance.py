@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from Attendence.core.memory_client import MemorySupabaseClient
+from Attendence.services.attendance_service import SubmitOutcome, submit_attendance_atomic
+
+DATE = "2026-01-05"
+
+
+def _client(is_open=True, daily_limit=100, latency=0.0, roll_map=()):
+    return MemorySupabaseClient(
+        tables={
+            "classroom_settings": [
+                {"class_name": "Atomic", "code": "1234", "is_open": is_open, "daily_limit": daily_limit}
+            ],
+            "roll_map": [{"class_name": "Atomic", "roll_number": roll, "name": name} for roll, name in roll_map],
+        },
+        latency=latency,
+    )
+
+
+def _submit(client, roll_number=1, name="Student 1", code="1234", class_name="Atomic"):
+    return submit_attendance_atomic(class_name, roll_number, name, code, date=DATE, supabase=client)
+
+
+def _attendance(client):
+    return client.find("attendance", class_name="Atomic", date=DATE)
+
+
+def test_accepted_inserts_the_record_and_locks_the_roll_number():
+    client = _client()
+    assert _submit(client) is SubmitOutcome.ACCEPTED
+    assert [(r["roll_number"], r["name"]) for r in _attendance(client)] == [(1, "Student 1")]
+    assert client.find("roll_map", class_name="Atomic", roll_number=1)[0]["name"] == "Student 1"
+    assert client.find("attendance_daily_counts", class_name="Atomic", date=DATE)[0]["count"] == 1
+
+
+def test_accepted_without_a_name_uses_the_locked_name():
+    client = _client(roll_map=[(1, "Student 1")])
+    assert _submit(client, name="") is SubmitOutcome.ACCEPTED
+    assert _attendance(client)[0]["name"] == "Student 1"
+
+
+def test_class_not_found():
+    client = _client()
+    assert _submit(client, class_name="Missing") is SubmitOutcome.CLASS_NOT_FOUND
+    assert client.find("attendance") == []
+
+
+def test_class_closed():
+    client = _client(is_open=False)
+    assert _submit(client) is SubmitOutcome.CLASS_CLOSED
+    assert _attendance(client) == []
+
+
+def test_invalid_code():
+    client = _client()
+    assert _submit(client, code="0000") is SubmitOutcome.INVALID_CODE
+    assert _attendance(client) == []
+
+
+def test_already_marked():
+    client = _client()
+    assert _submit(client) is SubmitOutcome.ACCEPTED
+    assert _submit(client) is SubmitOutcome.ALREADY_MARKED
+    assert len(_attendance(client)) == 1
+
+
+def test_limit_reached():
+    client = _client(daily_limit=1)
+    assert _submit(client, roll_number=1, name="Student 1") is SubmitOutcome.ACCEPTED
+    assert _submit(client, roll_number=2, name="Student 2") is SubmitOutcome.LIMIT_REACHED
+    assert len(_attendance(client)) == 1
+
+
+def test_name_required_for_an_unlocked_roll_number():
+    client = _client()
+    assert _submit(client, name="  ") is SubmitOutcome.NAME_REQUIRED
+    assert _attendance(client) == []
+    assert client.find("roll_map", class_name="Atomic") == []
+
+
+def test_name_mismatch_with_the_locked_name():
+    client = _client(roll_map=[(1, "Student 1")])
+    assert _submit(client, name="Someone Else") is SubmitOutcome.NAME_MISMATCH
+    assert _attendance(client) == []
+
+
+def test_concurrent_submissions_for_one_roll_number_insert_once():
+    client = _client(latency=0.01)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        outcomes = list(pool.map(lambda _: _submit(client), range(32)))
+
+    assert outcomes.count(SubmitOutcome.ACCEPTED) == 1
+    assert outcomes.count(SubmitOutcome.ALREADY_MARKED) == 31
+    assert len(_attendance(client)) == 1
+
+
+def test_concurrent_submissions_never_exceed_the_daily_limit():
+    client = _client(daily_limit=5, latency=0.01)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        outcomes = list(pool.map(lambda roll: _submit(client, roll, f"Student {roll}"), range(1, 33)))
+
+    assert outcomes.count(SubmitOutcome.ACCEPTED) == 5
+    assert outcomes.count(SubmitOutcome.LIMIT_REACHED) == 27
+    assert len(_attendance(client)) == 5
+    assert client.find("attendance_daily_counts", class_name="Atomic", date=DATE)[0]["count"] == 5